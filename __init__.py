@@ -16,95 +16,76 @@ import os
 # Add the current directory to Python path for imports
 sys.path.insert(0, os.path.dirname(__file__))
 
-import aqt
 from aqt import mw
-from aqt.utils import showInfo, tooltip
-from aqt.qt import *
+from aqt.qt import QAction
+from aqt import gui_hooks
 from anki.hooks import addHook
 
-# Import all the step functions
-from src.ui.selection_dialogs import deck_selection, sync_type_selection
-from src.ui.field_mapping import field_mapping
-from src.core.card_extractor import extract_mature_cards
-from src.core.clipboard_handler import copy_words_to_clipboard
+from src.config import get_config
 
 MENU_ITEM_NAME = "Export Known Words to Clipboard"
+BATCH_MENU_ITEM_NAME = "Batch Export Known Words from Several Decks"
+MERGE_MENU_ITEM_NAME = "Merge Known Words from Several Profiles"
 
-def run_sync_workflow():
-    """
-    Main workflow function that orchestrates the entire export process.
-    
-    This function calls each step sequentially and passes results between them.
-    If any step fails, the workflow terminates with an appropriate error message.
-    """
-    
-    WORKFLOW_START_MESSAGE = "Starting Export Known Words to Clipboard workflow..."
-    
-    try:
-        # Step 1: User Initiates Export (handled by menu item calling this function)
-        
-        # Step 2: Deck Selection
-        deck_result = deck_selection()
-        if not deck_result:
-            return False
-        
-        selected_deck_name = deck_result['deck_name']
-        deck_id = deck_result['deck_id']
-        card_count = deck_result['card_count']
-        
-        # Step 3: Export Type Selection
-        sync_type_result = sync_type_selection(selected_deck_name, deck_id, card_count)
-        if not sync_type_result:
-            return False
-        
-        sync_words_only = sync_type_result['sync_words_only']
-        
-        # Step 4: Field Mapping
-        field_mapping_result = field_mapping(selected_deck_name, deck_id, card_count, sync_words_only)
-        if not field_mapping_result:
-            return False
-        
-        word_field = field_mapping_result['word_field']
-        sentence_field = field_mapping_result['sentence_field']
-        
-        # Step 5: Extract Mature Cards
-        extracted_data = extract_mature_cards(
-            selected_deck_name, 
-            deck_id, 
-            card_count, 
-            sync_words_only, 
-            word_field, 
-            sentence_field
-        )
-        if not extracted_data:
-            showInfo("Card extraction failed. Workflow terminated.")
-            return False
-        
-        # Step 6: Copy Words to Clipboard
-        if not copy_words_to_clipboard(extracted_data):
-            showInfo("Failed to copy words to clipboard. Workflow terminated.")
-            return False
-        
-        # Workflow completed successfully!
-        return True
-        
-    except Exception as e:
-        showInfo(f"Unexpected error in export workflow: {str(e)}")
-        return False
+MENU_ITEMS = (
+    (MENU_ITEM_NAME, "run_sync_workflow"),
+    (BATCH_MENU_ITEM_NAME, "run_batch_workflow"),
+    (MERGE_MENU_ITEM_NAME, "run_merge_workflow"),
+)
+
+# Only the menu and the review hook are set up at startup. The workflows,
+# their dialogs and the extraction code are imported on the first click.
+def run_workflow(name):
+    """Import the export workflows on first use and run the one called name."""
+    from src import workflow
+    return getattr(workflow, name)()
 
 def setup_menu():
-    """Set up the add-on menu item, removing any existing one to prevent duplicates."""
-    # Remove existing action to avoid creating duplicates when switching profiles
+    """Set up the add-on menu items, removing any existing ones to prevent duplicates."""
+    # Remove existing actions to avoid creating duplicates when switching profiles
     for action in mw.form.menuTools.actions():
-        if action.text() == MENU_ITEM_NAME:
+        if action.text() in dict(MENU_ITEMS):
             mw.form.menuTools.removeAction(action)
     
-    # Create the new menu action
-    action = QAction(MENU_ITEM_NAME, mw)
-    action.triggered.connect(run_sync_workflow)
-    
-    # Add it to the tools menu
-    mw.form.menuTools.addAction(action)
+    # Create the new menu actions and add them to the tools menu
+    for name, workflow in MENU_ITEMS:
+        action = QAction(name, mw)
+        action.triggered.connect(lambda _=False, workflow=workflow: run_workflow(workflow))
+        mw.form.menuTools.addAction(action)
+
+def on_card_answered(reviewer, card, ease):
+    """Keep the known words index up to date while the user reviews."""
+    if not get_config()['use_known_words_index']:
+        return
+    try:
+        from src.core.known_words_index import update_card
+        update_card(mw.col, card)
+    except Exception:
+        # The index is reconciled before every export anyway, so a failed
+        # update must never interrupt reviewing.
+        pass
+
+def on_sync_finished():
+    """Schedule the auto-export profiles after a sync."""
+    if not get_config()['auto_export_profiles']:
+        return
+    from src import auto_export
+    auto_export.schedule()
+
+def on_profile_will_close():
+    """Run the auto-export profiles while the collection is still open."""
+    if not get_config()['auto_export_profiles']:
+        return
+    try:
+        from src import auto_export
+        auto_export.flush()
+    except Exception:
+        # Closing the profile must never fail because of an export; the
+        # profiles run again after the next sync.
+        pass
 
 # Set up the menu when Anki starts
 addHook("profileLoaded", setup_menu)
+gui_hooks.reviewer_did_answer_card.append(on_card_answered)
+gui_hooks.sync_did_finish.append(on_sync_finished)
+gui_hooks.profile_will_close.append(on_profile_will_close)
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+"""
+Minimal stand-ins for aqt and anki, enough to import the add-on's
+__init__.py without Anki. Used by the tests and by bench_import.py to load
+the add-on the way Anki does at startup.
+"""
+
+import sys
+import types
+
+
+class _Hooks:
+    """Stand-in for aqt.gui_hooks: every hook is a plain list."""
+
+    def __getattr__(self, name):
+        hook = []
+        setattr(self, name, hook)
+        return hook
+
+
+def install_anki_stubs():
+    """Register minimal aqt and anki modules, enough to import the add-on's __init__.py."""
+    aqt = types.ModuleType("aqt")
+    aqt.mw = None
+    aqt.appVersion = "stub"
+    aqt.gui_hooks = _Hooks()
+    aqt_qt = types.ModuleType("aqt.qt")
+    aqt_qt.QAction = object
+    aqt.qt = aqt_qt
+
+    anki = types.ModuleType("anki")
+    anki_hooks = types.ModuleType("anki.hooks")
+    anki_hooks.hooks = {}
+    anki_hooks.addHook = lambda name, function: anki_hooks.hooks.setdefault(name, []).append(function)
+    anki.hooks = anki_hooks
+
+    sys.modules.update({'aqt': aqt, 'aqt.qt': aqt_qt, 'anki': anki, 'anki.hooks': anki_hooks})
\ No newline at end of file
@@ -0,0 +1,158 @@
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark suite for the export pipeline on synthetic collections.
+
+Generates a synthetic collection for every requested size and times each
+export stage separately: deck resolution, mature-id search, ordering,
+field extraction, normalization and formatting. Results are written as JSON so runs on
+different commits can be compared. Run from the add-on folder:
+
+    python benchmarks/bench_export.py --cards 10000 100000 --output bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Make the add-on's src package importable without Anki, like the add-on's
+# own __init__.py does.
+sys.path.insert(0, ADDON_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from src.core.extraction import extract_rows_bulk, find_mature_ids_in_deck, order_card_ids
+from src.core.formatter import format_rows, template_for
+from src.core.headless import HeadlessCollection
+from src.core.normalization import normalize_field, normalize_rows
+from synthetic_collection import FIELD_NAMES, create_collection
+
+STAGES = ["deck_resolution", "mature_id_search", "ordering", "field_extraction", "normalization", "formatting"]
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=ADDON_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_export_once(path, deck_name, sync_words_only):
+    """
+    Run every export stage once on a fresh connection.
+
+    Returns {stage: (seconds, count)}, where count is the number of deck ids
+    for deck resolution and the number of cards for every other stage.
+    """
+    timings = {}
+    word_field, sentence_field = FIELD_NAMES[0], FIELD_NAMES[1]
+
+    with HeadlessCollection(path) as col:
+        start = time.perf_counter()
+        deck_id = col.decks.id_for_name(deck_name)
+        deck_ids = col.decks.deck_and_child_ids(deck_id)
+        timings['deck_resolution'] = (time.perf_counter() - start, len(deck_ids))
+
+        start = time.perf_counter()
+        mature_ids = find_mature_ids_in_deck(col, deck_id)
+        timings['mature_id_search'] = (time.perf_counter() - start, len(mature_ids))
+
+        start = time.perf_counter()
+        mature_ids = order_card_ids(col, mature_ids)
+        timings['ordering'] = (time.perf_counter() - start, len(mature_ids))
+
+        start = time.perf_counter()
+        rows = extract_rows_bulk(col, mature_ids, sync_words_only, word_field, sentence_field)
+        timings['field_extraction'] = (time.perf_counter() - start, len(rows))
+
+        # Start every run with a cold cache, like the first export in a session.
+        normalize_field.cache_clear()
+        start = time.perf_counter()
+        rows = list(normalize_rows(rows, dedupe='note'))
+        timings['normalization'] = (time.perf_counter() - start, len(rows))
+
+        start = time.perf_counter()
+        format_rows(rows, template_for(sync_words_only))
+        timings['formatting'] = (time.perf_counter() - start, len(rows))
+
+    return timings
+
+
+def benchmark_collection(path, deck_name, sync_words_only, repeat):
+    """Return per-stage statistics over repeat runs."""
+    runs = [run_export_once(path, deck_name, sync_words_only) for _ in range(repeat)]
+    stages = {}
+    for stage in STAGES:
+        seconds = [run[stage][0] for run in runs]
+        stages[stage] = {
+            'min_seconds': min(seconds),
+            'median_seconds': statistics.median(seconds),
+            'count': runs[0][stage][1],
+        }
+    stages['total'] = {
+        'min_seconds': min(sum(run[stage][0] for stage in STAGES) for run in runs),
+        'median_seconds': statistics.median(sum(run[stage][0] for stage in STAGES) for run in runs),
+    }
+    return stages
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the export stages on synthetic collections.")
+    parser.add_argument("--cards", type=int, nargs="+", default=[10_000, 100_000], help="collection sizes")
+    parser.add_argument("--decks", type=int, default=5, help="top-level decks")
+    parser.add_argument("--depth", type=int, default=2, help="subdeck nesting depth")
+    parser.add_argument("--note-types", type=int, default=2, help="note types")
+    parser.add_argument("--fields", type=int, default=4, help="fields per note type")
+    parser.add_argument("--field-size", type=int, default=40, help="approximate characters per field")
+    parser.add_argument("--mature-ratio", type=float, default=0.6, help="fraction of mature cards")
+    parser.add_argument("--deck", default="Deck 0", help="deck to export (subdecks included)")
+    parser.add_argument("--words-only", action="store_true", help="benchmark the words-only format")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per collection")
+    parser.add_argument("--workdir", help="keep generated collections in this folder instead of a temp folder")
+    parser.add_argument("--output", help="write the JSON report to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    report = {
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'deck': args.deck,
+        'sync_words_only': args.words_only,
+        'repeat': args.repeat,
+        'results': [],
+    }
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        workdir = args.workdir or temp_dir
+        os.makedirs(workdir, exist_ok=True)
+        for cards in args.cards:
+            path = os.path.join(workdir, f"synthetic-{cards}.anki2")
+            collection = create_collection(
+                path, cards=cards, decks=args.decks, depth=args.depth, note_types=args.note_types,
+                fields=args.fields, field_size=args.field_size, mature_ratio=args.mature_ratio
+            )
+            report['results'].append({
+                'collection': collection,
+                'stages': benchmark_collection(path, args.deck, args.words_only, args.repeat),
+            })
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as out:
+            out.write(output + "\n")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+# -*- coding: utf-8 -*-
+
+"""
+Import-time check for the add-on's startup cost.
+
+Anki imports the add-on's __init__.py while it starts, so that file should
+only import what it needs to install the menu and the review hook; the
+workflows are imported on the first menu click. This script:
+
+- lists the module-level imports of __init__.py and fails if any of them is
+  not in STARTUP_IMPORTS
+- times loading __init__.py the way Anki does (as a package named after the
+  add-on folder, with aqt and anki already imported) and fails if it takes
+  longer than --budget-ms or cannot be loaded at all
+- reports the import time of the modules loaded on first use
+
+When Anki is not installed, aqt and anki are replaced by the stand-ins of
+anki_stubs.py, so the time measured is that of the add-on's own code.
+Modules loaded on first use that cannot be imported here are reported as
+skipped. Run from the add-on folder; the exit status is non-zero if the
+startup budget is exceeded or startup cannot be measured:
+
+    python benchmarks/bench_import.py [--budget-ms 10]
+"""
+
+import argparse
+import ast
+import os
+import subprocess
+import sys
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+ADDON_DIR = os.path.dirname(BENCHMARKS_DIR)
+
+# Modules the add-on's __init__.py may import at startup. aqt and anki are
+# already loaded by Anki at that point.
+STARTUP_IMPORTS = {'os', 'sys', 'aqt', 'aqt.qt', 'anki.hooks', 'src.config'}
+
+# Modules imported on the first menu click, reported for information
+LAZY_MODULES = ['src.core', 'src.workflow', 'src.auto_export']
+
+# Loading __init__.py takes about a millisecond; importing the workflows and
+# the extraction code with it takes tens of milliseconds.
+DEFAULT_BUDGET_MS = 10
+
+# Run in a fresh interpreter: imports aqt and anki (or their stand-ins)
+# first, as Anki has at startup, then times executing the add-on's __init__.py.
+STARTUP_SCRIPT = """
+import importlib.util, os, sys, time
+sys.path.insert(0, {benchmarks_dir!r})
+try:
+    import aqt, aqt.qt, anki.hooks
+except ImportError:
+    from anki_stubs import install_anki_stubs
+    install_anki_stubs()
+
+spec = importlib.util.spec_from_file_location(
+    "addon", os.path.join({addon_dir!r}, "__init__.py"), submodule_search_locations=[{addon_dir!r}]
+)
+addon = importlib.util.module_from_spec(spec)
+sys.modules["addon"] = addon
+start = time.perf_counter()
+spec.loader.exec_module(addon)
+print((time.perf_counter() - start) * 1000)
+"""
+
+
+def startup_imports(path):
+    """Return the modules imported at module level by the file at path."""
+    tree = ast.parse(open(path, encoding="utf-8").read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            modules.append(node.module)
+    return modules
+
+
+def measure_startup(repeat):
+    """
+    Return the best time in milliseconds of loading the add-on's __init__.py.
+    
+    Each run loads it in a fresh interpreter. Raises RuntimeError with the
+    interpreter's error output if it cannot be loaded.
+    """
+    code = STARTUP_SCRIPT.format(benchmarks_dir=BENCHMARKS_DIR, addon_dir=ADDON_DIR)
+    best = None
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ADDON_DIR)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip())
+        milliseconds = float(result.stdout.strip().splitlines()[-1])
+        best = milliseconds if best is None else min(best, milliseconds)
+    return best
+
+
+def measure_import(module, repeat):
+    """
+    Return the best cumulative import time of module in milliseconds.
+    
+    Each run imports module in a fresh interpreter with -X importtime.
+    Returns None if the module cannot be imported here.
+    """
+    code = f"import sys; sys.path.insert(0, {ADDON_DIR!r}); import {module}"
+    best = None
+    for _ in range(repeat):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                                capture_output=True, text=True, cwd=ADDON_DIR)
+        if result.returncode != 0:
+            return None
+        # Lines look like "import time:  self [us] | cumulative | name"
+        for line in result.stderr.splitlines():
+            parts = line.split("|")
+            if len(parts) == 3 and parts[2].strip() == module:
+                cumulative = int(parts[1]) / 1000
+                best = cumulative if best is None else min(best, cumulative)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS,
+                        help="maximum time of loading the add-on's __init__.py at startup")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per measurement (best is reported)")
+    args = parser.parse_args(argv)
+    
+    failed = False
+    imports = startup_imports(os.path.join(ADDON_DIR, "__init__.py"))
+    unexpected = [module for module in imports if module not in STARTUP_IMPORTS]
+    for module in unexpected:
+        print(f"FAIL  __init__.py imports {module} at startup; import it on first use instead")
+    failed = failed or bool(unexpected)
+    
+    print(f"{'module':<20}  {'loaded':<10}  {'ms':>8}")
+    try:
+        milliseconds = measure_startup(args.repeat)
+    except RuntimeError as e:
+        print(f"{'__init__.py':<20}  {'startup':<10}  {'FAIL cannot be loaded':>8}\n{e}")
+        return 1
+    over_budget = milliseconds > args.budget_ms
+    print(f"{'__init__.py':<20}  {'startup':<10}  {milliseconds:>8.1f}" + ("  FAIL over budget" if over_budget else ""))
+    failed = failed or over_budget
+    
+    for module in LAZY_MODULES:
+        milliseconds = measure_import(module, args.repeat)
+        if milliseconds is None:
+            print(f"{module:<20}  {'first use':<10}  {'skipped (needs Anki)':>8}")
+            continue
+        print(f"{module:<20}  {'first use':<10}  {milliseconds:>8.1f}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+
+"""
+Generator for synthetic Anki collection files used by the benchmarks.
+
+The generated file uses the current collection schema (note types, fields
+and decks in their own tables) with only the tables and columns the add-on
+reads. It can be opened with src.core.headless.HeadlessCollection, but not
+with Anki itself.
+"""
+
+import os
+import random
+import sqlite3
+
+SCHEMA = """
+create table col (
+    id integer primary key, crt integer not null, mod integer not null, scm integer not null,
+    ver integer not null, dty integer not null, usn integer not null, ls integer not null,
+    conf text not null, models text not null, decks text not null, dconf text not null, tags text not null
+);
+create table notes (
+    id integer primary key, guid text not null, mid integer not null, mod integer not null,
+    usn integer not null, tags text not null, flds text not null, sfld integer not null,
+    csum integer not null, flags integer not null, data text not null
+);
+create table cards (
+    id integer primary key, nid integer not null, did integer not null, ord integer not null,
+    mod integer not null, usn integer not null, type integer not null, queue integer not null,
+    due integer not null, ivl integer not null, factor integer not null, reps integer not null,
+    lapses integer not null, left integer not null, odue integer not null, odid integer not null,
+    flags integer not null, data text not null
+);
+create table revlog (
+    id integer primary key, cid integer not null, usn integer not null, ease integer not null,
+    ivl integer not null, lastIvl integer not null, factor integer not null, time integer not null,
+    type integer not null
+);
+create table decks (
+    id integer primary key not null, name text not null, mtime_secs integer not null,
+    usn integer not null, common blob not null, kind blob not null
+);
+create table notetypes (
+    id integer primary key not null, name text not null, mtime_secs integer not null,
+    usn integer not null, config blob not null
+);
+create table fields (
+    ntid integer not null, ord integer not null, name text not null, config blob not null,
+    primary key (ntid, ord)
+) without rowid;
+create index ix_cards_nid on cards (nid);
+create index ix_cards_sched on cards (did, queue, due);
+create index ix_revlog_cid on revlog (cid);
+"""
+
+# Ids are millisecond timestamps in real collections; start somewhere plausible.
+BASE_ID = 1_600_000_000_000
+BASE_TIME = 1_600_000_000
+
+FIELD_NAMES = ["Word", "Sentence", "Reading", "Meaning", "Notes", "Audio"]
+
+
+def _text(rng, size):
+    """Random lowercase words with a total length of about size characters."""
+    words = []
+    length = 0
+    while length < size:
+        word = "".join(rng.choice("abcdefghijklmnopqrstuvwxyz") for _ in range(rng.randint(2, 9)))
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words)[:size]
+
+
+def _deck_names(decks, depth):
+    """Build decks top-level names, each with a chain of depth nested subdecks."""
+    names = []
+    for top in range(decks):
+        path = [f"Deck {top}"]
+        names.append(list(path))
+        for level in range(depth):
+            path.append(f"Level {level + 1}")
+            names.append(list(path))
+    return names
+
+
+def create_collection(path, cards=10_000, decks=5, depth=2, note_types=2, fields=4, field_size=40,
+                      mature_ratio=0.6, reviews_per_card=3, seed=0):
+    """
+    Write a synthetic collection to path and return a dict describing it.
+
+    Args:
+        cards: Number of cards (one card per note)
+        decks: Number of top-level decks
+        depth: Subdeck nesting depth below every top-level deck
+        note_types: Number of note types, each with the same field names
+        fields: Fields per note type (at least 2: word and sentence)
+        field_size: Approximate length of the sentence and other fields
+        mature_ratio: Fraction of cards with an interval of 21 days or more
+        reviews_per_card: Review log entries per card
+        seed: Random seed, so the same arguments produce the same file
+    """
+    rng = random.Random(seed)
+    fields = max(2, min(fields, len(FIELD_NAMES)))
+
+    if os.path.exists(path):
+        os.remove(path)
+    db = sqlite3.connect(path)
+    db.executescript(SCHEMA)
+
+    db.execute("insert into col values (1, ?, ?, ?, 18, 0, 0, 0, '', '', '', '', '')",
+               (BASE_TIME, BASE_ID, BASE_ID))
+
+    deck_ids = []
+    deck_rows = [(1, "Default", BASE_TIME, 0, b"", b"")]
+    for i, name in enumerate(_deck_names(decks, depth)):
+        deck_id = BASE_ID + i + 1
+        deck_ids.append(deck_id)
+        deck_rows.append((deck_id, "\x1f".join(name), BASE_TIME, 0, b"", b""))
+    db.executemany("insert into decks values (?, ?, ?, ?, ?, ?)", deck_rows)
+
+    note_type_ids = [BASE_ID + 100_000 + i for i in range(note_types)]
+    db.executemany("insert into notetypes values (?, ?, ?, 0, ?)",
+                   [(note_type_id, f"Note Type {i}", BASE_TIME, b"") for i, note_type_id in enumerate(note_type_ids)])
+    db.executemany("insert into fields values (?, ?, ?, ?)",
+                   [(note_type_id, ord, FIELD_NAMES[ord], b"")
+                    for note_type_id in note_type_ids for ord in range(fields)])
+
+    def note_rows():
+        for i in range(cards):
+            values = [f"word{i}", _text(rng, field_size)] + [_text(rng, field_size) for _ in range(fields - 2)]
+            yield (BASE_ID + i, f"guid{i}", note_type_ids[i % note_types], BASE_TIME, 0, "",
+                   "\x1f".join(values), 0, 0, 0, "")
+
+    intervals = [rng.randint(21, 400) if rng.random() < mature_ratio else rng.randint(1, 20) for _ in range(cards)]
+
+    def card_rows():
+        for i, interval in enumerate(intervals):
+            yield (BASE_ID + i, BASE_ID + i, deck_ids[i % len(deck_ids)], 0, BASE_TIME, 0, 2, 2,
+                   rng.randint(0, 5000), interval, 2500, reviews_per_card, 0, 0, 0, 0, 0, "")
+
+    def revlog_rows():
+        # Reviews of all cards are interleaved in time. Each card's intervals
+        # grow towards its final interval, which the last review sets.
+        review_id = BASE_ID
+        for review in range(reviews_per_card):
+            for i, interval in enumerate(intervals):
+                review_id += rng.randint(1, 1_000)
+                new_interval = interval * (review + 1) // reviews_per_card or 1
+                last_interval = interval * review // reviews_per_card
+                yield (review_id, BASE_ID + i, 0, 3, new_interval, last_interval, 2500, 5000, 1)
+
+    db.executemany("insert into notes values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", note_rows())
+    db.executemany("insert into cards values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", card_rows())
+    db.executemany("insert into revlog values (?, ?, ?, ?, ?, ?, ?, ?, ?)", revlog_rows())
+    db.commit()
+    db.close()
+
+    return {
+        'cards': cards,
+        'decks': len(deck_ids),
+        'depth': depth,
+        'note_types': note_types,
+        'fields': fields,
+        'field_size': field_size,
+        'mature_ratio': mature_ratio,
+        'reviews_per_card': reviews_per_card,
+        'seed': seed,
+    }
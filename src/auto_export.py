@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+"""
+Automatic export of the saved auto-export profiles (see core.auto_export).
+
+The profiles run in a background thread after every sync, debounced so
+that several syncs in a row lead to one run, and once more when the
+profile is closed. Like the workflows, this module is only imported when
+it is first needed (see the add-on's __init__.py).
+"""
+
+import threading
+
+from aqt import mw
+from aqt.utils import tooltip
+from aqt.qt import QTimer
+
+from .core.auto_export import profile_name, run_auto_exports, stale_profiles
+from .core.errors import ExportCancelled
+from .config import get_config
+from .export_options import export_options
+
+def show_results(results):
+    """Show a tooltip for profiles that were written or failed; skipped ones stay silent."""
+    
+    WRITTEN_MESSAGE = "Auto-export: {name} updated ({rows} words)"
+    FAILED_MESSAGE = "Auto-export: {name} failed: {error}"
+    
+    lines = []
+    for result in results:
+        if result['status'] == 'written':
+            lines.append(WRITTEN_MESSAGE.format(**result))
+        elif result['status'] == 'failed':
+            lines.append(FAILED_MESSAGE.format(**result))
+    if lines:
+        tooltip("<br>".join(lines), period=5000)
+
+class AutoExportScheduler:
+    """
+    Debounced runs of the auto-export profiles.
+    
+    schedule() (re)starts a timer, so triggers in quick succession collapse
+    into one run once they stop for auto_export_delay_seconds. The run
+    happens in a background thread; a trigger during a run schedules one
+    more run after it. flush() runs the stale profiles right away, for when
+    the collection is about to close.
+    """
+    
+    def __init__(self):
+        self._timer = QTimer(mw)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._start)
+        self._future = None
+        self._cancel = None
+        self._pending = False
+    
+    def schedule(self):
+        if self._future is not None:
+            self._pending = True
+            return
+        self._timer.start(int(get_config()['auto_export_delay_seconds'] * 1000))
+    
+    def _start(self):
+        if mw.col is None:
+            return
+        col = mw.col
+        config = get_config()
+        profiles = list(config['auto_export_profiles'])
+        cancel = threading.Event()
+        
+        def task():
+            return run_auto_exports(col, profiles, export_options(config), cancel.is_set)
+        
+        self._cancel = cancel
+        self._future = mw.taskman.run_in_background(task, self._on_done)
+    
+    def _on_done(self, future):
+        # A run that flush() already waited for is finished with
+        if future is not self._future:
+            return
+        self._future = None
+        try:
+            show_results(future.result())
+        except ExportCancelled:
+            pass
+        except Exception as e:
+            tooltip(f"Auto-export failed: {e}")
+        
+        if self._pending:
+            self._pending = False
+            self.schedule()
+    
+    def flush(self):
+        """
+        Stop any scheduled or running export and run the stale profiles now.
+        
+        This blocks the main thread on purpose: it runs while the profile
+        closes, and the collection is closed as soon as that hook returns,
+        so the work cannot be left to a background thread. Only profiles
+        whose collection, settings or target changed since their last run
+        are exported (usually none, as the runs after each sync are done by
+        then), with Anki's progress window naming the one being written.
+        """
+        
+        PROGRESS_LABEL = "Auto-export: writing {name} ({done} of {total})..."
+        
+        self._timer.stop()
+        self._pending = False
+        if self._future is not None:
+            # The background run stops at its next chunk; whatever it did not
+            # finish is run below (finished profiles are skipped).
+            self._cancel.set()
+            future, self._future = self._future, None
+            try:
+                future.result()
+            except Exception:
+                pass
+        
+        config = get_config()
+        if mw.col is None or not config['auto_export_profiles']:
+            return
+        options = export_options(config)
+        profiles = stale_profiles(mw.col, config['auto_export_profiles'], options)
+        if not profiles:
+            return
+        
+        mw.progress.start(immediate=True)
+        try:
+            for done, profile in enumerate(profiles, start=1):
+                mw.progress.update(label=PROGRESS_LABEL.format(name=profile_name(profile), done=done,
+                                                               total=len(profiles)))
+                run_auto_exports(mw.col, [profile], options)
+        finally:
+            mw.progress.finish()
+
+# The scheduler lives as long as Anki, across profile switches.
+_scheduler = None
+
+def _get_scheduler():
+    global _scheduler
+    if _scheduler is None:
+        _scheduler = AutoExportScheduler()
+    return _scheduler
+
+def schedule():
+    """Run the auto-export profiles in the background once triggers stop coming."""
+    _get_scheduler().schedule()
+
+def flush():
+    """Run the auto-export profiles now, e.g. before the profile closes."""
+    _get_scheduler().flush()
\ No newline at end of file
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+
+"""
+Command-line exporter that works on a collection file without Anki.
+
+Opens a .anki2 collection read-only and streams the known words of a deck to
+stdout or a file, in the same format the add-on copies to the clipboard.
+Run it from the add-on folder, for example:
+
+    python -m src.cli ~/.local/share/Anki2/User\ 1/collection.anki2 \\
+        --deck "Japanese::Vocab" --word-field Word --sentence-field Sentence
+
+Use --list-decks and --list-fields to find the names to pass. Given several
+collection files (e.g. one per profile), the known words of the deck in each
+of them are read concurrently and merged into one list.
+"""
+
+import argparse
+import os
+import sys
+
+from .core.errors import ExportError
+from .core.extraction import DEFAULT_ORDER, MATURE_INTERVAL, ORDERINGS, collect_mature_cards, find_note_type_ids
+from .core.file_export import FILE_FORMATS, file_row_template, write_export_file
+from .core.formatter import write_rows
+from .core.frequency import load_frequency_index
+from .core.headless import HeadlessCollection
+from .core.merge import collect_merged
+from .core.normalization import DEDUPE_MODES
+from .core.tokenization import DEFAULT_MIN_TOKEN_COUNT
+
+
+def _build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m src.cli",
+        description="Export known words from mature cards of an Anki collection file."
+    )
+    parser.add_argument("collections", nargs="+", metavar="collection",
+                        help="path to the collection.anki2 file; with several, their known words are merged")
+    parser.add_argument("--deck", help="deck to export from (subdecks are included), e.g. 'Japanese::Vocab'")
+    parser.add_argument("--word-field", help="name of the field containing the word")
+    parser.add_argument("--sentence-field",
+                        help="name of the field containing the sentence; exports words and sentences when given")
+    parser.add_argument("--min-interval", type=int, default=MATURE_INTERVAL,
+                        help=f"minimum interval in days for a card to count as known (default: {MATURE_INTERVAL})")
+    parser.add_argument("--since-revlog-id", type=int,
+                        help="only export cards that became known after this review log id")
+    parser.add_argument("--order", choices=sorted(ORDERINGS), default=DEFAULT_ORDER,
+                        help=f"export order, newest or largest last (default: {DEFAULT_ORDER})")
+    parser.add_argument("--limit", type=int, help="only export the last LIMIT words of the order")
+    parser.add_argument("--raw", action="store_true",
+                        help="export field contents as stored instead of removing HTML, furigana and cloze markup")
+    parser.add_argument("--dedupe", choices=DEDUPE_MODES + ("none",), default="note",
+                        help="drop repeated words within a note or across the export (default: note)")
+    parser.add_argument("--tokenize", metavar="TOKENIZER",
+                        help="also export words found in the sentences: words, janome or module:function "
+                             "(needs --sentence-field)")
+    parser.add_argument("--min-token-count", type=int, default=DEFAULT_MIN_TOKEN_COUNT,
+                        help="number of sentences a word must appear in to be exported with --tokenize "
+                             f"(default: {DEFAULT_MIN_TOKEN_COUNT})")
+    parser.add_argument("--frequency-list",
+                        help="frequency list (one word per line, most frequent first) to rank the words by")
+    parser.add_argument("--max-rank", type=int,
+                        help="only export words ranked MAX_RANK or better in --frequency-list")
+    parser.add_argument("--sort-by-frequency", action="store_true",
+                        help="export the most frequent words of --frequency-list first")
+    parser.add_argument("--processes", type=int,
+                        help="normalize fields and tokenize sentences in this many worker processes "
+                             "(for very large exports of a single collection)")
+    parser.add_argument("-o", "--output",
+                        help="write to this file instead of stdout (left untouched if the content did not change)")
+    parser.add_argument("--format", choices=FILE_FORMATS, default="tsv",
+                        help="output format: tsv (as copied to the clipboard), csv or jsonl with card metadata "
+                             "(default: tsv)")
+    parser.add_argument("--gzip", action="store_true", help="gzip-compress the file given with --output")
+    parser.add_argument("--list-decks", action="store_true", help="list deck names and exit")
+    parser.add_argument("--list-fields", action="store_true",
+                        help="list the fields of the note types used in --deck and exit")
+    return parser
+
+
+def _list_fields(col, deck_id, out):
+    for note_type_id in find_note_type_ids(col, col.decks.deck_and_child_ids(deck_id)):
+        note_type = col.models.get(note_type_id)
+        if note_type:
+            out.write(f"{note_type['name']}: {', '.join(field['name'] for field in note_type['flds'])}\n")
+
+
+def _open_collection(parser, path):
+    try:
+        return HeadlessCollection(path)
+    except Exception as e:
+        parser.exit(2, f"Could not open collection: {e}\n")
+
+
+def main(argv=None):
+    try:
+        return _main(argv)
+    except BrokenPipeError:
+        # The reader stopped early (e.g. piped into head). Point stdout at
+        # devnull so flushing it at exit does not raise again.
+        devnull = os.open(os.devnull, os.O_WRONLY)
+        os.dup2(devnull, sys.stdout.fileno())
+        return 1
+
+
+def _main(argv):
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+    merge = len(args.collections) > 1
+
+    if args.list_decks or args.list_fields:
+        if args.list_fields and not args.deck:
+            parser.error("--deck is required")
+        for path in args.collections:
+            with _open_collection(parser, path) as col:
+                if merge:
+                    sys.stdout.write(f"{path}:\n")
+                if args.list_decks:
+                    for name, _ in col.decks.all_names_and_ids():
+                        sys.stdout.write(f"{name}\n")
+                    continue
+                deck_id = col.decks.id_for_name(args.deck)
+                if deck_id is None:
+                    parser.exit(2, f"Deck not found: {args.deck}\n")
+                _list_fields(col, deck_id, sys.stdout)
+        return 0
+
+    if not args.deck:
+        parser.error("--deck is required")
+    if not args.word_field:
+        parser.error("--word-field is required")
+    if args.gzip and not args.output:
+        parser.error("--gzip requires --output")
+    if args.tokenize and not args.sentence_field:
+        parser.error("--tokenize requires --sentence-field")
+    if (args.max_rank or args.sort_by_frequency) and not args.frequency_list:
+        parser.error("--max-rank and --sort-by-frequency require --frequency-list")
+    if merge and args.since_revlog_id is not None:
+        parser.error("--since-revlog-id only applies to a single collection")
+    if merge and args.processes is not None:
+        # Merged collections are already read in one thread each
+        parser.error("--processes only applies to a single collection")
+
+    sync_words_only = not args.sentence_field
+    frequency = None
+    if args.frequency_list:
+        try:
+            frequency = {'index': load_frequency_index(args.frequency_list), 'max_rank': args.max_rank,
+                         'sort': args.sort_by_frequency}
+        except ExportError as e:
+            parser.exit(2, f"{e}\n")
+    options = dict(
+        order=args.order,
+        limit=args.limit,
+        normalize=not args.raw,
+        dedupe=None if args.dedupe == "none" else args.dedupe,
+        tokenizer=args.tokenize,
+        min_token_count=args.min_token_count,
+        frequency=frequency,
+        min_interval=args.min_interval
+    )
+    col = None if merge else _open_collection(parser, args.collections[0])
+    try:
+        if merge:
+            sources = [
+                {'label': path, 'path': path, 'deck': args.deck, 'word_field': args.word_field,
+                 'sentence_field': args.sentence_field}
+                for path in args.collections
+            ]
+            extracted_data = collect_merged(sources, sync_words_only, **options)
+        else:
+            deck_id = col.decks.id_for_name(args.deck)
+            if deck_id is None:
+                parser.exit(2, f"Deck not found: {args.deck}\n")
+            extracted_data = collect_mature_cards(
+                col,
+                deck_id,
+                sync_words_only,
+                args.word_field,
+                args.sentence_field,
+                since_revlog_id=args.since_revlog_id,
+                processes=args.processes,
+                **options
+            )
+
+        if args.output:
+            write_export_file(extracted_data, args.output, args.format, args.gzip)
+        else:
+            header, row_template = file_row_template(args.format, sync_words_only)
+            if header:
+                sys.stdout.write(header + "\n")
+            write_rows(extracted_data['cards'], sys.stdout, row_template)
+            sys.stdout.write("\n")
+    except ExportError as e:
+        parser.exit(1, f"{e}\n")
+    except FileNotFoundError as e:
+        parser.exit(2, f"Could not open collection: {e}\n")
+    finally:
+        if col is not None:
+            col.close()
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
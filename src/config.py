@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+"""
+Access to the add-on configuration stored by Anki's add-on manager.
+"""
+
+from aqt import mw
+
+from .paths import ADDON_PACKAGE
+
+# Defaults used when a key is missing from the user's config (e.g. after an
+# update added a new option).
+DEFAULT_CONFIG = {
+    'legacy_intersection_search': False,
+    'use_known_words_index': True,
+    'diagnostics': False,
+    'profile_extraction': False,
+    'normalize_fields': True,
+    'deduplicate': 'note',
+    'field_mappings': {},
+    'export_file_path': "",
+    'clipboard_page_size': 0,
+    'preview_before_export': True,
+    'sentence_tokenizer': "",
+    'sentence_token_min_count': 3,
+    'frequency_list_path': "",
+    'frequency_max_rank': 0,
+    'sort_by_frequency': False,
+    'auto_export_profiles': [],
+    'auto_export_delay_seconds': 10,
+}
+
+
+def get_config():
+    """Return the add-on config merged over DEFAULT_CONFIG."""
+    config = dict(DEFAULT_CONFIG)
+    try:
+        config.update(mw.addonManager.getConfig(ADDON_PACKAGE) or {})
+    except Exception:
+        pass
+    return config
+
+
+def write_config(config):
+    """Persist the given config dict through Anki's add-on manager."""
+    mw.addonManager.writeConfig(ADDON_PACKAGE, config)
@@ -2,7 +2,25 @@
 
 """
 Core functionality for Anki Export Known Words to Clipboard add-on.
+
+Only modules that do not depend on aqt are imported here, so that they can
+be used outside of Anki (e.g. by the benchmarks). Modules that need a running
+Anki (clipboard_handler) are imported directly by their users.
 """
 
-from . import card_extractor
-from . import clipboard_handler 
\ No newline at end of file
+from . import errors
+from . import formatter
+from . import file_export
+from . import normalization
+from . import preview
+from . import tokenization
+from . import frequency
+
+from . import export_state
+from . import known_words_index
+from . import extraction
+from . import batch
+from . import merge
+from . import auto_export
+from . import headless
+from . import diagnostics
\ No newline at end of file
@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+
+"""
+Saved export profiles, written to files without any dialog.
+
+A profile names a deck, the fields to read, a file format and a target
+file, like the choices made in the export dialogs:
+
+    {'name': "Japanese", 'deck': "Japanese::Vocab", 'word_field': "Word", 'sentence_field': "Sentence",
+     'mappings': {"Japanese (recognition)": {'word': "Expression", 'sentence': "Example"}},
+     'format': "tsv", 'compress': False, 'path': "/path/to/known_words.txt"}
+
+'mappings' (optional) overrides the fields for note types by name; note
+types without the word field are left out. Without a sentence_field only
+words are exported. Profiles are read the way a batch export of a single
+deck is (see batch.py), with no preview, and written with
+file_export.write_export_file.
+
+Every run is stored with the collection's modification time; a profile is
+skipped while the collection, the profile, the global export options and
+its target file are unchanged since its last run. Like extraction.py, nothing here imports aqt.
+"""
+
+import hashlib
+import json
+import os
+
+from .batch import collect_batch
+from .errors import ExportCancelled, ExportError
+from .export_state import EXPORT_STATE_PATH, load_auto_export_run, save_auto_export_run
+from .extraction import find_note_type_ids
+from .file_export import FILE_FORMATS, write_export_file
+
+
+def profile_signature(profile, options=None):
+    """
+    Return a hash of the profile's settings and the export options, so
+    profiles run again when either is edited.
+
+    The frequency index is hashed by the size and modification time of its
+    list, so a changed list also runs the profiles again.
+    """
+    options = dict(options or {})
+    frequency = options.get('frequency')
+    if frequency:
+        index = frequency['index']
+        options['frequency'] = dict(frequency, index=[index.source_size, index.source_mtime_ns])
+    settings = {'profile': profile, 'options': options}
+    return hashlib.sha1(json.dumps(settings, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def profile_name(profile):
+    """Return the name a profile's runs are stored and reported under."""
+    return profile.get('name') or profile.get('path')
+
+
+def is_stale(col, profile, options=None, path=EXPORT_STATE_PATH):
+    """Return True if the collection, profile, options or target changed since the profile last ran."""
+    last_run = load_auto_export_run(profile_name(profile), path)
+    return not (last_run and last_run.get('mod') == col.mod
+                and last_run.get('signature') == profile_signature(profile, options)
+                and os.path.exists(os.path.expanduser(profile.get('path', ''))))
+
+
+def stale_profiles(col, profiles, options=None, path=EXPORT_STATE_PATH):
+    """Return the profiles that run_auto_exports would not skip, in their order."""
+    return [profile for profile in profiles if is_stale(col, profile, options, path)]
+
+
+def profile_target(col, profile):
+    """
+    Return the batch.collect_batch target of profile in col.
+
+    Raises ExportError if the deck does not exist or none of its note types
+    has the word field.
+    """
+    deck_id = col.decks.id_for_name(profile['deck'])
+    if deck_id is None:
+        raise ExportError(f"Deck not found: {profile['deck']}")
+
+    overrides = profile.get('mappings') or {}
+    mappings = {}
+    for note_type_id in find_note_type_ids(col, col.decks.deck_and_child_ids(deck_id)):
+        note_type = col.models.get(note_type_id)
+        if not note_type:
+            continue
+        override = overrides.get(note_type['name'], {})
+        word_field = override.get('word', profile['word_field'])
+        sentence_field = override.get('sentence', profile.get('sentence_field')) or None
+        if word_field in [field['name'] for field in note_type['flds']]:
+            mappings[note_type_id] = (word_field, sentence_field)
+
+    if not mappings:
+        raise ExportError(f"No note type in {profile['deck']} has the field {profile['word_field']}.")
+    return {'deck_id': deck_id, 'deck_name': profile['deck'], 'mappings': mappings}
+
+
+def run_profile(col, profile, options=None, is_cancelled=None):
+    """
+    Export profile to its target file.
+
+    options are passed on to batch.collect_batch (normalize, dedupe,
+    tokenizer, frequency, ...). Returns the result of
+    file_export.write_export_file.
+    """
+    file_format = profile.get('format', 'tsv')
+    if file_format not in FILE_FORMATS:
+        raise ExportError(f"Unknown file format: {file_format}")
+
+    sync_words_only = not profile.get('sentence_field')
+    extracted_data = collect_batch(col, [profile_target(col, profile)], sync_words_only,
+                                   is_cancelled=is_cancelled, **(options or {}))
+    return write_export_file(extracted_data, os.path.expanduser(profile['path']), file_format,
+                             profile.get('compress', False), is_cancelled=is_cancelled)
+
+
+def run_auto_exports(col, profiles, options=None, is_cancelled=None, path=EXPORT_STATE_PATH):
+    """
+    Run every profile whose collection, settings, options or target changed since its last run.
+
+    A failing profile does not stop the others. Returns one dict per
+    profile with its 'name' and 'status' ('skipped', 'unchanged', 'written'
+    or 'failed'), plus 'rows' for exported profiles and 'error' for failed
+    ones. Raises ExportCancelled between profiles when is_cancelled()
+    returns True.
+    """
+    col_mod = col.mod
+    results = []
+    for profile in profiles:
+        if is_cancelled and is_cancelled():
+            raise ExportCancelled()
+
+        name = profile_name(profile)
+        if not is_stale(col, profile, options, path):
+            results.append({'name': name, 'status': 'skipped'})
+            continue
+
+        try:
+            file_result = run_profile(col, profile, options, is_cancelled)
+        except ExportCancelled:
+            raise
+        except (ExportError, OSError) as e:
+            results.append({'name': name, 'status': 'failed', 'error': str(e)})
+            continue
+        except KeyError as e:
+            results.append({'name': name, 'status': 'failed', 'error': f"Missing profile setting: {e}"})
+            continue
+        save_auto_export_run(name, {'mod': col_mod, 'signature': profile_signature(profile, options)}, path)
+        results.append({'name': name, 'status': 'written' if file_result['changed'] else 'unchanged',
+                        'rows': file_result['rows']})
+    return results
\ No newline at end of file
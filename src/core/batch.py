@@ -0,0 +1,160 @@
+# -*- coding: utf-8 -*-
+
+"""
+Batch export of several decks, each with its own field mapping per note type.
+
+A batch is a list of targets, one per selected deck:
+
+    {'deck_id': 123, 'deck_name': "Japanese", 'mappings': {note_type_id: (word_field, sentence_field)}}
+
+All targets are served by one scan: the mature cards of every selected deck
+tree are found with a single query, ordered once and read with the same
+chunked queries as a single-deck export. Cards of note types without a
+mapping are skipped. Like extraction.py, nothing here imports aqt.
+"""
+
+from itertools import chain
+
+from .diagnostics import NO_DIAGNOSTICS
+from .errors import ExportCancelled, ExportError
+from .extraction import (
+    DEFAULT_ORDER,
+    FIELD_SEPARATOR,
+    MATURE_INTERVAL,
+    FieldIndexCache,
+    card_row,
+    id_chunks,
+    ids_to_sql,
+    order_card_ids,
+    package_extracted_data,
+)
+from .normalization import normalize_rows
+from .tokenization import DEFAULT_MIN_TOKEN_COUNT
+
+
+def find_batch_mature_ids(col, targets, min_interval=MATURE_INTERVAL, since_revlog_id=None):
+    """
+    Return (card_ids, card_targets) for the mature cards of all targets.
+
+    card_targets maps every card id to the index of its target. A card in
+    several selected deck trees (a deck and one of its subdecks) belongs to
+    the first of them in the order of targets. With since_revlog_id only
+    cards that became mature after that review log entry are returned, as
+    in extraction.find_newly_mature_ids_in_deck.
+    """
+    target_by_deck = {}
+    for index, target in enumerate(targets):
+        for deck_id in col.decks.deck_and_child_ids(target['deck_id']):
+            target_by_deck.setdefault(deck_id, index)
+    if not target_by_deck:
+        return [], {}
+
+    query = "select id, did from cards where did in " + ids_to_sql(target_by_deck) + " and ivl >= ?"
+    args = [min_interval]
+    if since_revlog_id is not None:
+        query += " and id in (select cid from revlog where id > ? and ivl >= ? and lastIvl < ?)"
+        args += [since_revlog_id, min_interval, min_interval]
+
+    card_targets = {card_id: target_by_deck[deck_id] for card_id, deck_id in col.db.all(query, *args)}
+    return list(card_targets), card_targets
+
+
+def iter_batch_rows(col, card_ids, card_targets, targets, sync_words_only, report_progress=None, is_cancelled=None):
+    """
+    Read the rows of card_ids, each with the field mapping of its target.
+
+    Like extraction.iter_rows_bulk, rows are read in chunks and yielded in
+    the order of card_ids. Cards whose note type has no mapping in their
+    target are skipped.
+    """
+    field_indices = FieldIndexCache(col)
+    done = 0
+    for chunk in id_chunks(card_ids):
+        if is_cancelled and is_cancelled():
+            raise ExportCancelled()
+
+        rows_by_id = {}
+        for card_id, interval, due, note_id, note_type_id, flds in col.db.all(
+            "select c.id, c.ivl, c.due, c.nid, n.mid, n.flds from cards c "
+            "join notes n on n.id = c.nid where c.id in " + ids_to_sql(chunk)
+        ):
+            mapping = targets[card_targets[card_id]]['mappings'].get(note_type_id)
+            if mapping is None:
+                continue
+            indices = field_indices.indices(note_type_id, sync_words_only, *mapping)
+            rows_by_id[card_id] = card_row(card_id, interval, due, flds.split(FIELD_SEPARATOR), *indices,
+                                           note_id=note_id)
+        for card_id in chunk:
+            if card_id in rows_by_id:
+                yield rows_by_id[card_id]
+
+        done += len(chunk)
+        if report_progress:
+            report_progress(done, len(card_ids))
+
+
+def collect_batch(col, targets, sync_words_only, group_by_deck=False, order=DEFAULT_ORDER, limit=None,
+                  normalize=False, dedupe=None, tokenizer=None, min_token_count=DEFAULT_MIN_TOKEN_COUNT,
+                  frequency=None, min_interval=MATURE_INTERVAL, since_revlog_id=None,
+                  report_progress=None, is_cancelled=None, diagnostics=NO_DIAGNOSTICS):
+    """
+    Extract the known words of every target in one pass.
+
+    Returns the same dict as extraction.collect_mature_cards, plus 'decks'
+    (the names of the targets) and 'group_by_deck'. With group_by_deck the
+    words of each deck follow each other in the order of targets, and order,
+    limit and deduplication apply within each deck; otherwise the words of
+    all decks are merged into one order, so deduplication also drops words
+    repeated between decks. If since_revlog_id is given, only cards that
+    became mature after that review log entry are exported. Words found in
+    the sentences (see extraction.package_extracted_data) are counted over
+    all decks and follow the words of the last deck.
+    """
+
+    NO_MATURE_CARDS_MESSAGE = "No mature cards found in the selected decks.\n\nMature cards are those with intervals of 21 days or more."
+    NO_NEW_MATURE_CARDS_MESSAGE = "No new known words since your last export.\n\nNo cards in the selected decks became mature since then."
+
+    revlog_watermark = col.db.scalar("select max(id) from revlog") or 0
+
+    with diagnostics.stage("mature_id_search"):
+        card_ids, card_targets = find_batch_mature_ids(col, targets, min_interval, since_revlog_id)
+    diagnostics.set_rows("mature_id_search", len(card_ids))
+
+    if not card_ids:
+        raise ExportError(NO_NEW_MATURE_CARDS_MESSAGE if since_revlog_id is not None else NO_MATURE_CARDS_MESSAGE)
+
+    with diagnostics.stage("ordering"):
+        if group_by_deck:
+            groups = [[] for _ in targets]
+            for card_id in card_ids:
+                groups[card_targets[card_id]].append(card_id)
+            groups = [order_card_ids(col, group, order, limit, min_interval, is_cancelled) for group in groups]
+        else:
+            groups = [order_card_ids(col, card_ids, order, limit, min_interval, is_cancelled)]
+    total_candidates = sum(len(group) for group in groups)
+    diagnostics.set_rows("ordering", total_candidates)
+
+    # Progress is reported over all groups together.
+    def group_rows(group, offset):
+        group_progress = None
+        if report_progress:
+            group_progress = lambda done, total: report_progress(offset + done, total_candidates)
+        rows = iter_batch_rows(col, group, card_targets, targets, sync_words_only, group_progress, is_cancelled)
+        if group_by_deck and (normalize or dedupe):
+            rows = normalize_rows(rows, normalize, dedupe)
+        return rows
+
+    offsets = [sum(len(group) for group in groups[:index]) for index in range(len(groups))]
+    rows = chain.from_iterable(group_rows(group, offset) for group, offset in zip(groups, offsets))
+
+    # Grouped rows are normalized per deck above; merged rows together here.
+    extracted_data = package_extracted_data(rows, sync_words_only, None, None,
+                                            incremental=since_revlog_id is not None,
+                                            revlog_watermark=revlog_watermark, total_candidates=total_candidates,
+                                            normalize=normalize and not group_by_deck,
+                                            dedupe=None if group_by_deck else dedupe,
+                                            tokenizer=tokenizer, min_token_count=min_token_count,
+                                            frequency=frequency)
+    extracted_data['decks'] = [target['deck_name'] for target in targets]
+    extracted_data['group_by_deck'] = group_by_deck
+    return extracted_data
\ No newline at end of file
@@ -5,58 +5,124 @@ Clipboard functionality for copying extracted words to clipboard.
 """
 
 from aqt import mw
-from aqt.utils import showInfo
+from aqt.utils import showInfo, showText
 from aqt.qt import *
 
+from .diagnostics import NO_DIAGNOSTICS
+from .formatter import format_pages, format_rows, template_for
 
-def copy_words_to_clipboard(extracted_data):
+
+def format_clipboard_text(extracted_data, report_progress=None, is_cancelled=None):
+    """
+    Format extracted cards as the text that will be placed on the clipboard.
+    
+    This does not touch any Qt objects and can run in a background thread.
+    See formatter.write_rows for report_progress and is_cancelled.
+    
+    Args:
+        extracted_data: Data from the previous extraction step
+        
+    Returns:
+        str: The formatted text
+    """
+    # Words only, or word TAB sentence (matching Migaku's expected format)
+    row_template = template_for(extracted_data['sync_words_only'])
+    
+    # The cards are streamed from the extractor, so only an upper bound of
+    # their number is known up front.
+    return format_rows(extracted_data['cards'], row_template, extracted_data.get('total_candidates'),
+                       report_progress, is_cancelled)
+
+
+def format_clipboard_pages(extracted_data, page_size, report_progress=None, is_cancelled=None):
+    """
+    Like format_clipboard_text, but split the text into pages of page_size words.
+    
+    The pages are built up front (in the background), so the clipboard pager
+    can switch between them instantly.
+    """
+    row_template = template_for(extracted_data['sync_words_only'])
+    return format_pages(extracted_data['cards'], row_template, page_size, extracted_data.get('total_candidates'),
+                        report_progress, is_cancelled)
+
+
+def _show_success(success_message, diagnostics):
+    """
+    Show the success message, with a "Show diagnostics" button if diagnostics are enabled.
+    
+    The report opens in its own window (it is also in the diagnostics log),
+    so the exported words stay on the clipboard.
+    """
+    if not diagnostics.enabled:
+        showInfo(success_message)
+        return
+    
+    box = QMessageBox(mw)
+    box.setWindowTitle("Anki")
+    box.setIcon(QMessageBox.Icon.Information)
+    box.setText(success_message)
+    show_button = box.addButton("Show diagnostics", QMessageBox.ButtonRole.ActionRole)
+    box.addButton(QMessageBox.StandardButton.Ok)
+    box.exec()
+    
+    if box.clickedButton() == show_button:
+        showText(diagnostics.report(), parent=mw, title="Export diagnostics")
+
+
+def copy_words_to_clipboard(extracted_data, clipboard_text=None, diagnostics=NO_DIAGNOSTICS):
     """
     Copy extracted words to clipboard and provide instructions.
     
     This exports the words to the user's clipboard for easy pasting into
-    other applications like Migaku, spreadsheets, or text editors.
+    other applications like Migaku, spreadsheets, or text editors. Must be
+    called on the main thread.
     
     Args:
         extracted_data: Data from the previous extraction step
+        clipboard_text: Text already built by format_clipboard_text, if the
+            formatting was done in the background
+        diagnostics: Records the clipboard_set stage and enables the
+            "Show diagnostics" button
         
     Returns:
         bool: True if successful, False otherwise
     """
     
-    if not extracted_data or not extracted_data.get('cards'):
+    if not extracted_data or extracted_data.get('cards') is None:
         showInfo("No words to copy to clipboard.")
         return False
     
     try:
-        cards = extracted_data['cards']
         sync_words_only = extracted_data['sync_words_only']
         
-        # Format the words for clipboard
-        clipboard_text = ""
+        if clipboard_text is None:
+            clipboard_text = format_clipboard_text(extracted_data)
         
-        for card in cards:
-            word = card['word']
-            sentence = card['sentence']
-            
-            if sync_words_only:
-                # Words only format
-                clipboard_text += f"{word}\n"
-            else:
-                # Words and sentences format (matching Migaku's expected format)
-                if sentence:
-                    clipboard_text += f"{word}\t{sentence}\n"
-                else:
-                    clipboard_text += f"{word}\n"
+        # Known once the cards have been formatted
+        word_count = extracted_data['total_valid']
         
         # Copy to clipboard
-        clipboard = QApplication.clipboard()
-        clipboard.setText(clipboard_text.strip())
+        with diagnostics.stage("clipboard_set"):
+            clipboard = QApplication.clipboard()
+            clipboard.setText(clipboard_text)
+        diagnostics.set_rows("clipboard_set", word_count)
+        diagnostics.write_log()
         
         # Show success message with instructions
-        word_count = len(cards)
         sync_type = "words only" if sync_words_only else "words and sentences"
         
         success_message = f"✅ Successfully copied {word_count} {sync_type} to clipboard!\n\n"
+        if extracted_data.get('incremental'):
+            success_message += "Only words that became known since your last export were copied.\n\n"
+        if len(extracted_data.get('decks', [])) > 1:
+            combined = "grouped by deck" if extracted_data['group_by_deck'] else "merged into one list"
+            success_message += f"Words from {len(extracted_data['decks'])} decks were {combined}.\n\n"
+        if len(extracted_data.get('sources', [])) > 1:
+            success_message += f"Words from {len(extracted_data['sources'])} collections were merged into one list.\n\n"
+        if extracted_data.get('sentence_words'):
+            success_message += f"{extracted_data['sentence_words']} of them were found in the sentences of mature cards.\n\n"
+        if extracted_data.get('left_out'):
+            success_message += f"{extracted_data['left_out']} words filtered out or excluded in the preview were left out.\n\n"
         success_message += "The words are now ready to paste anywhere!\n\n"
         success_message += "For Migaku users (most common use case):\n"
         success_message += "1. Open the Migaku window\n"
@@ -67,9 +133,36 @@ def copy_words_to_clipboard(extracted_data):
         success_message += "6. Click 'Add Words' again to confirm\n\n"
         success_message += "You can also paste into spreadsheets, text editors, or any other application."
         
-        showInfo(success_message)
+        _show_success(success_message, diagnostics)
         return True
         
     except Exception as e:
         showInfo(f"Error copying words to clipboard: {str(e)}")
-        return False 
\ No newline at end of file
+        return False
+
+def show_file_export_result(extracted_data, file_result, diagnostics=NO_DIAGNOSTICS):
+    """
+    Tell the user where a file export was saved. Must be called on the main thread.
+    
+    Args:
+        extracted_data: Data from the extraction step
+        file_result: The result of file_export.write_export_file
+        diagnostics: Enables the "Show diagnostics" button
+    """
+    diagnostics.write_log()
+    
+    word_count = extracted_data['total_valid']
+    sync_type = "words only" if extracted_data['sync_words_only'] else "words and sentences"
+    
+    if file_result['changed']:
+        success_message = f"✅ Successfully saved {word_count} {sync_type} to:\n\n{file_result['path']}"
+    else:
+        success_message = f"✅ The {word_count} {sync_type} in this file are already up to date:\n\n{file_result['path']}\n\nThe file was not rewritten."
+    if extracted_data.get('incremental'):
+        success_message += "\n\nOnly words that became known since your last export were saved."
+    if extracted_data.get('sentence_words'):
+        success_message += f"\n\n{extracted_data['sentence_words']} of them were found in the sentences of mature cards."
+    if extracted_data.get('left_out'):
+        success_message += f"\n\n{extracted_data['left_out']} words filtered out or excluded in the preview were left out."
+    
+    _show_success(success_message, diagnostics)
\ No newline at end of file
@@ -0,0 +1,172 @@
+# -*- coding: utf-8 -*-
+
+"""
+Optional stage-level instrumentation for the export workflow.
+
+A Diagnostics object records wall time, row counts and peak memory for each
+named stage of an export, can capture a cProfile of selected stages, and
+renders everything as a plain-text report. Reports are appended to a
+rotating log in the add-on's user_files folder, so they can be attached to
+bug reports.
+
+When created with enabled=False every method is a cheap no-op, so callers can
+instrument unconditionally. Memory is only tracked between start() and
+finish(), as tracemalloc slows down every allocation in the process while it
+runs.
+"""
+
+import cProfile
+import io
+import logging
+import os
+import platform
+import pstats
+import time
+import tracemalloc
+from contextlib import contextmanager
+from logging.handlers import RotatingFileHandler
+
+from ..paths import USER_FILES_DIR
+
+DIAGNOSTICS_LOG_PATH = os.path.join(USER_FILES_DIR, "diagnostics.log")
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUP_COUNT = 3
+
+# Number of functions listed in a captured profile.
+PROFILE_LINES = 30
+
+_logger = None
+
+
+def _get_logger(path):
+    global _logger
+    if _logger is None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        _logger = logging.getLogger("export_known_words.diagnostics")
+        _logger.setLevel(logging.INFO)
+        _logger.propagate = False
+        handler = RotatingFileHandler(path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8")
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        _logger.addHandler(handler)
+    return _logger
+
+
+class Diagnostics:
+    """Collects timings, row counts, peak memory and profiles of export stages."""
+
+    def __init__(self, enabled=False, track_memory=True, profile_stages=()):
+        self.enabled = enabled
+        self.track_memory = enabled and track_memory
+        self.profile_stages = set(profile_stages) if enabled else set()
+        self.context = {}
+        self.stages = []
+        self.profiles = {}
+        self._started_tracemalloc = False
+        self._active = []
+
+    def start(self):
+        """Start tracking memory, if enabled. Every start() must be followed by finish()."""
+        if self.track_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def _tracking_memory(self):
+        return self.track_memory and tracemalloc.is_tracing()
+
+    def add_context(self, key, value):
+        """Record a piece of environment information for the report header."""
+        if self.enabled:
+            self.context[key] = value
+
+    @contextmanager
+    def stage(self, name):
+        """Time the enclosed block as stage name."""
+        if not self.enabled:
+            yield
+            return
+
+        record = {'name': name, 'seconds': None, 'rows': None, 'peak_memory': None}
+        self.stages.append(record)
+
+        profiler = cProfile.Profile() if name in self.profile_stages else None
+        track_memory = self._tracking_memory()
+        if track_memory:
+            # Resetting the peak would lose what enclosing stages have seen so
+            # far, so hand it to them first.
+            self._fold_peak(tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self._active.append(record)
+        start = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+            record['seconds'] = time.perf_counter() - start
+            self._active.remove(record)
+            if track_memory and tracemalloc.is_tracing():
+                # Nested stages may have reset the peak; they folded theirs
+                # into record, which in turn is passed on to enclosing stages.
+                record['peak_memory'] = max(tracemalloc.get_traced_memory()[1], record['peak_memory'] or 0)
+                self._fold_peak(record['peak_memory'])
+            if profiler:
+                stream = io.StringIO()
+                pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(PROFILE_LINES)
+                self.profiles[name] = stream.getvalue()
+
+    def _fold_peak(self, peak):
+        for record in self._active:
+            record['peak_memory'] = max(record['peak_memory'] or 0, peak)
+
+    def set_rows(self, name, rows):
+        """Record the number of rows the most recent stage called name handled."""
+        if not self.enabled:
+            return
+        for record in reversed(self.stages):
+            if record['name'] == name:
+                record['rows'] = rows
+                return
+
+    def finish(self):
+        """Stop memory tracking started by this object."""
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def report(self):
+        """Return the collected data as a plain-text report."""
+        if not self.enabled:
+            return ""
+
+        lines = [
+            "Export Known Words diagnostics",
+            f"Time: {time.strftime('%Y-%m-%d %H:%M:%S')}",
+            f"Python: {platform.python_version()} ({platform.platform()})",
+        ]
+        lines += [f"{key}: {value}" for key, value in self.context.items()]
+        lines.append("")
+        lines.append(f"{'Stage':<28} {'Time (s)':>10} {'Rows':>10} {'Peak memory (MB)':>18}")
+        for record in self.stages:
+            seconds = f"{record['seconds']:.3f}" if record['seconds'] is not None else "-"
+            rows = str(record['rows']) if record['rows'] is not None else "-"
+            memory = f"{record['peak_memory'] / (1024 * 1024):.1f}" if record['peak_memory'] is not None else "-"
+            lines.append(f"{record['name']:<28} {seconds:>10} {rows:>10} {memory:>18}")
+
+        for name, profile in self.profiles.items():
+            lines.append("")
+            lines.append(f"Profile of {name}:")
+            lines.append(profile.rstrip())
+
+        return "\n".join(lines)
+
+    def write_log(self, path=DIAGNOSTICS_LOG_PATH):
+        """Append the report to the rotating diagnostics log."""
+        if not self.enabled:
+            return
+        _get_logger(path).info(self.report() + "\n")
+
+
+# Shared disabled instance used as a default argument.
+NO_DIAGNOSTICS = Diagnostics(enabled=False)
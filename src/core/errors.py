@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+
+"""
+Exceptions raised by export steps that run outside the GUI thread.
+
+Steps running in the background must not open dialogs themselves, so they
+raise these exceptions and the workflow shows the message on the main thread.
+"""
+
+
+class ExportError(Exception):
+    """An export step failed with a message that should be shown to the user."""
+
+
+class ExportCancelled(Exception):
+    """The user cancelled a running export."""
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+"""
+Persisted watermarks for the "new known words since last export" mode.
+
+A watermark is the id of the newest review log entry at the time of the last
+successful export. Review log ids are millisecond timestamps, so any card that
+became mature afterwards has a review log entry with a larger id. Watermarks
+are stored per deck and field mapping in a JSON file in the add-on's
+user_files folder, next to the last runs of the auto-export profiles (see
+auto_export.py).
+"""
+
+import json
+import os
+
+from ..paths import USER_FILES_DIR
+
+EXPORT_STATE_PATH = os.path.join(USER_FILES_DIR, "export_state.json")
+
+
+def watermark_key(collection_path, deck_id, sync_words_only, word_field, sentence_field, mappings=None):
+    """
+    Return the key a watermark is stored under for this export setup.
+
+    collection_path keeps the decks of different profiles apart, as their
+    deck ids repeat (every collection has a Default deck with id 1).
+
+    mappings ({note type id: (word field, sentence field)}) is only given
+    when the note types of the deck are not all exported with the same
+    fields; it then replaces word_field and sentence_field in the key.
+    """
+    export_type = "words" if sync_words_only else "words_sentences"
+    if mappings:
+        fields = ";".join(f"{note_type_id}={word}/{sentence or ''}"
+                          for note_type_id, (word, sentence) in sorted(mappings.items()))
+        return f"{collection_path}|{deck_id}|{export_type}|{fields}"
+    return f"{collection_path}|{deck_id}|{export_type}|{word_field}|{sentence_field or ''}"
+
+
+def _load_state(path):
+    try:
+        with open(path, encoding="utf-8") as state_file:
+            state = json.load(state_file)
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) else {}
+
+
+def _save_state(state, path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as state_file:
+        json.dump(state, state_file, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def load_watermark(key, path=EXPORT_STATE_PATH):
+    """Return the stored review log id for key, or None if there is none."""
+    watermark = _load_state(path).get('watermarks', {}).get(key)
+    return watermark if isinstance(watermark, int) else None
+
+
+def save_watermark(key, revlog_id, path=EXPORT_STATE_PATH):
+    """Store revlog_id as the watermark for key."""
+    state = _load_state(path)
+    state.setdefault('watermarks', {})[key] = int(revlog_id)
+    _save_state(state, path)
+
+
+def load_auto_export_run(name, path=EXPORT_STATE_PATH):
+    """Return what was stored by save_auto_export_run for the profile called name, or None."""
+    run = _load_state(path).get('auto_exports', {}).get(name)
+    return run if isinstance(run, dict) else None
+
+
+def save_auto_export_run(name, run, path=EXPORT_STATE_PATH):
+    """Store run (a JSON-serializable dict) as the last run of the profile called name."""
+    state = _load_state(path)
+    state.setdefault('auto_exports', {})[name] = run
+    _save_state(state, path)
\ No newline at end of file
@@ -0,0 +1,517 @@
+# -*- coding: utf-8 -*-
+
+"""
+Extraction of mature cards and their field values from a collection.
+
+Nothing in this module imports aqt. Every function takes the collection as
+its first argument and only uses ``col.db``, ``col.models.get``,
+``col.decks`` and (for the fallback and legacy paths) ``col.get_card`` and
+``col.find_cards``, so it works both with Anki's Collection and with the
+read-only HeadlessCollection used by the command-line exporter.
+"""
+
+import heapq
+import threading
+from itertools import chain
+
+from .diagnostics import NO_DIAGNOSTICS
+from .errors import ExportCancelled, ExportError
+from .normalization import normalize_rows
+from .tokenization import DEFAULT_MIN_TOKEN_COUNT, add_sentence_words
+from .frequency import apply_frequency
+
+# Cards with an interval of at least this many days count as mature.
+MATURE_INTERVAL = 21
+
+# Anki stores all note fields in a single column separated by this character.
+FIELD_SEPARATOR = "\x1f"
+
+# Number of card ids sent to the database per query in the bulk path.
+BULK_CHUNK_SIZE = 500
+
+# Export orders: SQL expression for the sort key of card c and whether it
+# needs the card's review log entries (joined as r). Cards are exported in
+# ascending key order, so the newest/largest comes last (for Migaku
+# auto-scroll compatibility).
+ORDERINGS = {
+    'last_review': ("max(r.id)", True),
+    'first_mature': ("coalesce(min(case when r.ivl >= {min_interval} then r.id end), max(r.id))", True),
+    'interval': ("c.ivl", False),
+    'ease': ("c.factor", False),
+    'note_creation': ("c.nid", False),
+    'due': ("c.due", False),
+}
+DEFAULT_ORDER = 'last_review'
+
+
+def id_chunks(card_ids, chunk_size=BULK_CHUNK_SIZE):
+    """Yield successive slices of card_ids of at most chunk_size items."""
+    for start in range(0, len(card_ids), chunk_size):
+        yield card_ids[start:start + chunk_size]
+
+
+def ids_to_sql(card_ids):
+    """Format a list of integer ids as an SQL ``(1,2,3)`` list."""
+    return "(" + ",".join(str(int(card_id)) for card_id in card_ids) + ")"
+
+
+# Field name -> index mappings shared between exports, keyed by
+# (collection path, note type id, note type modification time). Renaming or
+# reordering fields bumps the note type's modification time, so stale
+# mappings are never hit. Merged exports read several collections from pool
+# threads, so the cache is only used under its lock.
+_field_index_cache = {}
+_field_index_cache_lock = threading.Lock()
+
+
+class FieldIndexCache:
+    """
+    Resolve field names to indices, looking up each note type once per export.
+    
+    Create one instance per export. The first request for a note type reads it
+    from the collection and reuses the shared mapping if its modification time
+    is unchanged; later requests in the same export are served from memory.
+    """
+    
+    def __init__(self, col):
+        self.col = col
+        self._by_note_type = {}
+    
+    def field_map(self, note_type_id):
+        """Return a dict mapping field names to indices for the note type."""
+        field_map = self._by_note_type.get(note_type_id)
+        if field_map is not None:
+            return field_map
+        
+        note_type = self.col.models.get(note_type_id)
+        if not note_type:
+            field_map = {}
+        else:
+            collection = getattr(self.col, 'path', None)
+            key = (collection, note_type_id, note_type.get('mod'))
+            with _field_index_cache_lock:
+                field_map = _field_index_cache.get(key)
+                if field_map is None:
+                    # Drop mappings resolved for older versions of this note type.
+                    for stale_key in [k for k in _field_index_cache if k[:2] == (collection, note_type_id)]:
+                        del _field_index_cache[stale_key]
+                    field_map = {field['name']: i for i, field in enumerate(note_type['flds'])}
+                    _field_index_cache[key] = field_map
+        
+        self._by_note_type[note_type_id] = field_map
+        return field_map
+    
+    def indices(self, note_type_id, sync_words_only, word_field, sentence_field):
+        """Return (word_index, sentence_index) for the note type."""
+        field_map = self.field_map(note_type_id)
+        word_index = field_map.get(word_field)
+        sentence_index = None
+        if not sync_words_only and sentence_field:
+            sentence_index = field_map.get(sentence_field)
+        return word_index, sentence_index
+
+
+class CardRow:
+    """
+    One extracted card. Slotted to keep large exports compact in memory.
+    
+    review_date holds the card's due value. note_id is used to recognize
+    sibling cards and may be None for rows built without it.
+    frequency_rank is set when a frequency list is used (see frequency.py).
+    """
+    
+    __slots__ = ('card_id', 'word', 'sentence', 'review_date', 'interval', 'note_id', 'frequency_rank')
+    
+    def __init__(self, card_id, word, sentence, review_date, interval, note_id=None, frequency_rank=None):
+        self.card_id = card_id
+        self.word = word
+        self.sentence = sentence
+        self.review_date = review_date
+        self.interval = interval
+        self.note_id = note_id
+        self.frequency_rank = frequency_rank
+    
+    def __eq__(self, other):
+        if not isinstance(other, CardRow):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+    
+    def __repr__(self):
+        return f"CardRow(card_id={self.card_id!r}, word={self.word!r}, interval={self.interval!r})"
+
+
+def card_row(card_id, interval, due, fields, word_index, sentence_index, note_id=None):
+    """Build the CardRow shared by both extraction paths."""
+    word_value = fields[word_index] if word_index is not None and word_index < len(fields) else ""
+    sentence_value = fields[sentence_index] if sentence_index is not None and sentence_index < len(fields) else ""
+    
+    return CardRow(card_id, word_value.strip(), sentence_value.strip(), due or 0, interval, note_id)
+
+
+def _fetch_chunk(col, chunk, field_indices, sync_words_only, word_field, sentence_field):
+    """Read one chunk of cards with their notes, returned in the order of chunk."""
+    query = (
+        "select c.id, c.ivl, c.due, c.nid, n.mid, n.flds from cards c "
+        "join notes n on n.id = c.nid where c.id in " + ids_to_sql(chunk)
+    )
+    rows_by_id = {}
+    for card_id, interval, due, note_id, note_type_id, flds in col.db.all(query):
+        indices = field_indices.indices(note_type_id, sync_words_only, word_field, sentence_field)
+        rows_by_id[card_id] = card_row(card_id, interval, due, flds.split(FIELD_SEPARATOR), *indices, note_id=note_id)
+    return [rows_by_id[card_id] for card_id in chunk if card_id in rows_by_id]
+
+
+def iter_rows_bulk(col, card_ids, sync_words_only, word_field, sentence_field, report_progress=None, is_cancelled=None):
+    """
+    Read card and note data for card_ids straight from the collection database.
+    
+    Cards are fetched together with their notes in chunks of BULK_CHUNK_SIZE ids,
+    so the number of queries grows with len(card_ids) / BULK_CHUNK_SIZE instead
+    of issuing two object loads per card. Rows are yielded lazily in the order
+    of card_ids, one chunk at a time.
+    
+    The first chunk is read before this function returns, so a database that
+    cannot be queried this way fails here rather than halfway through an
+    export. report_progress(done, total) is called after every chunk, and
+    ExportCancelled is raised between chunks once is_cancelled() is true.
+    """
+    field_indices = FieldIndexCache(col)
+    card_ids = list(card_ids)
+    chunks = id_chunks(card_ids)
+    
+    first_chunk = next(chunks, [])
+    first_rows = _fetch_chunk(col, first_chunk, field_indices, sync_words_only, word_field, sentence_field)
+    
+    def generate():
+        done = len(first_chunk)
+        if report_progress:
+            report_progress(done, len(card_ids))
+        yield from first_rows
+        
+        for chunk in chunks:
+            if is_cancelled and is_cancelled():
+                raise ExportCancelled()
+            
+            yield from _fetch_chunk(col, chunk, field_indices, sync_words_only, word_field, sentence_field)
+            
+            done += len(chunk)
+            if report_progress:
+                report_progress(done, len(card_ids))
+    
+    return generate()
+
+
+def extract_rows_bulk(col, card_ids, sync_words_only, word_field, sentence_field, report_progress=None, is_cancelled=None):
+    """Like iter_rows_bulk, but return all rows as a list."""
+    return list(iter_rows_bulk(col, card_ids, sync_words_only, word_field, sentence_field,
+                               report_progress, is_cancelled))
+
+
+def iter_rows_per_card(col, card_ids, sync_words_only, word_field, sentence_field, report_progress=None, is_cancelled=None):
+    """
+    Load every card and note as an object and read its fields.
+    
+    This is the original extraction path. It is much slower than
+    iter_rows_bulk on large collections and is only used as a fallback
+    when the bulk query cannot be run. Rows are yielded in the order of card_ids.
+    """
+    field_indices = FieldIndexCache(col)
+    
+    for done, card_id in enumerate(card_ids):
+        if done % BULK_CHUNK_SIZE == 0:
+            if is_cancelled and is_cancelled():
+                raise ExportCancelled()
+            if report_progress:
+                report_progress(done, len(card_ids))
+        
+        card = col.get_card(card_id)
+        if not card:
+            continue
+        
+        note = card.note()
+        if not note:
+            continue
+        
+        indices = field_indices.indices(note.mid, sync_words_only, word_field, sentence_field)
+        
+        yield card_row(card_id, card.ivl, card.due, note.fields, *indices, note_id=card.nid)
+
+
+def find_note_type_ids(col, deck_ids):
+    """Return the ids of the note types used by cards in deck_ids."""
+    return col.db.list(
+        "select distinct n.mid from cards c join notes n on n.id = c.nid where c.did in " + ids_to_sql(deck_ids)
+    )
+
+
+def count_note_types(col, deck_ids):
+    """Return (note type id, card count) pairs for deck_ids, most used note type first."""
+    return col.db.all(
+        "select n.mid, count() from cards c join notes n on n.id = c.nid where c.did in " + ids_to_sql(deck_ids)
+        + " group by n.mid order by count() desc, n.mid"
+    )
+
+
+def count_cards_by_deck(col, deck_names, min_interval=MATURE_INTERVAL):
+    """
+    Return {deck id: (total cards, mature cards)} for every deck in deck_names.
+    
+    deck_names maps deck ids to full deck names ("Parent::Child"). The cards
+    of all decks are counted with one grouped query, and each deck's counts
+    are then added to its ancestors, so every count includes subdecks.
+    """
+    id_by_name = {name: deck_id for deck_id, name in deck_names.items()}
+    counts = {deck_id: [0, 0] for deck_id in deck_names}
+    
+    for deck_id, total, mature in col.db.all(
+        "select did, count(), sum(ivl >= ?) from cards group by did", min_interval
+    ):
+        name = deck_names.get(deck_id)
+        while name:
+            ancestor_id = id_by_name.get(name)
+            if ancestor_id is not None:
+                counts[ancestor_id][0] += total
+                counts[ancestor_id][1] += mature or 0
+            name = name.rpartition("::")[0]
+    
+    return {deck_id: tuple(deck_counts) for deck_id, deck_counts in counts.items()}
+
+
+def find_mature_ids_in_deck(col, deck_id, min_interval=MATURE_INTERVAL):
+    """
+    Return the ids of mature cards in the deck and its subdecks.
+    
+    The deck subtree is resolved to a list of deck ids once, and the deck
+    and interval conditions are applied together in a single query, so only
+    cards from the selected decks are ever read.
+    """
+    deck_ids = col.decks.deck_and_child_ids(deck_id)
+    if not deck_ids:
+        return []
+    
+    return col.db.list(
+        "select id from cards where did in " + ids_to_sql(deck_ids) + " and ivl >= ?",
+        min_interval
+    )
+
+
+def find_mature_ids_by_intersection(col, deck_id, min_interval=MATURE_INTERVAL):
+    """
+    Return the ids of mature cards in the deck using two separate searches.
+    
+    Strategy: (1) collect all mature cards in the collection, (2) collect all
+    cards in the selected deck, (3) intersect the two sets. This avoids
+    edge-cases where combining deck and property filters in a single search
+    query returns incorrect results on some Anki installations, at the cost
+    of scanning the whole collection. Enabled with the
+    ``legacy_intersection_search`` config option.
+    """
+    all_mature_card_ids = set(col.find_cards(f"prop:ivl>={min_interval}"))
+    if not all_mature_card_ids:
+        return []
+    
+    deck_card_ids = set(col.decks.cids(deck_id, children=True))
+    return list(all_mature_card_ids.intersection(deck_card_ids))
+
+
+def find_newly_mature_ids_in_deck(col, deck_id, since_revlog_id, min_interval=MATURE_INTERVAL):
+    """
+    Return the ids of cards in the deck tree that became mature after a watermark.
+    
+    A card qualifies if it is mature now and has a review log entry newer than
+    since_revlog_id in which its interval crossed min_interval.
+    """
+    deck_ids = col.decks.deck_and_child_ids(deck_id)
+    if not deck_ids:
+        return []
+    
+    return col.db.list(
+        "select id from cards where did in " + ids_to_sql(deck_ids) + " and ivl >= ? "
+        "and id in (select cid from revlog where id > ? and ivl >= ? and lastIvl < ?)",
+        min_interval, since_revlog_id, min_interval, min_interval
+    )
+
+
+def order_card_ids(col, card_ids, order=DEFAULT_ORDER, limit=None, min_interval=MATURE_INTERVAL, is_cancelled=None):
+    """Return card_ids in export order, optionally keeping only the last limit ids (see order_card_keys)."""
+    return [card_id for _, card_id in order_card_keys(col, card_ids, order, limit, min_interval, is_cancelled)]
+
+
+def order_card_keys(col, card_ids, order=DEFAULT_ORDER, limit=None, min_interval=MATURE_INTERVAL, is_cancelled=None):
+    """
+    Return (sort key, card id) pairs in export order, optionally only the last limit.
+    
+    The sort key of every card comes from one grouped query per chunk of ids;
+    orders based on reviews (see ORDERINGS) aggregate the review log in that
+    same query. Cards without a key sort first, ties are broken by card id.
+    With a limit only the limit largest keys are kept (a heap selection), so
+    the full set is never sorted.
+    """
+    expression, uses_revlog = ORDERINGS[order]
+    expression = expression.format(min_interval=int(min_interval))
+    if uses_revlog:
+        query = (
+            f"select c.id, {expression} from cards c left join revlog r on r.cid = c.id "
+            "where c.id in {ids} group by c.id"
+        )
+    else:
+        query = f"select c.id, {expression} from cards c where c.id in {{ids}}"
+    
+    keyed_ids = []
+    for chunk in id_chunks(list(card_ids)):
+        if is_cancelled and is_cancelled():
+            raise ExportCancelled()
+        keyed_ids.extend((key or 0, card_id) for card_id, key in col.db.all(query.format(ids=ids_to_sql(chunk))))
+    
+    if limit and limit < len(keyed_ids):
+        keyed_ids = heapq.nlargest(limit, keyed_ids)
+        keyed_ids.reverse()
+    else:
+        keyed_ids.sort()
+    
+    return keyed_ids
+
+
+def collect_mature_cards(col, deck_id, sync_words_only, word_field, sentence_field,
+                         legacy_search=False, since_revlog_id=None, min_interval=MATURE_INTERVAL,
+                         order=DEFAULT_ORDER, limit=None, normalize=False, dedupe=None, processes=None,
+                         tokenizer=None, min_token_count=DEFAULT_MIN_TOKEN_COUNT, frequency=None,
+                         report_progress=None, is_cancelled=None, diagnostics=NO_DIAGNOSTICS):
+    """
+    Extract field values from mature cards without any user interaction.
+    
+    Safe to call from a background thread. Returns the extracted-data dict
+    built by package_extracted_data, raises ExportError with a user-facing
+    message when nothing can be exported and ExportCancelled when
+    is_cancelled() becomes true. report_progress(done, total) is called while cards are read.
+    
+    The returned 'cards' are read lazily while they are consumed (see
+    package_extracted_data), so most of the reading happens in the caller's
+    formatting step. The search and ordering are recorded as stages in
+    diagnostics.
+    
+    Cards are exported in the given order (a key of ORDERINGS); with a limit
+    only the last limit cards of that order are exported. normalize, dedupe,
+    processes, tokenizer, min_token_count and frequency are passed on to
+    package_extracted_data.
+    
+    If since_revlog_id is given, only cards that became mature after that
+    review log entry are exported. The returned 'revlog_watermark' is the
+    newest review log id at the start of the export and can be stored as the
+    watermark for the next incremental export.
+    """
+    
+    NO_MATURE_CARDS_MESSAGE = "No mature cards found in the selected deck.\n\nMature cards are those with intervals of 21 days or more."
+    NO_NEW_MATURE_CARDS_MESSAGE = "No new known words since your last export.\n\nNo cards in the selected deck became mature since then."
+    
+    # Read the watermark before searching, so reviews made while the export
+    # runs are picked up by the next incremental export.
+    revlog_watermark = col.db.scalar("select max(id) from revlog") or 0
+    
+    with diagnostics.stage("mature_id_search"):
+        if since_revlog_id is not None:
+            # Incremental export: only cards that crossed the threshold since
+            # the last export, found through the review log.
+            mature_ids_in_deck = find_newly_mature_ids_in_deck(col, deck_id, since_revlog_id, min_interval)
+        elif legacy_search:
+            # The older collection-wide search plus set intersection is still
+            # available as an opt-in for installations where it is needed.
+            mature_ids_in_deck = find_mature_ids_by_intersection(col, deck_id, min_interval)
+        else:
+            # Find the mature cards of the deck tree in one query.
+            mature_ids_in_deck = find_mature_ids_in_deck(col, deck_id, min_interval)
+    diagnostics.set_rows("mature_id_search", len(mature_ids_in_deck))
+    
+    if not mature_ids_in_deck:
+        raise ExportError(NO_NEW_MATURE_CARDS_MESSAGE if since_revlog_id is not None else NO_MATURE_CARDS_MESSAGE)
+    
+    with diagnostics.stage("ordering"):
+        mature_ids_in_deck = order_card_ids(col, mature_ids_in_deck, order, limit, min_interval, is_cancelled)
+    diagnostics.set_rows("ordering", len(mature_ids_in_deck))
+    
+    # Read the field values of the filtered cards. The bulk path reads
+    # everything with a handful of chunked queries; the per-card path is
+    # kept as a fallback in case the database cannot be queried directly.
+    try:
+        rows = iter_rows_bulk(col, mature_ids_in_deck, sync_words_only, word_field, sentence_field,
+                              report_progress, is_cancelled)
+    except ExportCancelled:
+        raise
+    except Exception:
+        rows = iter_rows_per_card(col, mature_ids_in_deck, sync_words_only, word_field, sentence_field,
+                                  report_progress, is_cancelled)
+    
+    return package_extracted_data(rows, sync_words_only, word_field, sentence_field,
+                                  incremental=since_revlog_id is not None, revlog_watermark=revlog_watermark,
+                                  total_candidates=len(mature_ids_in_deck),
+                                  normalize=normalize, dedupe=dedupe, processes=processes,
+                                  tokenizer=tokenizer, min_token_count=min_token_count, frequency=frequency)
+
+
+def package_extracted_data(rows, sync_words_only, word_field, sentence_field,
+                           incremental=False, revlog_watermark=0, total_candidates=None,
+                           normalize=False, dedupe=None, processes=None,
+                           tokenizer=None, min_token_count=DEFAULT_MIN_TOKEN_COUNT, frequency=None):
+    """
+    Wrap extracted card rows for the next step, dropping rows without a word.
+    
+    rows may be any iterable of CardRow in export order and is streamed
+    through lazily. If normalize is true, field values are reduced to plain
+    text first, and dedupe drops repeated words (see
+    normalization.normalize_rows). With a tokenizer, exports of words and
+    sentences also get the tokens found in at least min_token_count of the
+    sentences, after the cards (see tokenization.add_sentence_words).
+    frequency is a dict with a frequency.FrequencyIndex as 'index', and
+    'max_rank' and 'sort' for frequency.apply_frequency; it annotates,
+    filters or sorts all of these rows by frequency rank. Rows
+    without a word are skipped while the result is consumed, and the
+    returned dict's 'total_mature', 'total_valid' and 'sentence_words'
+    counts are complete once 'cards' has been fully iterated; rows dropped
+    as duplicates count as mature but not as valid.
+    
+    Raises ExportError if none of the rows has a word.
+    """
+    
+    NO_VALID_CARDS_MESSAGE = "No mature cards with valid word data found.\n\nPlease ensure the selected word field contains data."
+    
+    extracted_data = {
+        'cards': None,
+        'total_mature': 0,
+        'total_valid': 0,
+        'total_candidates': total_candidates,
+        'sync_words_only': sync_words_only,
+        'word_field': word_field,
+        'sentence_field': sentence_field,
+        'incremental': incremental,
+        'revlog_watermark': revlog_watermark,
+        'sentence_words': 0
+    }
+    
+    def counted_rows():
+        for row in rows:
+            extracted_data['total_mature'] += 1
+            yield row
+    
+    def valid_rows():
+        source = counted_rows()
+        if normalize or dedupe:
+            source = normalize_rows(source, normalize, dedupe, processes)
+        if tokenizer and not sync_words_only:
+            source = add_sentence_words(source, tokenizer, min_token_count, processes, stats=extracted_data)
+        if frequency:
+            source = apply_frequency(source, frequency['index'], frequency.get('max_rank'), frequency.get('sort'))
+        for row in source:
+            if row.word:
+                extracted_data['total_valid'] += 1
+                yield row
+    
+    # Validate that we have valid word data. This only reads rows up to the
+    # first one with a word.
+    cards = valid_rows()
+    first_card = next(cards, None)
+    if first_card is None:
+        raise ExportError(NO_VALID_CARDS_MESSAGE)
+    
+    # Return the extracted data for the next step
+    extracted_data['cards'] = chain((first_card,), cards)
+    return extracted_data
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+
+"""
+File sinks that stream extracted cards to disk.
+
+Rows are formatted and written in chunks by formatter.write_rows, so memory
+use does not grow with the size of the export. Supported formats:
+
+- tsv: the clipboard format (word, or word TAB sentence), which Migaku accepts
+- csv: word and sentence columns with a header row
+- jsonl: one JSON object per card, with its ids, interval, due value and
+  frequency rank. 'due' is Anki's due column as stored: a day number
+  (days since the collection was created) for review cards, a position for
+  new cards. Words found in sentences have no card, so their card_id
+  and note_id are null.
+
+Any format can be gzip-compressed. The export is written to a temporary file
+next to the target while its content is hashed; if the target already holds
+the same content, it is left untouched, so tools watching the file only see
+real changes.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+
+from .formatter import template_for, write_rows
+
+FILE_FORMATS = ('tsv', 'csv', 'jsonl')
+GZIP_SUFFIX = ".gz"
+
+# Bytes read at a time when hashing an existing file.
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def _csv_value(value):
+    if any(char in value for char in ',"\n\r'):
+        return '"' + value.replace('"', '""') + '"'
+    return value
+
+
+def csv_row(card):
+    """Row template: word,sentence with CSV quoting."""
+    return f"{_csv_value(card.word)},{_csv_value(card.sentence)}"
+
+
+def csv_words_only_row(card):
+    """Row template: the word with CSV quoting."""
+    return _csv_value(card.word)
+
+
+def jsonl_row(card):
+    """Row template: the card and its metadata as one line of JSON."""
+    return json.dumps({
+        'word': card.word,
+        'sentence': card.sentence,
+        'card_id': card.card_id,
+        'note_id': card.note_id,
+        'interval': card.interval,
+        'due': card.review_date,
+        'frequency_rank': card.frequency_rank,
+    }, ensure_ascii=False)
+
+
+def file_row_template(file_format, sync_words_only):
+    """Return (header line or None, row template) for a file format."""
+    if file_format == 'tsv':
+        return None, template_for(sync_words_only)
+    if file_format == 'csv':
+        if sync_words_only:
+            return "word", csv_words_only_row
+        return "word,sentence", csv_row
+    if file_format == 'jsonl':
+        return None, jsonl_row
+    raise ValueError(f"Unknown file format: {file_format}")
+
+
+def default_file_name(file_format, compress=False):
+    """Return a file name for an export in file_format."""
+    return f"known_words.{file_format}" + (GZIP_SUFFIX if compress else "")
+
+
+class _HashingWriter:
+    """Text stream that encodes to UTF-8, hashes and writes to a binary file."""
+
+    def __init__(self, raw):
+        self._raw = raw
+        self.hash = hashlib.sha256()
+
+    def write(self, text):
+        data = text.encode("utf-8")
+        self.hash.update(data)
+        self._raw.write(data)
+
+
+def _content_hash(path, compress):
+    """Return the SHA-256 of the uncompressed content of path, or None."""
+    content_hash = hashlib.sha256()
+    try:
+        with (gzip.open(path, "rb") if compress else open(path, "rb")) as existing:
+            for block in iter(lambda: existing.read(HASH_BLOCK_SIZE), b""):
+                content_hash.update(block)
+    except (OSError, EOFError):
+        return None
+    return content_hash.hexdigest()
+
+
+def write_export_file(extracted_data, path, file_format='tsv', compress=False, report_progress=None, is_cancelled=None):
+    """
+    Stream the extracted cards to path in file_format.
+
+    Safe to run in a background thread. See formatter.write_rows for
+    report_progress and is_cancelled; a cancelled export leaves the target
+    untouched.
+
+    Returns:
+        dict: 'path', 'rows' (number of cards written) and 'changed' (False
+        if the file already had the same content and was not rewritten)
+    """
+    header, row_template = file_row_template(file_format, extracted_data['sync_words_only'])
+
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    temp_path = path + ".tmp"
+
+    try:
+        # The gzip header names the target file (without .gz), not the
+        # temporary one; mtime=0 keeps the compressed bytes identical for
+        # identical content
+        with open(temp_path, "wb") as raw:
+            target = gzip.GzipFile(filename=path, fileobj=raw, mode="wb", mtime=0) if compress else raw
+            try:
+                out = _HashingWriter(target)
+                if header:
+                    out.write(header + "\n")
+                rows = write_rows(extracted_data['cards'], out, row_template, extracted_data.get('total_candidates'),
+                                  report_progress, is_cancelled)
+                if rows:
+                    out.write("\n")
+            finally:
+                if compress:
+                    target.close()
+
+        changed = _content_hash(path, compress) != out.hash.hexdigest()
+        if changed:
+            os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+    return {'path': path, 'rows': rows, 'changed': changed}
\ No newline at end of file
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+"""
+Streaming formatter that turns extracted card rows into export text.
+
+The formatter consumes rows from any iterable and writes them into a single
+output buffer, so the cost is linear in the size of the output and no
+intermediate copies of the text are made.
+"""
+
+import io
+from itertools import islice
+
+from .errors import ExportCancelled
+
+# Separator written between two formatted rows (no trailing separator).
+ROW_SEPARATOR = "\n"
+
+# Number of rows formatted between progress reports and cancellation checks.
+PROGRESS_INTERVAL = 5000
+
+
+def words_only_row(card):
+    """Row template: the word alone."""
+    return card.word
+
+
+def word_and_sentence_row(card):
+    """Row template: word TAB sentence, or just the word if there is no sentence."""
+    sentence = card.sentence
+    if sentence:
+        return f"{card.word}\t{sentence}"
+    return card.word
+
+
+# Row templates by name. A template is any callable taking a CardRow and
+# returning the text for that row.
+ROW_TEMPLATES = {
+    'words_only': words_only_row,
+    'words_and_sentences': word_and_sentence_row,
+}
+
+
+def template_for(sync_words_only):
+    """Return the row template matching the export type chosen by the user."""
+    return ROW_TEMPLATES['words_only' if sync_words_only else 'words_and_sentences']
+
+
+def write_rows(rows, out, row_template, total=None, report_progress=None, is_cancelled=None):
+    """
+    Format rows with row_template and write them to the text stream out.
+    
+    Rows are consumed lazily in chunks of PROGRESS_INTERVAL; each chunk is
+    joined and written with one call, so only one chunk of formatted text is
+    held outside of out at a time. Rows are separated by ROW_SEPARATOR.
+    report_progress(done, total) is called before every chunk, and
+    ExportCancelled is raised at the same points once is_cancelled() is true.
+    
+    Returns:
+        int: The number of rows written
+    """
+    rows = iter(rows)
+    write = out.write
+    count = 0
+    
+    while True:
+        if is_cancelled and is_cancelled():
+            raise ExportCancelled()
+        if report_progress:
+            report_progress(count, total if total is not None else count)
+        
+        chunk = [row_template(card) for card in islice(rows, PROGRESS_INTERVAL)]
+        if not chunk:
+            return count
+        
+        if count:
+            write(ROW_SEPARATOR)
+        write(ROW_SEPARATOR.join(chunk))
+        count += len(chunk)
+
+
+def format_rows(rows, row_template, total=None, report_progress=None, is_cancelled=None):
+    """Format rows into a single string. See write_rows for the arguments."""
+    buffer = io.StringIO()
+    write_rows(rows, buffer, row_template, total, report_progress, is_cancelled)
+    return buffer.getvalue()
+
+
+def format_pages(rows, row_template, page_size, total=None, report_progress=None, is_cancelled=None):
+    """
+    Format rows into a list of strings of at most page_size rows each.
+    
+    See write_rows for the other arguments; progress is reported over all
+    pages together.
+    """
+    rows = iter(rows)
+    pages = []
+    done = 0
+    
+    while True:
+        page_progress = None
+        if report_progress:
+            def page_progress(page_done, _, offset=done):
+                report_progress(offset + page_done, total if total is not None else offset + page_done)
+        
+        buffer = io.StringIO()
+        count = write_rows(islice(rows, page_size), buffer, row_template, total, page_progress, is_cancelled)
+        if not count:
+            return pages
+        
+        pages.append(buffer.getvalue())
+        done += count
\ No newline at end of file
@@ -0,0 +1,243 @@
+# -*- coding: utf-8 -*-
+
+"""
+Corpus frequency ranks of exported words, from a local frequency list.
+
+A frequency list is a text file with one word per line, most frequent
+first; anything after the first tab on a line (a count, a reading) is
+ignored. It is converted once into a compact sorted index file in the
+add-on's user_files folder:
+
+    header: magic, version, source size and mtime, word count
+    offsets: count + 1 uint32, where each word starts in the blob
+    ranks: count uint32, the rank of each word
+    blob: the casefolded words, UTF-8 encoded and sorted bytewise
+
+The arrays use the machine's byte order, as the index never leaves it.
+
+The index is memory-mapped, so multi-MB lists are neither parsed nor
+loaded into a dict for each export; words are looked up in batches, with
+one binary search per word that starts where the previous one ended. The
+index is rebuilt when the list's size or modification time changes. Each
+version of a list gets its own index file, so an export still reading the
+previous version keeps its mapping; it is released once no export uses it.
+
+apply_frequency annotates rows with their rank, filters them by a maximum
+rank and sorts them by rank. Like extraction.py, nothing here imports aqt.
+"""
+
+import glob
+import hashlib
+import mmap
+import os
+import struct
+import threading
+from array import array
+from itertools import islice
+
+from ..paths import USER_FILES_DIR
+from .errors import ExportError
+
+FREQUENCY_INDEX_DIR = os.path.join(USER_FILES_DIR, "frequency")
+
+INDEX_MAGIC = b"KWFQ"
+INDEX_VERSION = 1
+HEADER = struct.Struct("<4sIQQI")
+
+# Rows whose ranks are looked up together.
+RANK_BATCH_SIZE = 5000
+
+# Open indexes by index path, so repeated exports reuse the mapping. Exports
+# and auto-exports load indexes from different threads, so the cache is only
+# used under its lock.
+_open_indexes = {}
+_open_indexes_lock = threading.Lock()
+
+
+def _list_digest(source_path):
+    return hashlib.sha1(os.path.abspath(source_path).encode("utf-8")).hexdigest()[:16]
+
+
+def index_path_for(source_path, signature, directory=FREQUENCY_INDEX_DIR):
+    """Return the index file of the frequency list at source_path with signature (size, mtime)."""
+    size, mtime_ns = signature
+    return os.path.join(directory, f"{_list_digest(source_path)}-{size:x}-{mtime_ns:x}.idx")
+
+
+def _remove_stale_indexes(source_path, index_path, directory):
+    """Delete the index files of older versions of the list, where possible."""
+    for path in glob.glob(os.path.join(directory, f"{_list_digest(source_path)}-*.idx")):
+        if path != index_path:
+            try:
+                os.remove(path)
+            except OSError:
+                # Still mapped by a running export (Windows); removed next time
+                pass
+
+
+def _source_signature(source_path):
+    stat = os.stat(source_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+def build_frequency_index(source_path, index_path):
+    """Convert the frequency list at source_path into an index file at index_path."""
+    ranks = {}
+    with open(source_path, encoding="utf-8-sig", errors="replace") as source:
+        for line in source:
+            word = line.split("\t", 1)[0].strip()
+            if word:
+                # A word listed twice (or differing only in case) keeps its best rank
+                ranks.setdefault(word.casefold().encode("utf-8"), len(ranks) + 1)
+
+    words = sorted(ranks)
+    offsets = array("I", [0])
+    for word in words:
+        offsets.append(offsets[-1] + len(word))
+    word_ranks = array("I", (ranks[word] for word in words))
+    if offsets.itemsize != 4 or word_ranks.itemsize != 4:
+        raise RuntimeError("array('I') is not 32 bits on this platform")
+
+    size, mtime_ns = _source_signature(source_path)
+    os.makedirs(os.path.dirname(index_path), exist_ok=True)
+    temp_path = index_path + ".tmp"
+    with open(temp_path, "wb") as index_file:
+        index_file.write(HEADER.pack(INDEX_MAGIC, INDEX_VERSION, size, mtime_ns, len(words)))
+        index_file.write(offsets.tobytes())
+        index_file.write(word_ranks.tobytes())
+        for word in words:
+            index_file.write(word)
+    os.replace(temp_path, index_path)
+
+
+class FrequencyIndex:
+    """A memory-mapped frequency index, see build_frequency_index."""
+
+    def __init__(self, index_path):
+        with open(index_path, "rb") as index_file:
+            self._map = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.source_size, self.source_mtime_ns, self.count = HEADER.unpack_from(self._map)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            self._map.close()
+            raise ValueError(f"Not a frequency index: {index_path}")
+
+        view = memoryview(self._map)
+        offsets_start = HEADER.size
+        ranks_start = offsets_start + 4 * (self.count + 1)
+        self._blob_start = ranks_start + 4 * self.count
+        self._offsets = view[offsets_start:ranks_start].cast("I")
+        self._ranks = view[ranks_start:self._blob_start].cast("I")
+
+    def _word(self, position):
+        start = self._blob_start + self._offsets[position]
+        return self._map[start:self._blob_start + self._offsets[position + 1]]
+
+    def _bisect(self, key, low):
+        high = self.count
+        while low < high:
+            middle = (low + high) // 2
+            if self._word(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def ranks(self, words):
+        """Return {word: rank or None} for words, looked up in one sorted pass."""
+        keys = {word: word.casefold().encode("utf-8") for word in words}
+        found = {}
+        low = 0
+        for key in sorted(set(keys.values())):
+            low = self._bisect(key, low)
+            if low == self.count:
+                break
+            if self._word(low) == key:
+                found[key] = self._ranks[low]
+        return {word: found.get(key) for word, key in keys.items()}
+
+    def rank(self, word):
+        """Return the rank of word, or None if it is not in the list."""
+        return self.ranks([word])[word]
+
+    def close(self):
+        self._offsets.release()
+        self._ranks.release()
+        self._map.close()
+
+
+def load_frequency_index(source_path, directory=FREQUENCY_INDEX_DIR):
+    """
+    Return the FrequencyIndex of the frequency list at source_path.
+
+    The index is built on first use and whenever the list changed, and
+    stays mapped for later exports. An index replaced because its list
+    changed is only dropped from the cache, never closed, as a running
+    export may still read it. Raises ExportError if the list cannot be read.
+    """
+    try:
+        signature = _source_signature(source_path)
+    except OSError as e:
+        raise ExportError(f"Could not read the frequency list: {e}")
+    index_path = index_path_for(source_path, signature, directory)
+
+    with _open_indexes_lock:
+        index = _open_indexes.get(index_path)
+        if index is not None:
+            return index
+
+        try:
+            index = FrequencyIndex(index_path)
+        except (OSError, ValueError, struct.error):
+            index = None
+        if index is None or (index.source_size, index.source_mtime_ns) != signature:
+            # Opened just now and not shared yet, so it can be closed
+            if index is not None:
+                index.close()
+            try:
+                build_frequency_index(source_path, index_path)
+            except OSError as e:
+                raise ExportError(f"Could not read the frequency list: {e}")
+            index = FrequencyIndex(index_path)
+
+        # Forget the indexes of older versions of this list; exports holding
+        # them keep them alive until they finish.
+        digest = _list_digest(source_path)
+        for path in [path for path in _open_indexes if os.path.basename(path).startswith(digest + "-")]:
+            del _open_indexes[path]
+        _open_indexes[index_path] = index
+        _remove_stale_indexes(source_path, index_path, directory)
+    return index
+
+
+def apply_frequency(rows, index, max_rank=None, sort=False):
+    """
+    Set the frequency_rank of rows and filter or sort them by it.
+
+    Ranks are looked up RANK_BATCH_SIZE rows at a time while rows are
+    consumed. With max_rank only rows ranked max_rank or better are kept
+    (words missing from the list are dropped). With sort the rows are
+    yielded most frequent first, words missing from the list last in their
+    original order; this reads all rows before yielding the first.
+    """
+    def ranked_rows():
+        source = iter(rows)
+        while True:
+            batch = list(islice(source, RANK_BATCH_SIZE))
+            if not batch:
+                return
+            ranks = index.ranks([row.word for row in batch])
+            for row in batch:
+                row.frequency_rank = ranks[row.word]
+                if max_rank is None or (row.frequency_rank is not None and row.frequency_rank <= max_rank):
+                    yield row
+
+    if not sort:
+        yield from ranked_rows()
+        return
+    unranked = []
+    ranked = []
+    for row in ranked_rows():
+        (ranked if row.frequency_rank is not None else unranked).append(row)
+    ranked.sort(key=lambda row: row.frequency_rank)
+    yield from ranked
+    yield from unranked
\ No newline at end of file
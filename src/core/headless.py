@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+"""
+Read-only access to an Anki collection file without running Anki.
+
+HeadlessCollection implements the small part of Anki's Collection interface
+that extraction.py needs (``db``, ``models.get`` and ``decks``), directly on
+top of sqlite3. The file is opened read-only, so it is safe to point it at a
+collection that is not currently open in Anki.
+
+Both the current schema (note types and decks in their own tables) and the
+legacy schema (note types and decks stored as JSON in the col table) are
+supported.
+"""
+
+import json
+import os
+import sqlite3
+from urllib.parse import quote
+
+# Deck names are stored with this separator instead of "::" in the decks table.
+DECK_NAME_SEPARATOR = "\x1f"
+
+
+def _unicase(first, second):
+    """Case-insensitive collation Anki registers under the name 'unicase'."""
+    first, second = first.casefold(), second.casefold()
+    return (first > second) - (first < second)
+
+
+class HeadlessDB:
+    """Minimal equivalent of Anki's DBProxy for a sqlite3 connection."""
+
+    def __init__(self, connection):
+        self._connection = connection
+
+    def all(self, sql, *args):
+        return self._connection.execute(sql, args).fetchall()
+
+    def list(self, sql, *args):
+        return [row[0] for row in self._connection.execute(sql, args)]
+
+    def first(self, sql, *args):
+        return self._connection.execute(sql, args).fetchone()
+
+    def scalar(self, sql, *args):
+        row = self._connection.execute(sql, args).fetchone()
+        return row[0] if row else None
+
+    def close(self):
+        self._connection.close()
+
+
+class HeadlessModels:
+    """Note type lookup returning dicts shaped like Anki's note types."""
+
+    def __init__(self, db):
+        self._db = db
+        self._note_types = None
+
+    def _load(self):
+        note_types = {}
+        if self._db.scalar("select count() from sqlite_master where type = 'table' and name = 'notetypes'"):
+            for note_type_id, name, mod in self._db.all("select id, name, mtime_secs from notetypes"):
+                note_types[note_type_id] = {'id': note_type_id, 'name': name, 'mod': mod, 'flds': []}
+            for note_type_id, ord, name in self._db.all("select ntid, ord, name from fields order by ntid, ord"):
+                if note_type_id in note_types:
+                    note_types[note_type_id]['flds'].append({'name': name, 'ord': ord})
+        else:
+            for note_type_id, note_type in json.loads(self._db.scalar("select models from col") or "{}").items():
+                note_types[int(note_type_id)] = note_type
+        return note_types
+
+    def get(self, note_type_id):
+        if self._note_types is None:
+            self._note_types = self._load()
+        return self._note_types.get(int(note_type_id))
+
+    def all(self):
+        if self._note_types is None:
+            self._note_types = self._load()
+        return list(self._note_types.values())
+
+
+class HeadlessDecks:
+    """Deck name and subtree lookup. Deck names use "::" like in Anki's UI."""
+
+    def __init__(self, db):
+        self._db = db
+        self._names = None
+
+    def _load(self):
+        if self._db.scalar("select count() from sqlite_master where type = 'table' and name = 'decks'"):
+            return {
+                deck_id: name.replace(DECK_NAME_SEPARATOR, "::")
+                for deck_id, name in self._db.all("select id, name from decks")
+            }
+        decks = json.loads(self._db.scalar("select decks from col") or "{}")
+        return {int(deck_id): deck['name'] for deck_id, deck in decks.items()}
+
+    def _deck_names(self):
+        if self._names is None:
+            self._names = self._load()
+        return self._names
+
+    def all_names_and_ids(self):
+        """Return (name, id) pairs for every deck, sorted by name."""
+        return sorted(((name, deck_id) for deck_id, name in self._deck_names().items()),
+                      key=lambda item: item[0].casefold())
+
+    def id_for_name(self, name):
+        """Return the id of the deck with the given name, or None."""
+        wanted = name.casefold()
+        for deck_id, deck_name in self._deck_names().items():
+            if deck_name.casefold() == wanted:
+                return deck_id
+        return None
+
+    def name(self, deck_id):
+        return self._deck_names().get(deck_id)
+
+    def deck_and_child_ids(self, deck_id):
+        """Return the id of the deck followed by the ids of all its subdecks."""
+        name = self._deck_names().get(deck_id)
+        if name is None:
+            return []
+        prefix = name.casefold() + "::"
+        return [deck_id] + [
+            child_id for child_id, child_name in self._deck_names().items()
+            if child_name.casefold().startswith(prefix)
+        ]
+
+
+class HeadlessCollection:
+    """A collection file opened read-only, usable wherever extraction.py expects ``col``."""
+
+    def __init__(self, path):
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"Collection file not found: {path}")
+
+        self.path = path
+        connection = sqlite3.connect(f"file:{quote(os.path.abspath(path))}?mode=ro", uri=True, check_same_thread=False)
+        connection.create_collation("unicase", _unicase)
+        self.db = HeadlessDB(connection)
+        self.models = HeadlessModels(self.db)
+        self.decks = HeadlessDecks(self.db)
+
+    @property
+    def mod(self):
+        return self.db.scalar("select mod from col")
+
+    def close(self):
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
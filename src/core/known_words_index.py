@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+
+"""
+On-disk index of mature words per deck and field mapping.
+
+The index is a small SQLite file in the add-on's user_files folder. It is
+filled by a full extraction the first time a deck/field mapping is exported,
+kept up to date from the answer-card hook while reviewing, and reconciled
+lazily against the collection before every export:
+
+- If the collection's modification time is unchanged, the index is used as is.
+- If a note type used by the deck or the deck tree itself changed, the entry
+  is rebuilt from scratch.
+- Otherwise cards and notes changed since the last reconcile (locally, by
+  modification time, or through a sync, by update sequence number) are
+  re-read, and the indexed card ids are diffed against the deck's mature
+  cards, so cards that became mature, lapsed or were deleted are added or
+  dropped. If the counts still differ afterwards, the entry is rebuilt.
+
+Entries are keyed by export_state.watermark_key, which includes the
+collection's path, so decks of different profiles never share an entry.
+
+Every function opens its own SQLite connection, so the index can be used from
+the background export thread as well as from hooks on the main thread.
+"""
+
+import json
+import os
+import sqlite3
+import time
+
+from ..paths import USER_FILES_DIR
+from .diagnostics import NO_DIAGNOSTICS
+from .errors import ExportError
+from .extraction import (
+    DEFAULT_ORDER,
+    MATURE_INTERVAL,
+    CardRow,
+    FieldIndexCache,
+    card_row,
+    extract_rows_bulk,
+    find_mature_ids_in_deck,
+    find_note_type_ids,
+    id_chunks,
+    ids_to_sql,
+    order_card_ids,
+    package_extracted_data,
+)
+from .tokenization import DEFAULT_MIN_TOKEN_COUNT
+
+KNOWN_WORDS_INDEX_PATH = os.path.join(USER_FILES_DIR, "known_words.db")
+
+# Bump when the schema below changes; older files are then rebuilt.
+SCHEMA_VERSION = 5
+
+SCHEMA = """
+create table if not exists entries (
+    key text primary key,
+    deck_id integer not null,
+    sync_words_only integer not null,
+    word_field text not null,
+    sentence_field text,
+    deck_ids text not null,
+    note_types text not null,
+    col_mod integer not null,
+    synced_at integer not null,
+    max_usn integer not null
+);
+create table if not exists words (
+    key text not null,
+    card_id integer not null,
+    note_id integer,
+    word text not null,
+    sentence text not null,
+    review_date integer not null,
+    interval integer not null,
+    primary key (key, card_id)
+) without rowid;
+"""
+
+
+def _connect(path):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    db = sqlite3.connect(path, timeout=30)
+    version = db.execute("pragma user_version").fetchone()[0]
+    if version != SCHEMA_VERSION:
+        db.executescript("drop table if exists entries; drop table if exists words;")
+        db.execute(f"pragma user_version = {SCHEMA_VERSION}")
+    db.executescript(SCHEMA)
+    return db
+
+
+def _collection_mod(col):
+    return col.db.scalar("select mod from col") or 0
+
+
+def _max_usn(col):
+    """Return the highest update sequence number of any card or note."""
+    return col.db.scalar(
+        "select max(coalesce((select max(usn) from cards), 0), coalesce((select max(usn) from notes), 0))"
+    ) or 0
+
+
+def _note_type_mods(col, deck_ids):
+    """Return {note type id: modification time} for note types used in the decks."""
+    note_type_mods = {}
+    for note_type_id in find_note_type_ids(col, deck_ids):
+        note_type = col.models.get(note_type_id)
+        note_type_mods[str(note_type_id)] = note_type.get('mod') if note_type else None
+    return note_type_mods
+
+
+def _store_rows(db, key, rows):
+    db.executemany(
+        "insert or replace into words (key, card_id, note_id, word, sentence, review_date, interval) "
+        "values (?, ?, ?, ?, ?, ?, ?)",
+        ((key, row.card_id, row.note_id, row.word, row.sentence, row.review_date, row.interval) for row in rows)
+    )
+
+
+def _rebuild(db, col, key, deck_id, sync_words_only, word_field, sentence_field, report_progress, is_cancelled):
+    """Replace the entry for key with a full extraction from the collection."""
+    synced_at = int(time.time())
+    col_mod = _collection_mod(col)
+    max_usn = _max_usn(col)
+    deck_ids = sorted(col.decks.deck_and_child_ids(deck_id))
+
+    mature_ids = find_mature_ids_in_deck(col, deck_id)
+    rows = extract_rows_bulk(col, mature_ids, sync_words_only, word_field, sentence_field,
+                             report_progress, is_cancelled)
+
+    db.execute("delete from words where key = ?", (key,))
+    _store_rows(db, key, rows)
+    db.execute(
+        "insert or replace into entries values (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        (key, deck_id, int(bool(sync_words_only)), word_field, sentence_field,
+         json.dumps(deck_ids), json.dumps(_note_type_mods(col, deck_ids), sort_keys=True), col_mod, synced_at,
+         max_usn)
+    )
+
+
+def _reconcile(db, col, key, entry, sync_words_only, word_field, sentence_field, report_progress, is_cancelled):
+    """
+    Bring an existing entry up to date with the collection.
+
+    Returns False if the entry cannot be updated incrementally and has to be
+    rebuilt.
+    """
+    deck_id, stored_deck_ids, stored_note_types, stored_col_mod, synced_at, stored_max_usn = entry
+
+    col_mod = _collection_mod(col)
+    if col_mod == stored_col_mod:
+        return True
+
+    deck_ids = sorted(col.decks.deck_and_child_ids(deck_id))
+    if deck_ids != json.loads(stored_deck_ids):
+        return False
+    if json.dumps(_note_type_mods(col, deck_ids), sort_keys=True) != stored_note_types:
+        return False
+
+    # Local edits set the modification time (in seconds) of cards and notes;
+    # changes pulled in by a sync keep the other device's modification time
+    # but get a new update sequence number. Anything changed either way
+    # (including in the second the last reconcile ran in) is removed from
+    # the index, to be re-read below if it is still a mature card.
+    new_synced_at = int(time.time())
+    max_usn = _max_usn(col)
+    changed_ids = col.db.list(
+        "select c.id from cards c join notes n on n.id = c.nid "
+        "where c.mod >= ? or n.mod >= ? or c.usn > ? or n.usn > ?",
+        synced_at, synced_at, stored_max_usn, stored_max_usn
+    )
+    for chunk in id_chunks(changed_ids):
+        db.execute("delete from words where key = ? and card_id in " + ids_to_sql(chunk), (key,))
+
+    # Diff the indexed cards against the mature cards of the deck tree: this
+    # adds the changed cards back, adds cards that became mature without a
+    # local edit, and drops cards that lapsed or were deleted.
+    mature_ids = set(find_mature_ids_in_deck(col, deck_id))
+    indexed_ids = {row[0] for row in db.execute("select card_id from words where key = ?", (key,))}
+    stale_ids = list(indexed_ids - mature_ids)
+    for chunk in id_chunks(stale_ids):
+        db.execute("delete from words where key = ? and card_id in " + ids_to_sql(chunk), (key,))
+    _store_rows(db, key, extract_rows_bulk(col, sorted(mature_ids - indexed_ids), sync_words_only, word_field,
+                                           sentence_field, report_progress, is_cancelled))
+
+    indexed_count = db.execute("select count() from words where key = ?", (key,)).fetchone()[0]
+    if indexed_count != len(mature_ids):
+        return False
+
+    db.execute("update entries set col_mod = ?, synced_at = ?, max_usn = ? where key = ?",
+               (col_mod, new_synced_at, max_usn, key))
+    return True
+
+
+def open_known_words(col, key, deck_id, sync_words_only, word_field, sentence_field,
+                     path=KNOWN_WORDS_INDEX_PATH, report_progress=None, is_cancelled=None):
+    """
+    Return a connection to the index with the entry for key up to date.
+
+    The entry is built on first use and reconciled with the collection
+    otherwise. The caller owns the returned connection.
+    """
+    db = _connect(path)
+    try:
+        with db:
+            entry = db.execute(
+                "select deck_id, deck_ids, note_types, col_mod, synced_at, max_usn from entries where key = ?", (key,)
+            ).fetchone()
+            if entry is None or not _reconcile(db, col, key, entry, sync_words_only, word_field, sentence_field,
+                                                report_progress, is_cancelled):
+                _rebuild(db, col, key, deck_id, sync_words_only, word_field, sentence_field,
+                         report_progress, is_cancelled)
+    except BaseException:
+        db.close()
+        raise
+    return db
+
+
+def iter_known_words(db, key, card_ids):
+    """
+    Yield the CardRows stored for key in the order of card_ids, then close db.
+
+    Rows are not filtered; rows without a word are yielded too.
+    """
+    try:
+        for chunk in id_chunks(card_ids):
+            rows = {
+                card_id: CardRow(card_id, word, sentence, review_date, interval, note_id)
+                for card_id, note_id, word, sentence, review_date, interval in db.execute(
+                    "select card_id, note_id, word, sentence, review_date, interval from words "
+                    "where key = ? and card_id in " + ids_to_sql(chunk), (key,)
+                )
+            }
+            for card_id in chunk:
+                if card_id in rows:
+                    yield rows[card_id]
+    finally:
+        db.close()
+
+
+def collect_known_words(col, key, deck_id, sync_words_only, word_field, sentence_field,
+                        order=DEFAULT_ORDER, limit=None, normalize=False, dedupe=None, processes=None,
+                        tokenizer=None, min_token_count=DEFAULT_MIN_TOKEN_COUNT, frequency=None,
+                        path=KNOWN_WORDS_INDEX_PATH, report_progress=None, is_cancelled=None,
+                        diagnostics=NO_DIAGNOSTICS):
+    """
+    Index-backed equivalent of extraction.collect_mature_cards.
+
+    Returns the same dict for a full export, raising ExportError when the
+    deck has no usable mature cards. Bringing the index up to date and
+    ordering its cards are recorded as stages in diagnostics; rows are
+    streamed from the index while 'cards' is consumed.
+    """
+
+    NO_MATURE_CARDS_MESSAGE = "No mature cards found in the selected deck.\n\nMature cards are those with intervals of 21 days or more."
+
+    revlog_watermark = col.db.scalar("select max(id) from revlog") or 0
+    with diagnostics.stage("index_lookup"):
+        db = open_known_words(col, key, deck_id, sync_words_only, word_field, sentence_field,
+                              path, report_progress, is_cancelled)
+        card_ids = [row[0] for row in db.execute("select card_id from words where key = ?", (key,))]
+    diagnostics.set_rows("index_lookup", len(card_ids))
+    if not card_ids:
+        db.close()
+        raise ExportError(NO_MATURE_CARDS_MESSAGE)
+
+    try:
+        with diagnostics.stage("ordering"):
+            card_ids = order_card_ids(col, card_ids, order, limit, is_cancelled=is_cancelled)
+        diagnostics.set_rows("ordering", len(card_ids))
+    except BaseException:
+        db.close()
+        raise
+
+    return package_extracted_data(iter_known_words(db, key, card_ids), sync_words_only, word_field, sentence_field,
+                                  revlog_watermark=revlog_watermark, total_candidates=len(card_ids),
+                                  normalize=normalize, dedupe=dedupe, processes=processes,
+                                  tokenizer=tokenizer, min_token_count=min_token_count, frequency=frequency)
+
+
+def update_card(col, card, path=KNOWN_WORDS_INDEX_PATH):
+    """
+    Update every index entry whose deck tree contains the card after a review.
+
+    Mature cards are added or refreshed, cards that dropped below the
+    threshold are removed. Entries are only touched if the index file exists.
+    """
+    if not os.path.exists(path):
+        return
+
+    db = _connect(path)
+    try:
+        with db:
+            entries = db.execute(
+                "select key, sync_words_only, word_field, sentence_field, deck_ids from entries"
+            ).fetchall()
+            matching = [entry for entry in entries if card.did in json.loads(entry[4])]
+            if not matching:
+                return
+
+            if card.ivl < MATURE_INTERVAL:
+                for key, *_ in matching:
+                    db.execute("delete from words where key = ? and card_id = ?", (key, card.id))
+                return
+
+            note = card.note()
+            field_indices = FieldIndexCache(col)
+            for key, sync_words_only, word_field, sentence_field, _ in matching:
+                indices = field_indices.indices(note.mid, sync_words_only, word_field, sentence_field)
+                _store_rows(db, key, [card_row(card.id, card.ivl, card.due, note.fields, *indices, note_id=card.nid)])
+    finally:
+        db.close()
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+"""
+Merged export of the known words of several collections.
+
+Each source is one collection, either a collection file opened read-only
+with headless.HeadlessCollection or an already open collection (Anki's
+mw.col), with the deck and fields to read from it:
+
+    {'label': "Japanese", 'path': "/path/to/collection.anki2", 'deck': "Core", 'word_field': "Word",
+     'sentence_field': "Sentence"}
+
+The sources are read concurrently in a thread pool, each thread with its
+own connection. SQLite releases the GIL while it runs a query, so the
+searches and reads overlap and the export takes about as long as the
+slowest source. The rows of all sources are then merged by their sort key
+into one order. Like extraction.py, nothing here imports aqt.
+"""
+
+import heapq
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .diagnostics import NO_DIAGNOSTICS
+from .errors import ExportCancelled, ExportError
+from .extraction import (
+    DEFAULT_ORDER,
+    MATURE_INTERVAL,
+    find_mature_ids_in_deck,
+    iter_rows_bulk,
+    order_card_keys,
+    package_extracted_data,
+)
+from .headless import HeadlessCollection
+from .normalization import normalize_rows
+from .tokenization import DEFAULT_MIN_TOKEN_COUNT
+
+
+def read_source(source, sync_words_only, order=DEFAULT_ORDER, limit=None, normalize=False, dedupe=None,
+                min_interval=MATURE_INTERVAL, report_progress=None, is_cancelled=None):
+    """
+    Return the (sort key, card id, row) triples of one source in export order.
+
+    Runs in a pool thread. Collection files are opened and closed here, so
+    every thread uses its own connection. normalize and dedupe apply within
+    the source, as in extraction.package_extracted_data; rows without a word
+    are dropped.
+    """
+    col = source.get('col')
+    if col is None:
+        col = HeadlessCollection(source['path'])
+    try:
+        deck_id = col.decks.id_for_name(source['deck'])
+        if deck_id is None:
+            raise ExportError(f"Deck not found in {source['label']}: {source['deck']}")
+
+        card_ids = find_mature_ids_in_deck(col, deck_id, min_interval)
+        keyed_ids = order_card_keys(col, card_ids, order, limit, min_interval, is_cancelled)
+        keys = {card_id: key for key, card_id in keyed_ids}
+
+        rows = iter_rows_bulk(col, [card_id for _, card_id in keyed_ids], sync_words_only, source['word_field'],
+                              source['sentence_field'], report_progress, is_cancelled)
+        if normalize or dedupe:
+            rows = normalize_rows(rows, normalize, dedupe)
+        return [(keys[row.card_id], row.card_id, row) for row in rows if row.word]
+    finally:
+        if source.get('col') is None:
+            col.close()
+
+
+def collect_merged(sources, sync_words_only, order=DEFAULT_ORDER, limit=None, normalize=False, dedupe=None,
+                   tokenizer=None, min_token_count=DEFAULT_MIN_TOKEN_COUNT, frequency=None,
+                   min_interval=MATURE_INTERVAL,
+                   max_workers=None, report_progress=None, is_cancelled=None, diagnostics=NO_DIAGNOSTICS):
+    """
+    Extract the known words of every source concurrently and merge them.
+
+    Returns the same dict as extraction.collect_mature_cards, plus 'sources'
+    (their labels). The rows of all sources are merged into the given order
+    (ties keep the order of sources), and with a limit only the last limit
+    rows of the merged order are kept. Besides deduplication within each
+    source, dedupe also drops the rows of a word from every source but the
+    first one it appears in, in the merged order. report_progress(done,
+    total) sums the progress of all sources. The rows and time of each
+    source are added to the diagnostics context. If a source fails, the
+    others stop at their next chunk and its error is raised.
+
+    Threads overlap the SQLite queries and file reads of the sources; the
+    Python side of reading (building and normalizing rows) holds the GIL.
+    """
+
+    NO_MATURE_CARDS_MESSAGE = "No mature cards found in the selected collections.\n\nMature cards are those with intervals of 21 days or more."
+
+    lock = threading.Lock()
+    progress = {}
+    failed = threading.Event()
+
+    def source_cancelled():
+        return failed.is_set() or bool(is_cancelled and is_cancelled())
+
+    def source_progress(index):
+        if not report_progress:
+            return None
+
+        def report(done, total):
+            with lock:
+                progress[index] = (done, total)
+                done_all = sum(done for done, _ in progress.values())
+                total_all = sum(total for _, total in progress.values())
+            report_progress(done_all, total_all)
+        return report
+
+    def read(index, source):
+        start = time.perf_counter()
+        try:
+            rows = read_source(source, sync_words_only, order, limit, normalize, dedupe, min_interval,
+                               source_progress(index), source_cancelled)
+        except BaseException:
+            failed.set()
+            raise
+        return rows, time.perf_counter() - start
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(sources)) as executor:
+        futures = [executor.submit(read, index, source) for index, source in enumerate(sources)]
+
+    # Sources stopped because another one failed raise ExportCancelled;
+    # report the failure itself.
+    errors = [future.exception() for future in futures if future.exception() is not None]
+    if errors:
+        raise next((error for error in errors if not isinstance(error, ExportCancelled)), errors[0])
+    results = [future.result() for future in futures]
+
+    keyed_rows = []
+    for index, (source, (rows, seconds)) in enumerate(zip(sources, results)):
+        diagnostics.add_context(f"Source {source['label']}", f"{len(rows)} rows in {seconds:.2f}s")
+        keyed_rows.append([(key, index, card_id, row) for key, card_id, row in rows])
+
+    # Every source is already in export order, so a merge gives the order
+    # of all of them.
+    merged = list(heapq.merge(*keyed_rows))
+    if limit and limit < len(merged):
+        merged = merged[-limit:]
+    if not merged:
+        raise ExportError(NO_MATURE_CARDS_MESSAGE)
+
+    if dedupe:
+        # Deduplication within each source happened in read_source; here a
+        # word keeps only the rows of the first source it appears in.
+        word_sources = {}
+        merged = [item for item in merged if word_sources.setdefault(item[3].word, item[1]) == item[1]]
+    merged = [row for _, _, _, row in merged]
+
+    extracted_data = package_extracted_data(iter(merged), sync_words_only, None, None,
+                                            total_candidates=len(merged),
+                                            tokenizer=tokenizer, min_token_count=min_token_count,
+                                            frequency=frequency)
+    extracted_data['sources'] = [source['label'] for source in sources]
+    return extracted_data
\ No newline at end of file
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+
+"""
+Normalization and deduplication of extracted field values.
+
+Word and sentence fields often contain more than the text itself: HTML
+formatting, furigana readings in brackets, cloze deletions, sound tags and
+entities such as ``&nbsp;``. normalize_field reduces a field to its plain
+text with precompiled patterns, and remembers recent results because the
+same values (empty sentences, common words, sibling cards of one note) come
+up again and again in an export.
+
+normalize_rows applies it to a stream of CardRows and can drop duplicate
+words, either between the cards of one note or across the whole export.
+Like the rest of the core package, nothing here imports aqt.
+"""
+
+import html
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+
+# Deduplication modes accepted by normalize_rows. None keeps every row.
+DEDUPE_MODES = ('note', 'global')
+
+# Number of distinct field values whose normalized text is remembered.
+NORMALIZE_CACHE_SIZE = 65536
+
+# Rows sent to a worker process at a time, and chunks in flight per worker.
+NORMALIZE_CHUNK_SIZE = 5000
+CHUNKS_PER_PROCESS = 2
+
+# {{c1::answer::hint}} -> answer
+CLOZE_PATTERN = re.compile(r"\{\{c\d+::(.*?)(?:::.*?)?\}\}", re.DOTALL)
+# [sound:file.mp3] -> nothing
+SOUND_PATTERN = re.compile(r"\[sound:[^\]]*\]")
+# Line and block breaks become spaces, so words on separate lines stay apart.
+BREAK_PATTERN = re.compile(r"<br\s*/?>|</?(?:div|p|li)\b[^>]*>", re.IGNORECASE)
+# Only real tags: a "<" not followed by a tag name is literal text ("5 < 6").
+TAG_PATTERN = re.compile(r"</?[A-Za-z][^>]*>|<!--.*?-->", re.DOTALL)
+# 日本[にほん] -> 日本, like Anki's kanji: filter. A space right after a
+# reading only separates two reading groups (毎日[まいにち] 勉強[べんきょう]
+# -> 毎日勉強) and is dropped; any other space before the base text
+# separates it from the preceding word and is kept.
+FURIGANA_PATTERN = re.compile(r"(?:(?<=\]) )?([^ >]+?)\[(.+?)\]")
+WHITESPACE_PATTERN = re.compile(r"\s+")
+# Values without any of these characters only need whitespace cleanup.
+MARKUP_PATTERN = re.compile(r"[<&\[{]")
+
+
+@lru_cache(maxsize=NORMALIZE_CACHE_SIZE)
+def normalize_field(value):
+    """Return the plain text of a field value, with whitespace collapsed."""
+    if MARKUP_PATTERN.search(value):
+        value = CLOZE_PATTERN.sub(r"\1", value)
+        value = SOUND_PATTERN.sub("", value)
+        value = BREAK_PATTERN.sub(" ", value)
+        value = TAG_PATTERN.sub("", value)
+        value = html.unescape(value)
+        value = FURIGANA_PATTERN.sub(r"\1", value)
+    return WHITESPACE_PATTERN.sub(" ", value).strip()
+
+
+def normalize_pairs(pairs):
+    """Normalize a list of (word, sentence) tuples. Runs in worker processes."""
+    return [(normalize_field(word), normalize_field(sentence)) for word, sentence in pairs]
+
+
+def _normalize_in_process(rows):
+    for row in rows:
+        row.word = normalize_field(row.word)
+        row.sentence = normalize_field(row.sentence)
+        yield row
+
+
+def _normalize_in_pool(rows, processes):
+    """
+    Normalize rows in a pool of worker processes, keeping their order.
+
+    Rows are sent in chunks of NORMALIZE_CHUNK_SIZE with at most
+    CHUNKS_PER_PROCESS chunks per worker in flight, so the input is still
+    consumed lazily.
+    """
+    rows = iter(rows)
+    pending = deque()
+    executor = ProcessPoolExecutor(max_workers=processes)
+    try:
+        while True:
+            while len(pending) < processes * CHUNKS_PER_PROCESS:
+                chunk = list(islice(rows, NORMALIZE_CHUNK_SIZE))
+                if not chunk:
+                    break
+                pending.append((chunk, executor.submit(normalize_pairs, [(row.word, row.sentence) for row in chunk])))
+            if not pending:
+                return
+
+            chunk, future = pending.popleft()
+            for row, (word, sentence) in zip(chunk, future.result()):
+                row.word = word
+                row.sentence = sentence
+                yield row
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def normalize_rows(rows, normalize=True, dedupe=None, processes=None):
+    """
+    Yield rows with normalized fields, optionally without duplicate words.
+
+    Rows are updated in place and yielded lazily in their original order.
+    dedupe is one of DEDUPE_MODES: 'note' drops rows whose word was already
+    yielded for the same note (sibling cards), 'global' drops every repeated
+    word; the first row of each word is kept. With processes > 1 the
+    normalization runs in that many worker processes, which only pays off
+    for large exports and needs an interpreter that can start them (the
+    command-line exporter, not Anki itself).
+    """
+    if dedupe is not None and dedupe not in DEDUPE_MODES:
+        raise ValueError(f"Unknown deduplication mode: {dedupe}")
+
+    if normalize:
+        rows = _normalize_in_pool(rows, processes) if processes and processes > 1 else _normalize_in_process(rows)
+    if dedupe is None:
+        yield from rows
+        return
+
+    seen = set()
+    for row in rows:
+        if row.word:
+            key = row.word if dedupe == 'global' else (row.note_id or row.card_id, row.word)
+            if key in seen:
+                continue
+            seen.add(key)
+        yield row
\ No newline at end of file
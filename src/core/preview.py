@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+
+"""
+Filtering and exclusion of extracted cards before they are exported.
+
+The preview holds every extracted row in memory; the UI only ever reads the
+rows on screen (see ui.preview_dialog). Filtering matches the text against a
+lowercased copy of each row built once, in the background, and narrows the
+previous matches when the text is only extended, so typing stays fast on
+hundreds of thousands of rows. Like extraction.py, nothing here imports aqt.
+"""
+
+from .errors import ExportCancelled
+
+# Rows read between two cancellation checks while loading the preview.
+LOAD_CHUNK_SIZE = 5000
+
+
+class PreviewFilter:
+    """The rows of an export with a text filter and a set of excluded rows."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.text = ""
+        # Positions in rows of the rows matching text, in export order
+        self.visible = range(len(rows))
+        # Positions in rows left out of the export
+        self.excluded = set()
+        self._haystacks = [f"{row.word}\t{row.sentence}".casefold() for row in rows]
+
+    def set_text(self, text):
+        """Show only the rows whose word or sentence contains text. Returns True if the view changed."""
+        text = text.strip().casefold()
+        if text == self.text:
+            return False
+
+        if not text:
+            self.visible = range(len(self.rows))
+        else:
+            # Rows matching the new text are a subset of those matching any
+            # part of it, so an extended filter only rechecks current matches.
+            candidates = self.visible if self.text and self.text in text else range(len(self.rows))
+            haystacks = self._haystacks
+            self.visible = [position for position in candidates if text in haystacks[position]]
+        self.text = text
+        return True
+
+    def exclude(self, positions):
+        """Leave the rows at positions out of the export."""
+        self.excluded.update(positions)
+
+    def include(self, positions):
+        """Put the rows at positions back into the export."""
+        self.excluded.difference_update(positions)
+
+    def visible_excluded(self):
+        """Return the number of visible rows that are excluded."""
+        if not self.text:
+            return len(self.excluded)
+        excluded = self.excluded
+        return sum(1 for position in self.visible if position in excluded)
+
+    def selected_rows(self):
+        """Return the visible rows that are not excluded, in export order."""
+        excluded = self.excluded
+        return [self.rows[position] for position in self.visible if position not in excluded]
+
+    def filtered_data(self, extracted_data):
+        """
+        Return a copy of extracted_data that exports only selected_rows().
+
+        'left_out' holds the number of rows hidden by the filter or excluded.
+        """
+        rows = self.selected_rows()
+        filtered = dict(extracted_data)
+        filtered['cards'] = iter(rows)
+        filtered['total_candidates'] = len(rows)
+        filtered['total_valid'] = len(rows)
+        filtered['left_out'] = len(self.rows) - len(rows)
+        # Words found in sentences (see tokenization) have no card
+        filtered['sentence_words'] = sum(1 for row in rows if row.card_id is None)
+        return filtered
+
+
+def load_preview(extracted_data, is_cancelled=None):
+    """
+    Read all extracted cards into a PreviewFilter.
+
+    Safe to run in a background thread. The cards are read (and progress is
+    reported) by the extraction generators; is_cancelled is also checked
+    every LOAD_CHUNK_SIZE rows.
+    """
+    rows = []
+    for row in extracted_data['cards']:
+        rows.append(row)
+        if is_cancelled and len(rows) % LOAD_CHUNK_SIZE == 0 and is_cancelled():
+            raise ExportCancelled()
+    return PreviewFilter(rows)
\ No newline at end of file
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+"""
+Known words derived from the sentences of mature cards.
+
+A word that keeps appearing in the sentences of mature cards is most likely
+known as well. add_sentence_words passes the exported rows through, splits
+their sentences into tokens with a tokenizer, and afterwards emits every
+token that appears in at least min_count sentences and is not yet exported
+as an extra row without a sentence.
+
+Tokenizers are named by a spec, so worker processes can resolve them
+themselves:
+
+- 'words': runs of letters, lowercased (languages that separate words
+  with spaces)
+- 'janome': dictionary forms of the content words of Japanese sentences,
+  using the janome package if it is installed
+- 'module:function': any importable callable taking a sentence and
+  returning its tokens
+
+Like the rest of the core package, nothing here imports aqt.
+"""
+
+import importlib
+import re
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import islice
+
+from .errors import ExportError
+
+DEFAULT_TOKENIZER = 'words'
+DEFAULT_MIN_TOKEN_COUNT = 3
+
+# Sentences sent to a worker process at a time, and chunks in flight per worker.
+TOKENIZE_CHUNK_SIZE = 2000
+CHUNKS_PER_PROCESS = 2
+
+WORD_PATTERN = re.compile(r"[^\W\d_]+")
+
+# Parts of speech kept by the janome tokenizer: nouns, verbs, adjectives and adverbs
+JANOME_PARTS_OF_SPEECH = ('名詞', '動詞', '形容詞', '副詞')
+
+
+def words_tokenizer(sentence):
+    """Tokenizer: runs of letters, lowercased."""
+    return WORD_PATTERN.findall(sentence.lower())
+
+
+def janome_tokenizer():
+    """Return a tokenizer giving the dictionary forms of Japanese content words."""
+    try:
+        from janome.tokenizer import Tokenizer
+    except ImportError:
+        raise ExportError("The janome tokenizer needs the janome package.\n\nInstall it with: pip install janome")
+    tokenizer = Tokenizer()
+
+    def tokenize(sentence):
+        return [token.base_form for token in tokenizer.tokenize(sentence)
+                if token.part_of_speech.split(",")[0] in JANOME_PARTS_OF_SPEECH]
+    return tokenize
+
+
+@lru_cache(maxsize=None)
+def resolve_tokenizer(spec):
+    """Return the tokenizer callable for spec. Each process builds it once."""
+    if spec == 'words':
+        return words_tokenizer
+    if spec == 'janome':
+        return janome_tokenizer()
+    module_name, _, function_name = spec.partition(":")
+    if not function_name:
+        raise ExportError(f"Unknown sentence tokenizer: {spec}\n\nUse 'words', 'janome' or 'module:function'.")
+    try:
+        return getattr(importlib.import_module(module_name), function_name)
+    except (ImportError, AttributeError) as e:
+        raise ExportError(f"Could not load the sentence tokenizer {spec}: {e}")
+
+
+def count_tokens(sentences, spec):
+    """Return a Counter of the number of sentences each token appears in. Runs in worker processes."""
+    tokenize = resolve_tokenizer(spec)
+    counts = Counter()
+    for sentence in sentences:
+        counts.update(set(tokenize(sentence)))
+    return counts
+
+
+def _count_in_process(rows, spec, counts):
+    tokenize = resolve_tokenizer(spec)
+    for row in rows:
+        if row.sentence:
+            counts.update(set(tokenize(row.sentence)))
+        yield row
+
+
+def _count_in_pool(rows, spec, processes, counts):
+    """
+    Yield rows while the tokens of their sentences are counted into counts
+    in a pool of worker processes.
+
+    Rows are sent in chunks of TOKENIZE_CHUNK_SIZE with at most
+    CHUNKS_PER_PROCESS chunks per worker in flight, so the input is still
+    consumed lazily.
+    """
+    rows = iter(rows)
+    pending = deque()
+    executor = ProcessPoolExecutor(max_workers=processes)
+    try:
+        while True:
+            while len(pending) < processes * CHUNKS_PER_PROCESS:
+                chunk = list(islice(rows, TOKENIZE_CHUNK_SIZE))
+                if not chunk:
+                    break
+                sentences = [row.sentence for row in chunk if row.sentence]
+                pending.append((chunk, executor.submit(count_tokens, sentences, spec)))
+            if not pending:
+                return
+
+            chunk, future = pending.popleft()
+            counts.update(future.result())
+            yield from chunk
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def add_sentence_words(rows, tokenizer=DEFAULT_TOKENIZER, min_count=DEFAULT_MIN_TOKEN_COUNT, processes=None,
+                       stats=None):
+    """
+    Yield rows, then extra rows for the tokens of their sentences.
+
+    rows are yielded unchanged while their sentences are tokenized. Once
+    they are exhausted, every token found in at least min_count sentences
+    that is not already the word of a row is yielded as a CardRow without
+    sentence or card, most frequent first. With processes > 1 the sentences
+    are tokenized in that many worker processes, like
+    normalization.normalize_rows. If stats is a dict, its 'sentence_words'
+    is set to the number of extra rows.
+    """
+    # Imported here because extraction imports this module
+    from .extraction import CardRow
+
+    # Resolve the tokenizer up front, so a bad spec fails before any work
+    resolve_tokenizer(tokenizer)
+
+    counts = Counter()
+    if processes and processes > 1:
+        counted_rows = _count_in_pool(rows, tokenizer, processes, counts)
+    else:
+        counted_rows = _count_in_process(rows, tokenizer, counts)
+
+    exported_words = set()
+    for row in counted_rows:
+        if row.word:
+            exported_words.add(row.word.lower())
+        yield row
+
+    added = 0
+    for token, count in counts.most_common():
+        if count < min_count:
+            break
+        if token.lower() in exported_words:
+            continue
+        added += 1
+        yield CardRow(None, token, "", 0, 0)
+    if stats is not None:
+        stats['sentence_words'] = added
\ No newline at end of file
@@ -0,0 +1,37 @@
+# -*- coding: utf-8 -*-
+
+"""
+Extraction options read from the add-on config, shared by the export
+workflows and the auto-export profiles.
+
+Like the workflows, this module is only imported on first use (see the
+add-on's __init__.py).
+"""
+
+from .core.frequency import load_frequency_index
+from .core.normalization import DEDUPE_MODES
+
+def frequency_option(config):
+    """
+    Return the frequency option of the extraction functions for config.
+    
+    Returns None without a frequency list. Builds the list's index on first
+    use, so it is called from background tasks.
+    """
+    if not config['frequency_list_path']:
+        return None
+    return {
+        'index': load_frequency_index(config['frequency_list_path']),
+        'max_rank': config['frequency_max_rank'] or None,
+        'sort': config['sort_by_frequency']
+    }
+
+def export_options(config):
+    """Return the options every extraction function takes (normalize, dedupe, tokenizer, frequency, ...) for config."""
+    return {
+        'normalize': config['normalize_fields'],
+        'dedupe': config['deduplicate'] if config['deduplicate'] in DEDUPE_MODES else None,
+        'tokenizer': config['sentence_tokenizer'] or None,
+        'min_token_count': config['sentence_token_min_count'],
+        'frequency': frequency_option(config)
+    }
\ No newline at end of file
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+
+"""
+Filesystem locations used by the add-on.
+
+This module does not import aqt, so it can be used outside of Anki.
+"""
+
+import os
+
+# The add-on folder name is what Anki uses to key the add-on's config.
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ADDON_PACKAGE = os.path.basename(ADDON_DIR)
+
+# Anki keeps the user_files folder when the add-on is updated, so anything
+# the add-on writes at runtime belongs here.
+USER_FILES_DIR = os.path.join(ADDON_DIR, "user_files")
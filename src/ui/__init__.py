@@ -5,4 +5,9 @@ UI components for Anki Export Known Words to Clipboard add-on.
 """
 
 from . import selection_dialogs
-from . import field_mapping 
\ No newline at end of file
+from . import field_mapping 
+from . import background
+from . import batch_dialogs
+from . import clipboard_pager
+from . import preview_dialog
+from . import merge_dialogs
\ No newline at end of file
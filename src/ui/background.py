@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+"""
+Running long export steps in a background thread with a progress dialog.
+"""
+
+import threading
+
+from aqt import mw
+from aqt.utils import tooltip
+from aqt.qt import *
+
+from ..core.errors import ExportCancelled
+
+
+def run_with_progress(task, on_success, on_failure, window_title, label, on_cancelled=None):
+    """
+    Run task in a background thread while showing a cancellable progress dialog.
+    
+    task is called as task(report_progress, is_cancelled) off the main thread.
+    It may call report_progress(stage_label, done, total) as often as it likes
+    and should check is_cancelled() between chunks of work, raising
+    ExportCancelled when it returns True. on_success(result) or
+    on_failure(exception) is then called on the main thread. A cancelled task
+    shows a short tooltip and calls on_cancelled(), if given.
+    """
+    
+    CANCELLED_MESSAGE = "Export cancelled."
+    
+    cancel_event = threading.Event()
+    state = {'finished': False}
+    
+    # Create the progress dialog
+    dialog = QProgressDialog(label, "Cancel", 0, 0, mw)
+    dialog.setWindowTitle(window_title)
+    dialog.setWindowModality(Qt.WindowModality.WindowModal)
+    dialog.setMinimumDuration(0)
+    dialog.setAutoClose(False)
+    dialog.setAutoReset(False)
+    dialog.canceled.connect(cancel_event.set)
+    dialog.show()
+    
+    def update_dialog(stage_label, done, total):
+        # Updates can still be queued after the task finished and the dialog
+        # was closed, so ignore them at that point.
+        if state['finished'] or cancel_event.is_set():
+            return
+        dialog.setLabelText(stage_label)
+        dialog.setMaximum(total)
+        dialog.setValue(min(done, total))
+    
+    def report_progress(stage_label, done, total):
+        mw.taskman.run_on_main(lambda: update_dialog(stage_label, done, total))
+    
+    def on_done(future):
+        state['finished'] = True
+        dialog.canceled.disconnect()
+        dialog.hide()
+        dialog.deleteLater()
+        
+        try:
+            result = future.result()
+        except ExportCancelled:
+            tooltip(CANCELLED_MESSAGE)
+            if on_cancelled:
+                on_cancelled()
+        except Exception as e:
+            on_failure(e)
+        else:
+            on_success(result)
+    
+    mw.taskman.run_in_background(lambda: task(report_progress, cancel_event.is_set), on_done)
@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+
+"""
+UI dialogs for batch exports: choosing several decks and mapping the fields
+of every note type they use.
+"""
+
+from aqt import mw
+from aqt.utils import showInfo
+from aqt.qt import *
+
+from ..core.extraction import find_note_type_ids
+from .field_mapping import SKIP_TEXT, saved_field_mapping
+
+
+def _ok_cancel_buttons(dialog, layout):
+    button_layout = QHBoxLayout()
+    ok_button = QPushButton("OK")
+    cancel_button = QPushButton("Cancel")
+    
+    button_layout.addWidget(ok_button)
+    button_layout.addWidget(cancel_button)
+    layout.addLayout(button_layout)
+    
+    ok_button.clicked.connect(dialog.accept)
+    cancel_button.clicked.connect(dialog.reject)
+    
+    ok_button.setShortcut("Return")
+    cancel_button.setShortcut("Escape")
+
+
+def batch_deck_selection():
+    """Show a checklist of decks and return the checked ones that have cards."""
+    
+    NO_DECK_MESSAGE = "No decks found in your collection."
+    WINDOW_TITLE = "Select Decks"
+    DECK_SELECTION_MESSAGE = "Select the decks to export known words from (subdecks are included):"
+    NO_SELECTION_MESSAGE = "Please select at least one deck with cards."
+    
+    decks = [(deck.name, deck.id) for deck in mw.col.decks.all_names_and_ids()]
+    if not decks:
+        showInfo(NO_DECK_MESSAGE)
+        return None
+    
+    # Create the dialog
+    dialog = QDialog(mw)
+    dialog.setWindowTitle(WINDOW_TITLE)
+    dialog.setModal(True)
+    
+    layout = QVBoxLayout()
+    layout.addWidget(QLabel(DECK_SELECTION_MESSAGE))
+    
+    # Create a checklist of decks
+    deck_list = QListWidget()
+    for name, deck_id in decks:
+        item = QListWidgetItem(name)
+        item.setData(Qt.ItemDataRole.UserRole, deck_id)
+        item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+        item.setCheckState(Qt.CheckState.Unchecked)
+        deck_list.addItem(item)
+    layout.addWidget(deck_list)
+    
+    _ok_cancel_buttons(dialog, layout)
+    dialog.setLayout(layout)
+    
+    if dialog.exec() != QDialog.DialogCode.Accepted:
+        return None
+    
+    selected_decks = []
+    for row in range(deck_list.count()):
+        item = deck_list.item(row)
+        if item.checkState() != Qt.CheckState.Checked:
+            continue
+        deck_id = item.data(Qt.ItemDataRole.UserRole)
+        card_count = mw.col.decks.card_count(deck_id, include_subdecks=True)
+        if card_count:
+            selected_decks.append({'deck_name': item.text(), 'deck_id': deck_id, 'card_count': card_count})
+    
+    if not selected_decks:
+        showInfo(NO_SELECTION_MESSAGE)
+        return None
+    return selected_decks
+
+
+def batch_field_mapping(selected_decks, sync_words_only):
+    """
+    Show one dialog mapping the fields of every note type in every selected deck.
+    
+    Returns the batch targets for core.batch.collect_batch. Note types mapped
+    to "(skip)" are left out of the export. Saved field mappings are
+    preselected.
+    """
+    
+    WINDOW_TITLE = "Select Field Mappings"
+    FIELD_MAPPING_MESSAGE = "Select which fields contain the words and sentences for each note type:"
+    NOTHING_MAPPED_MESSAGE = "Please map the word field of at least one note type."
+    
+    # Create the dialog
+    dialog = QDialog(mw)
+    dialog.setWindowTitle(WINDOW_TITLE)
+    dialog.setModal(True)
+    
+    layout = QVBoxLayout()
+    layout.addWidget(QLabel(FIELD_MAPPING_MESSAGE))
+    
+    # One group per deck with a row per note type, scrollable for many decks
+    form_widget = QWidget()
+    form_layout = QVBoxLayout(form_widget)
+    combos = []
+    for deck in selected_decks:
+        group = QGroupBox(deck['deck_name'])
+        grid = QGridLayout(group)
+        grid.addWidget(QLabel("Note type"), 0, 0)
+        grid.addWidget(QLabel("Word field"), 0, 1)
+        if not sync_words_only:
+            grid.addWidget(QLabel("Sentence field"), 0, 2)
+        
+        deck_ids = mw.col.decks.deck_and_child_ids(deck['deck_id'])
+        for row, note_type_id in enumerate(find_note_type_ids(mw.col, deck_ids), start=1):
+            note_type = mw.col.models.get(note_type_id)
+            if not note_type:
+                continue
+            field_names = [field['name'] for field in note_type['flds']]
+            grid.addWidget(QLabel(note_type['name']), row, 0)
+            
+            default_mapping = (field_names[0] if field_names else None, field_names[1] if len(field_names) > 1 else None)
+            word_field, sentence_field = saved_field_mapping(note_type, sync_words_only) or default_mapping
+            
+            word_combo = QComboBox()
+            word_combo.addItems([SKIP_TEXT] + field_names)
+            word_combo.setCurrentText(word_field or SKIP_TEXT)
+            grid.addWidget(word_combo, row, 1)
+            
+            sentence_combo = None
+            if not sync_words_only:
+                sentence_combo = QComboBox()
+                sentence_combo.addItems(field_names)
+                if sentence_field in field_names:
+                    sentence_combo.setCurrentText(sentence_field)
+                grid.addWidget(sentence_combo, row, 2)
+            
+            combos.append((deck, note_type_id, word_combo, sentence_combo))
+        form_layout.addWidget(group)
+    form_layout.addStretch()
+    
+    scroll_area = QScrollArea()
+    scroll_area.setWidgetResizable(True)
+    scroll_area.setWidget(form_widget)
+    layout.addWidget(scroll_area)
+    
+    _ok_cancel_buttons(dialog, layout)
+    dialog.setLayout(layout)
+    
+    if dialog.exec() != QDialog.DialogCode.Accepted:
+        return None
+    
+    targets = {deck['deck_id']: {'deck_id': deck['deck_id'], 'deck_name': deck['deck_name'], 'mappings': {}}
+               for deck in selected_decks}
+    for deck, note_type_id, word_combo, sentence_combo in combos:
+        if word_combo.currentText() == SKIP_TEXT:
+            continue
+        sentence_field = sentence_combo.currentText() if sentence_combo else None
+        targets[deck['deck_id']]['mappings'][note_type_id] = (word_combo.currentText(), sentence_field)
+    
+    targets = [target for target in targets.values() if target['mappings']]
+    if not targets:
+        showInfo(NOTHING_MAPPED_MESSAGE)
+        return None
+    return targets
\ No newline at end of file
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+"""
+Non-modal panel that places a large export on the clipboard one page at a time.
+"""
+
+from aqt import mw
+from aqt.utils import tooltip
+from aqt.qt import *
+
+# Shortcuts work in every Anki window, so the user can come back from the
+# app they pasted into and move on without clicking the panel.
+NEXT_PAGE_SHORTCUT = "Ctrl+Shift+Right"
+PREVIOUS_PAGE_SHORTCUT = "Ctrl+Shift+Left"
+
+# The open pager, kept referenced so the non-modal dialog is not garbage
+# collected. Opening a new pager closes the previous one.
+_pager = None
+
+
+def show_clipboard_pager(extracted_data, pages, page_size):
+    """
+    Copy the first page to the clipboard and show a panel to move between pages.
+    
+    Args:
+        extracted_data: Data from the extraction step
+        pages: The formatted pages, see clipboard_handler.format_clipboard_pages
+        page_size: The number of words per page
+    """
+    global _pager
+    
+    WINDOW_TITLE = "Known Words Pages"
+    INSTRUCTIONS = ("Paste this page into the other application, then come back and "
+                    f"press {NEXT_PAGE_SHORTCUT} (or Next page) to copy the next one.")
+    
+    if _pager is not None:
+        _pager.close()
+    
+    word_count = extracted_data['total_valid']
+    state = {'page': 0}
+    
+    # Create the panel
+    dialog = QDialog(mw)
+    dialog.setWindowTitle(WINDOW_TITLE)
+    dialog.setModal(False)
+    dialog.setWindowFlag(Qt.WindowType.WindowStaysOnTopHint)
+    dialog.setAttribute(Qt.WidgetAttribute.WA_DeleteOnClose)
+    
+    layout = QVBoxLayout()
+    
+    instructions_label = QLabel(INSTRUCTIONS)
+    instructions_label.setWordWrap(True)
+    layout.addWidget(instructions_label)
+    
+    page_label = QLabel()
+    layout.addWidget(page_label)
+    
+    # Add buttons
+    button_layout = QHBoxLayout()
+    previous_button = QPushButton("Previous page")
+    next_button = QPushButton("Next page")
+    close_button = QPushButton("Close")
+    previous_button.setToolTip(PREVIOUS_PAGE_SHORTCUT)
+    next_button.setToolTip(NEXT_PAGE_SHORTCUT)
+    
+    button_layout.addWidget(previous_button)
+    button_layout.addWidget(next_button)
+    button_layout.addWidget(close_button)
+    layout.addLayout(button_layout)
+    
+    dialog.setLayout(layout)
+    
+    def show_page(page):
+        state['page'] = page
+        QApplication.clipboard().setText(pages[page])
+        
+        first_word = page * page_size + 1
+        last_word = min((page + 1) * page_size, word_count)
+        page_label.setText(f"Page {page + 1} of {len(pages)} is on the clipboard (words {first_word}–{last_word} of {word_count}).")
+        previous_button.setEnabled(page > 0)
+        next_button.setEnabled(page < len(pages) - 1)
+    
+    def next_page():
+        if state['page'] < len(pages) - 1:
+            show_page(state['page'] + 1)
+            tooltip(f"Page {state['page'] + 1} of {len(pages)} copied to clipboard.")
+    
+    def previous_page():
+        if state['page'] > 0:
+            show_page(state['page'] - 1)
+            tooltip(f"Page {state['page'] + 1} of {len(pages)} copied to clipboard.")
+    
+    def on_finished():
+        global _pager
+        if _pager is dialog:
+            _pager = None
+    
+    # Connect buttons and shortcuts
+    previous_button.clicked.connect(previous_page)
+    next_button.clicked.connect(next_page)
+    close_button.clicked.connect(dialog.close)
+    for key, action in ((NEXT_PAGE_SHORTCUT, next_page), (PREVIOUS_PAGE_SHORTCUT, previous_page)):
+        shortcut = QShortcut(QKeySequence(key), dialog)
+        shortcut.setContext(Qt.ShortcutContext.ApplicationShortcut)
+        shortcut.activated.connect(action)
+    dialog.finished.connect(on_finished)
+    
+    show_page(0)
+    _pager = dialog
+    dialog.show()
\ No newline at end of file
@@ -2,71 +2,127 @@
 
 """
 UI dialogs for field mapping selection.
+
+Field mappings are chosen per note type. Confirmed mappings are saved in the
+add-on config under ``field_mappings`` (note type id -> word and sentence
+field names), so later exports from decks using the same note types can skip
+the dialog.
 """
 
 from aqt import mw
-from aqt.utils import showInfo
+from aqt.utils import showInfo, tooltip
 from aqt.qt import *
 
+from ..config import get_config, write_config
+from ..core.extraction import count_note_types
+
+SKIP_TEXT = "(skip)"
+
+
+def saved_field_mapping(note_type, sync_words_only):
+    """
+    Return the saved (word_field, sentence_field) for a note type, or None.
+    
+    word_field is None for note types the user chose to skip, and
+    sentence_field is None when sync_words_only is set. Mappings naming
+    fields that no longer exist are ignored.
+    """
+    saved = get_config()['field_mappings'].get(str(note_type['id']))
+    if not isinstance(saved, dict):
+        return None
+    
+    field_names = [field['name'] for field in note_type['flds']]
+    word_field = saved.get('word')
+    sentence_field = saved.get('sentence')
+    if word_field is None:
+        return None, None
+    if word_field not in field_names:
+        return None
+    if sync_words_only:
+        return word_field, None
+    if sentence_field not in field_names:
+        return None
+    return word_field, sentence_field
+
+
+def save_field_mappings(mappings):
+    """Store {note type id: (word_field or None, sentence_field)} in the add-on config."""
+    config = get_config()
+    field_mappings = dict(config['field_mappings'])
+    for note_type_id, (word_field, sentence_field) in mappings.items():
+        previous = field_mappings.get(str(note_type_id))
+        if sentence_field is None and isinstance(previous, dict):
+            # Keep the sentence field chosen in an earlier words and sentences export
+            sentence_field = previous.get('sentence')
+        field_mappings[str(note_type_id)] = {'word': word_field, 'sentence': sentence_field}
+    config['field_mappings'] = field_mappings
+    write_config(config)
+
+
+def _field_mapping_result(note_types, mappings):
+    """Build the result of field_mapping from the chosen mappings."""
+    mapped = {note_type_id: mapping for note_type_id, mapping in mappings.items() if mapping[0] is not None}
+    if not mapped:
+        return None
+    
+    # word_field and sentence_field are those of the most used mapped note type
+    word_field, sentence_field = next(mapped[note_type['id']] for note_type, _ in note_types
+                                      if note_type['id'] in mapped)
+    return {
+        'word_field': word_field,
+        'sentence_field': sentence_field,
+        'mappings': mapped,
+        'single_mapping': len(mapped) == len(mappings) and len(set(mapped.values())) == 1
+    }
+
 
 def field_mapping(selected_deck_name, deck_id, card_count, sync_words_only):
-    """Show a dialog to select field mappings for word and sentence extraction."""
+    """
+    Show a dialog to select field mappings for word and sentence extraction.
+    
+    The dialog lists every note type used in the deck and its subdecks with
+    its number of cards, found with one grouped query, and asks for the word
+    (and sentence) field of each. If all of them have a saved mapping, the
+    dialog is skipped.
+    
+    Returns a dict with 'mappings' ({note type id: (word_field,
+    sentence_field)} for every note type that is not skipped), the
+    'word_field' and 'sentence_field' of the most used one, and
+    'single_mapping', which is true if no note type is skipped and all of
+    them use the same fields.
+    """
     
     WINDOW_TITLE = "Select Field Mappings"
     FIELD_MAPPING_MESSAGE = "Select which fields contain the words and sentences:"
-    WORD_FIELD_LABEL = "Word field:"
-    SENTENCE_FIELD_LABEL = "Sentence field:"
+    WORD_FIELD_LABEL = "Word field"
+    SENTENCE_FIELD_LABEL = "Sentence field"
+    NOTE_TYPE_LABEL = "Note type"
+    REMEMBER_TEXT = "Remember these fields and don't ask again for these note types"
     NO_FIELDS_MESSAGE = "No fields found in the selected deck."
-    FIELD_NOT_FOUND_MESSAGE = "The selected field could not be found. Please try again."
+    NOTHING_MAPPED_MESSAGE = "Please select the word field of at least one note type."
+    SAVED_MAPPINGS_MESSAGE = "Using saved field mappings. Clear field_mappings in the add-on config to choose again."
     
     try:
-        # Get the deck's note type to access its fields
-        deck = mw.col.decks.get(deck_id)
-        if not deck:
-            showInfo("Error: Could not retrieve deck information.")
-            return None
-        
-        # Get the note type ID from the deck
-        if not isinstance(deck, dict):
-            showInfo(f"Error: Unexpected deck data type: {type(deck)}")
-            return None
-            
-        note_type_id = deck.get('mid')
-        
-        if not note_type_id:
-            # Try to get note type from the deck's configuration
-            conf = deck.get('conf', {})
-            if isinstance(conf, dict):
-                note_type_id = conf.get('mid')
-            
-        if not note_type_id:
-            # If still no note type ID, try to get it from the first card in the deck
-            try:
-                card_ids = mw.col.decks.cids(deck_id, children=True)
-                if card_ids:
-                    first_card = mw.col.get_card(card_ids[0])
-                    if first_card:
-                        note_type_id = first_card.note().mid
-            except Exception:
-                pass
-        
-        if not note_type_id:
-            showInfo("Error: Could not determine note type for the selected deck.")
-            return None
-        
-        # Get the note type and its fields
-        note_type = mw.col.models.get(note_type_id)
-        if not note_type:
-            showInfo("Error: Could not retrieve note type information.")
-            return None
-        
-        # Get field names from the note type
-        field_names = [field['name'] for field in note_type['flds']]
-        
-        if not field_names:
+        # Count the cards of every note type in the deck tree in one query
+        deck_ids = mw.col.decks.deck_and_child_ids(deck_id)
+        note_types = []
+        for note_type_id, note_type_cards in count_note_types(mw.col, deck_ids):
+            note_type = mw.col.models.get(note_type_id)
+            if note_type and note_type['flds']:
+                note_types.append((note_type, note_type_cards))
+        
+        if not note_types:
             showInfo(NO_FIELDS_MESSAGE)
             return None
         
+        # Skip the dialog if every note type already has a saved mapping
+        saved = {note_type['id']: saved_field_mapping(note_type, sync_words_only) for note_type, _ in note_types}
+        if all(mapping is not None for mapping in saved.values()):
+            result = _field_mapping_result(note_types, saved)
+            if result:
+                tooltip(SAVED_MAPPINGS_MESSAGE)
+                return result
+        
         # Create the dialog
         dialog = QDialog(mw)
         dialog.setWindowTitle(WINDOW_TITLE)
@@ -80,25 +136,43 @@ def field_mapping(selected_deck_name, deck_id, card_count, sync_words_only):
         layout.addWidget(label)
         layout.addSpacing(10)
         
-        # Create word field selection
-        word_label = QLabel(WORD_FIELD_LABEL)
-        layout.addWidget(word_label)
-        
-        word_combo = QComboBox()
-        word_combo.addItems(field_names)
-        layout.addWidget(word_combo)
-        layout.addSpacing(10)
-        
-        # Create sentence field selection (only if not words-only)
-        sentence_combo = None
+        # Create one row per note type, most used first
+        grid = QGridLayout()
+        grid.addWidget(QLabel(NOTE_TYPE_LABEL), 0, 0)
+        grid.addWidget(QLabel(WORD_FIELD_LABEL), 0, 1)
         if not sync_words_only:
-            sentence_label = QLabel(SENTENCE_FIELD_LABEL)
-            layout.addWidget(sentence_label)
+            grid.addWidget(QLabel(SENTENCE_FIELD_LABEL), 0, 2)
+        
+        combos = []
+        for row, (note_type, note_type_cards) in enumerate(note_types, start=1):
+            field_names = [field['name'] for field in note_type['flds']]
+            # Preselect the saved fields, or the first two fields of the note type
+            default_mapping = (field_names[0], field_names[1] if len(field_names) > 1 else None)
+            word_field, sentence_field = saved[note_type['id']] or default_mapping
+            
+            grid.addWidget(QLabel(f"{note_type['name']} ({note_type_cards} cards)"), row, 0)
+            
+            word_combo = QComboBox()
+            word_combo.addItems([SKIP_TEXT] + field_names)
+            word_combo.setCurrentText(word_field or SKIP_TEXT)
+            grid.addWidget(word_combo, row, 1)
             
-            sentence_combo = QComboBox()
-            sentence_combo.addItems(field_names)
-            layout.addWidget(sentence_combo)
-            layout.addSpacing(10)
+            # Create sentence field selection (only if not words-only)
+            sentence_combo = None
+            if not sync_words_only:
+                sentence_combo = QComboBox()
+                sentence_combo.addItems(field_names)
+                if sentence_field in field_names:
+                    sentence_combo.setCurrentText(sentence_field)
+                grid.addWidget(sentence_combo, row, 2)
+            
+            combos.append((note_type['id'], word_combo, sentence_combo))
+        layout.addLayout(grid)
+        layout.addSpacing(10)
+        
+        remember_checkbox = QCheckBox(REMEMBER_TEXT)
+        remember_checkbox.setChecked(True)
+        layout.addWidget(remember_checkbox)
         
         # Add buttons
         button_layout = QHBoxLayout()
@@ -121,26 +195,27 @@ def field_mapping(selected_deck_name, deck_id, card_count, sync_words_only):
         
         # Show dialog and get result
         if dialog.exec() == QDialog.DialogCode.Accepted:
-            selected_word_field = word_combo.currentText()
-            selected_sentence_field = sentence_combo.currentText() if sentence_combo else None
+            mappings = {}
+            for note_type_id, word_combo, sentence_combo in combos:
+                word_field = word_combo.currentText()
+                if word_field == SKIP_TEXT:
+                    mappings[note_type_id] = (None, None)
+                else:
+                    mappings[note_type_id] = (word_field, sentence_combo.currentText() if sentence_combo else None)
             
-            # Validate selected fields
-            if selected_word_field not in field_names:
-                showInfo(FIELD_NOT_FOUND_MESSAGE)
+            result = _field_mapping_result(note_types, mappings)
+            if not result:
+                showInfo(NOTHING_MAPPED_MESSAGE)
                 return None
             
-            if not sync_words_only and selected_sentence_field not in field_names:
-                showInfo(FIELD_NOT_FOUND_MESSAGE)
-                return None
+            if remember_checkbox.isChecked():
+                save_field_mappings(mappings)
             
             # Return the result instead of calling the next step
-            return {
-                'word_field': selected_word_field,
-                'sentence_field': selected_sentence_field
-            }
+            return result
         else:
             return None
-            
+    
     except Exception as e:
         showInfo(f"Error during field mapping: {str(e)}")
-        return None 
\ No newline at end of file
+        return None
\ No newline at end of file
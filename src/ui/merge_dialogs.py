@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+"""
+UI dialog for merged exports: choosing the profiles or collection files to
+read and the deck and fields to read from each of them.
+"""
+
+import os
+
+from aqt import mw
+from aqt.utils import showInfo
+from aqt.qt import *
+
+from .batch_dialogs import _ok_cancel_buttons
+
+COLLECTION_FILE_NAME = "collection.anki2"
+
+
+def merge_source_selection():
+    """
+    Show a dialog to choose the collections of a merged export.
+
+    Every Anki profile is listed, and other collection files can be added.
+    The open profile is read through mw.col; the other collections are
+    opened read-only (see core.headless). The same deck and field names are
+    used in all of them.
+
+    Returns a dict with 'sources' for core.merge.collect_merged and
+    'sync_words_only', or None if the user cancelled.
+    """
+
+    WINDOW_TITLE = "Merge Known Words"
+    SOURCES_MESSAGE = "Select the profiles or collection files to merge known words from:"
+    ADD_FILE_TEXT = "Add collection file..."
+    DECK_LABEL = "Deck (in every collection, subdecks are included):"
+    WORD_FIELD_LABEL = "Word field:"
+    SENTENCE_FIELD_LABEL = "Sentence field (leave empty to export words only):"
+    OPEN_PROFILE_TEXT = "{name} (open)"
+    NO_SOURCE_MESSAGE = "Please select at least two collections to merge."
+    NO_DECK_MESSAGE = "Please enter the deck and word field to export."
+
+    # Create the dialog
+    dialog = QDialog(mw)
+    dialog.setWindowTitle(WINDOW_TITLE)
+    dialog.setModal(True)
+
+    layout = QVBoxLayout()
+    layout.addWidget(QLabel(SOURCES_MESSAGE))
+
+    # One checkable item per profile; the open one is checked
+    source_list = QListWidget()
+
+    def add_source(label, source, checked):
+        item = QListWidgetItem(label)
+        item.setData(Qt.ItemDataRole.UserRole, source)
+        item.setFlags(item.flags() | Qt.ItemFlag.ItemIsUserCheckable)
+        item.setCheckState(Qt.CheckState.Checked if checked else Qt.CheckState.Unchecked)
+        source_list.addItem(item)
+
+    for name in mw.pm.profiles():
+        if name == mw.pm.name:
+            add_source(OPEN_PROFILE_TEXT.format(name=name), {'label': name}, True)
+        else:
+            path = os.path.join(mw.pm.base, name, COLLECTION_FILE_NAME)
+            if os.path.isfile(path):
+                add_source(name, {'label': name, 'path': path}, False)
+    layout.addWidget(source_list)
+
+    add_file_button = QPushButton(ADD_FILE_TEXT)
+    layout.addWidget(add_file_button)
+
+    def add_file():
+        path, _ = QFileDialog.getOpenFileName(dialog, ADD_FILE_TEXT, mw.pm.base, "Anki collection (*.anki2)")
+        if path:
+            add_source(path, {'label': path, 'path': path}, True)
+
+    add_file_button.clicked.connect(add_file)
+
+    # Deck and field names, with the decks of the open collection suggested
+    deck_edit = QLineEdit()
+    deck_edit.setCompleter(QCompleter([deck.name for deck in mw.col.decks.all_names_and_ids()], dialog))
+    word_field_edit = QLineEdit()
+    sentence_field_edit = QLineEdit()
+
+    layout.addWidget(QLabel(DECK_LABEL))
+    layout.addWidget(deck_edit)
+    layout.addWidget(QLabel(WORD_FIELD_LABEL))
+    layout.addWidget(word_field_edit)
+    layout.addWidget(QLabel(SENTENCE_FIELD_LABEL))
+    layout.addWidget(sentence_field_edit)
+
+    _ok_cancel_buttons(dialog, layout)
+    dialog.setLayout(layout)
+
+    if dialog.exec() != QDialog.DialogCode.Accepted:
+        return None
+
+    deck = deck_edit.text().strip()
+    word_field = word_field_edit.text().strip()
+    sentence_field = sentence_field_edit.text().strip() or None
+    if not deck or not word_field:
+        showInfo(NO_DECK_MESSAGE)
+        return None
+
+    sources = []
+    for row in range(source_list.count()):
+        item = source_list.item(row)
+        if item.checkState() != Qt.CheckState.Checked:
+            continue
+        source = dict(item.data(Qt.ItemDataRole.UserRole))
+        if 'path' not in source:
+            source['col'] = mw.col
+        source.update({'deck': deck, 'word_field': word_field, 'sentence_field': sentence_field})
+        sources.append(source)
+
+    if len(sources) < 2:
+        showInfo(NO_SOURCE_MESSAGE)
+        return None
+    return {'sources': sources, 'sync_words_only': sentence_field is None}
\ No newline at end of file
@@ -0,0 +1,180 @@
+# -*- coding: utf-8 -*-
+
+"""
+Preview of the extracted words, to filter and exclude rows before exporting.
+
+The table is backed by a model that reads rows from the core PreviewFilter
+on demand, so Qt only ever asks for the rows on screen and the dialog opens
+instantly on hundreds of thousands of words.
+"""
+
+from aqt import mw
+from aqt.qt import *
+
+# Milliseconds to wait after the last keystroke before filtering
+FILTER_DELAY = 150
+
+
+class PreviewModel(QAbstractTableModel):
+    """Table model over the visible rows of a PreviewFilter."""
+    
+    def __init__(self, preview_filter, sync_words_only, parent=None):
+        super().__init__(parent)
+        self._filter = preview_filter
+        self._headers = ["Word"] if sync_words_only else ["Word", "Sentence"]
+        self._excluded_brush = QBrush(QColor(Qt.GlobalColor.gray))
+        self._excluded_font = QFont()
+        self._excluded_font.setStrikeOut(True)
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._filter.visible)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._headers)
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        position = self._filter.visible[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            row = self._filter.rows[position]
+            return row.word if index.column() == 0 else row.sentence
+        if position in self._filter.excluded:
+            if role == Qt.ItemDataRole.ForegroundRole:
+                return self._excluded_brush
+            if role == Qt.ItemDataRole.FontRole:
+                return self._excluded_font
+        return None
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self._headers[section]
+        return None
+    
+    def set_filter_text(self, text):
+        """Apply a new filter text and reload the view if it changed."""
+        self.beginResetModel()
+        self._filter.set_text(text)
+        self.endResetModel()
+    
+    def rows_changed(self, first, last):
+        """Redraw the visible rows first to last after they were (un)excluded."""
+        self.dataChanged.emit(self.index(first, 0), self.index(last, len(self._headers) - 1))
+
+
+def preview_export(extracted_data, preview_filter):
+    """
+    Show the extracted words with a filter box and let the user exclude rows.
+    
+    Args:
+        extracted_data: Data from the extraction step
+        preview_filter: core.preview.PreviewFilter over its rows
+    
+    Returns:
+        The extracted data restricted to the rows that match the filter and
+        are not excluded (see PreviewFilter.filtered_data), or None if the
+        user cancelled.
+    """
+    
+    WINDOW_TITLE = "Preview Known Words"
+    FILTER_PLACEHOLDER = "Filter words and sentences..."
+    EXPORT_TEXT = "Export {count} words"
+    STATUS_TEXT = "Showing {visible} of {total} words, {excluded} excluded. Only the words shown and not excluded are exported."
+    
+    # Create the dialog
+    dialog = QDialog(mw)
+    dialog.setWindowTitle(WINDOW_TITLE)
+    dialog.setModal(True)
+    dialog.resize(700, 500)
+    
+    layout = QVBoxLayout()
+    
+    filter_edit = QLineEdit()
+    filter_edit.setPlaceholderText(FILTER_PLACEHOLDER)
+    filter_edit.setClearButtonEnabled(True)
+    layout.addWidget(filter_edit)
+    
+    # Fixed row heights keep scrolling fast on very long lists
+    model = PreviewModel(preview_filter, extracted_data['sync_words_only'], dialog)
+    table = QTableView()
+    table.setModel(model)
+    table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+    table.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+    table.setWordWrap(False)
+    table.verticalHeader().hide()
+    table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+    table.verticalHeader().setDefaultSectionSize(table.fontMetrics().height() + 6)
+    table.horizontalHeader().setStretchLastSection(True)
+    layout.addWidget(table)
+    
+    status_label = QLabel()
+    status_label.setWordWrap(True)
+    layout.addWidget(status_label)
+    
+    # Add buttons
+    button_layout = QHBoxLayout()
+    exclude_button = QPushButton("Exclude selected")
+    include_button = QPushButton("Include selected")
+    export_button = QPushButton()
+    cancel_button = QPushButton("Cancel")
+    exclude_button.setToolTip("Delete")
+    include_button.setToolTip("Insert")
+    
+    button_layout.addWidget(exclude_button)
+    button_layout.addWidget(include_button)
+    button_layout.addStretch()
+    button_layout.addWidget(export_button)
+    button_layout.addWidget(cancel_button)
+    layout.addLayout(button_layout)
+    
+    dialog.setLayout(layout)
+    
+    def update_status():
+        visible = len(preview_filter.visible)
+        excluded = preview_filter.visible_excluded()
+        status_label.setText(STATUS_TEXT.format(visible=visible, total=len(preview_filter.rows), excluded=excluded))
+        export_button.setText(EXPORT_TEXT.format(count=visible - excluded))
+        export_button.setEnabled(visible > excluded)
+    
+    def apply_filter():
+        model.set_filter_text(filter_edit.text())
+        update_status()
+    
+    def change_selected(change):
+        # Walk the selection ranges instead of creating an index per row
+        for selection_range in table.selectionModel().selection():
+            first, last = selection_range.top(), selection_range.bottom()
+            change(preview_filter.visible[first:last + 1])
+            model.rows_changed(first, last)
+        update_status()
+    
+    # Filter once typing pauses rather than on every keystroke
+    filter_timer = QTimer(dialog)
+    filter_timer.setSingleShot(True)
+    filter_timer.setInterval(FILTER_DELAY)
+    filter_timer.timeout.connect(apply_filter)
+    filter_edit.textChanged.connect(lambda _: filter_timer.start())
+    
+    # Connect buttons
+    exclude_button.clicked.connect(lambda: change_selected(preview_filter.exclude))
+    include_button.clicked.connect(lambda: change_selected(preview_filter.include))
+    export_button.clicked.connect(dialog.accept)
+    cancel_button.clicked.connect(dialog.reject)
+    
+    # Add keyboard shortcuts
+    QShortcut(QKeySequence(Qt.Key.Key_Delete), table, activated=exclude_button.click)
+    QShortcut(QKeySequence(Qt.Key.Key_Insert), table, activated=include_button.click)
+    cancel_button.setShortcut("Escape")
+    export_button.setDefault(True)
+    
+    update_status()
+    
+    # Show dialog and get result
+    if dialog.exec() != QDialog.DialogCode.Accepted:
+        return None
+    
+    # Apply a filter typed just before accepting
+    if filter_timer.isActive():
+        filter_timer.stop()
+        apply_filter()
+    return preview_filter.filtered_data(extracted_data)
\ No newline at end of file
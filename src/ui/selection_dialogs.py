@@ -4,18 +4,54 @@
 UI dialogs for deck and sync type selection.
 """
 
+import os
+
 from aqt import mw
 from aqt.utils import showInfo
 from aqt.qt import *
 
+from ..config import get_config, write_config
+from ..core.extraction import DEFAULT_ORDER, count_cards_by_deck
+from ..core.file_export import GZIP_SUFFIX, default_file_name
+
 
-def sync_type_selection(selected_deck_name, deck_id, card_count):
-    """Show a dialog to select export type (words only or words + sentences)."""
+def sync_type_selection(selected_deck_name, deck_id, card_count, batch=False):
+    """
+    Show a dialog to select export type (words only or words + sentences).
+    
+    For a batch export (batch=True) the choice between a full and an
+    incremental export is replaced by merging or grouping the decks.
+    """
     
     WINDOW_TITLE = "Select Export Type"
     SYNC_TYPE_MESSAGE = "Choose what to export to clipboard from mature cards:"
     WORDS_ONLY_TEXT = "Words only"
     WORDS_AND_SENTENCES_TEXT = "Words and sentences (to match Migaku Memory's behavior)"
+    EXPORT_MODE_MESSAGE = "Choose which known words to export:"
+    FULL_EXPORT_TEXT = "All known words (full re-export)"
+    INCREMENTAL_EXPORT_TEXT = "Only new known words since the last export"
+    BATCH_MODE_MESSAGE = "Choose how to combine the selected decks:"
+    MERGED_EXPORT_TEXT = "One merged list (duplicates across decks removed)"
+    GROUPED_EXPORT_TEXT = "One section per deck"
+    ORDER_MESSAGE = "Order:"
+    ORDER_TEXTS = {
+        'last_review': "Last review (most recently reviewed last)",
+        'first_mature': "First time mature (most recently learned last)",
+        'interval': "Interval (longest last)",
+        'ease': "Ease (easiest last)",
+        'note_creation': "Note creation (newest last)",
+        'due': "Due date (latest last)",
+    }
+    LIMIT_MESSAGE = "Only the most recent words (0 = all):"
+    DESTINATION_MESSAGE = "Export to:"
+    CLIPBOARD_TEXT = "Clipboard"
+    FILE_TEXT = "File"
+    FORMAT_TEXTS = {
+        'tsv': "TSV (same as clipboard, for Migaku)",
+        'csv': "CSV",
+        'jsonl': "JSON Lines (with card details)",
+    }
+    GZIP_TEXT = "Compress (gzip)"
     
     # Create the dialog
     dialog = QDialog(mw)
@@ -42,6 +78,10 @@ def sync_type_selection(selected_deck_name, deck_id, card_count):
     words_and_sentences_radio = QRadioButton(WORDS_AND_SENTENCES_TEXT)
     words_and_sentences_radio.setToolTip("Export both words and example sentences, matching Migaku Memory's format")
     
+    type_group = QButtonGroup(dialog)
+    type_group.addButton(words_only_radio)
+    type_group.addButton(words_and_sentences_radio)
+    
     # Set words only as default
     words_only_radio.setChecked(True)
     
@@ -49,6 +89,86 @@ def sync_type_selection(selected_deck_name, deck_id, card_count):
     layout.addWidget(words_and_sentences_radio)
     layout.addSpacing(10)  # Add some space
     
+    # Create radio buttons for full or incremental export, or for merging or
+    # grouping the decks of a batch export. The radio buttons are grouped so
+    # they don't interact with the export type buttons above.
+    if batch:
+        mode_label = QLabel(BATCH_MODE_MESSAGE)
+        default_mode_radio = QRadioButton(MERGED_EXPORT_TEXT)
+        default_mode_radio.setToolTip("Export the words of all decks as one list in the selected order")
+        other_mode_radio = QRadioButton(GROUPED_EXPORT_TEXT)
+        other_mode_radio.setToolTip("Export the words of each deck together, in the order the decks are listed")
+    else:
+        mode_label = QLabel(EXPORT_MODE_MESSAGE)
+        default_mode_radio = QRadioButton(FULL_EXPORT_TEXT)
+        default_mode_radio.setToolTip("Export every mature card and start tracking new known words from now on")
+        other_mode_radio = QRadioButton(INCREMENTAL_EXPORT_TEXT)
+        other_mode_radio.setToolTip("Export only cards that became mature since the last export with the same deck and fields")
+    layout.addWidget(mode_label)
+    
+    mode_group = QButtonGroup(dialog)
+    mode_group.addButton(default_mode_radio)
+    mode_group.addButton(other_mode_radio)
+    
+    # Set full (or merged) export as default
+    default_mode_radio.setChecked(True)
+    
+    layout.addWidget(default_mode_radio)
+    layout.addWidget(other_mode_radio)
+    layout.addSpacing(10)  # Add some space
+    
+    # Create dropdown for the export order, and a limit that keeps only the
+    # last words of that order
+    order_layout = QHBoxLayout()
+    order_layout.addWidget(QLabel(ORDER_MESSAGE))
+    order_combo = QComboBox()
+    for order, text in ORDER_TEXTS.items():
+        order_combo.addItem(text, order)
+    order_combo.setCurrentIndex(order_combo.findData(DEFAULT_ORDER))
+    order_layout.addWidget(order_combo)
+    layout.addLayout(order_layout)
+    
+    limit_layout = QHBoxLayout()
+    limit_layout.addWidget(QLabel(LIMIT_MESSAGE))
+    limit_spin = QSpinBox()
+    limit_spin.setRange(0, 10_000_000)
+    limit_spin.setSingleStep(100)
+    limit_spin.setToolTip("Export only this many words from the end of the selected order")
+    limit_layout.addWidget(limit_spin)
+    layout.addLayout(limit_layout)
+    layout.addSpacing(10)  # Add some space
+    
+    # Create the destination selection. Very large exports are better saved
+    # to a file than copied to the clipboard.
+    destination_layout = QHBoxLayout()
+    destination_layout.addWidget(QLabel(DESTINATION_MESSAGE))
+    clipboard_radio = QRadioButton(CLIPBOARD_TEXT)
+    file_radio = QRadioButton(FILE_TEXT)
+    file_radio.setToolTip("Save to a file; the file is only rewritten if its content changed")
+    destination_group = QButtonGroup(dialog)
+    destination_group.addButton(clipboard_radio)
+    destination_group.addButton(file_radio)
+    clipboard_radio.setChecked(True)
+    destination_layout.addWidget(clipboard_radio)
+    destination_layout.addWidget(file_radio)
+    
+    format_combo = QComboBox()
+    for file_format, text in FORMAT_TEXTS.items():
+        format_combo.addItem(text, file_format)
+    gzip_checkbox = QCheckBox(GZIP_TEXT)
+    destination_layout.addWidget(format_combo)
+    destination_layout.addWidget(gzip_checkbox)
+    layout.addLayout(destination_layout)
+    layout.addSpacing(10)  # Add some space
+    
+    # The file options only apply to file exports
+    def update_file_options():
+        format_combo.setEnabled(file_radio.isChecked())
+        gzip_checkbox.setEnabled(file_radio.isChecked())
+    
+    file_radio.toggled.connect(update_file_options)
+    update_file_options()
+    
     # Add buttons
     button_layout = QHBoxLayout()
     ok_button = QPushButton("OK")
@@ -74,23 +194,71 @@ def sync_type_selection(selected_deck_name, deck_id, card_count):
         # Return the result instead of calling the next step
         return {
             'sync_words_only': sync_words_only,
-            'sync_type': "words only" if sync_words_only else "words and sentences"
+            'sync_type': "words only" if sync_words_only else "words and sentences",
+            'incremental': not batch and other_mode_radio.isChecked(),
+            'group_by_deck': batch and other_mode_radio.isChecked(),
+            'order': order_combo.currentData(),
+            'limit': limit_spin.value() or None,
+            'to_file': file_radio.isChecked(),
+            'file_format': format_combo.currentData(),
+            'compress': gzip_checkbox.isChecked()
         }
     else:
         return None
 
 
+def export_file_selection(file_format, compress):
+    """
+    Ask where to save a file export and remember the choice for next time.
+    
+    Returns the chosen path, or None if the user cancelled.
+    """
+    
+    WINDOW_TITLE = "Save Known Words"
+    
+    # Suggest the previous file if it has the same format, so repeated
+    # exports update it in place
+    config = get_config()
+    previous_path = config['export_file_path']
+    file_name = default_file_name(file_format, compress)
+    extension = file_name[file_name.index("."):]
+    if previous_path and previous_path.endswith(extension):
+        suggested_path = previous_path
+    else:
+        directory = os.path.dirname(previous_path) if previous_path else os.path.expanduser("~")
+        suggested_path = os.path.join(directory, file_name)
+    
+    path, _ = QFileDialog.getSaveFileName(mw, WINDOW_TITLE, suggested_path)
+    if not path:
+        return None
+    if compress and not path.endswith(GZIP_SUFFIX):
+        path += GZIP_SUFFIX
+    
+    config['export_file_path'] = path
+    write_config(config)
+    return path
+
+
 def deck_selection():
-    """Show a dropdown menu to select a deck and validate it."""
+    """
+    Show a searchable deck tree to select a deck and validate it.
+    
+    The tree is built from the deck names and ids only. Total and mature card
+    counts (including subdecks) are computed in the background and filled
+    in when they are ready, so the dialog opens immediately on profiles with
+    many decks.
+    """
     
     NO_DECK_MESSAGE = "No decks found in your collection."
     WINDOW_TITLE = "Select Deck"
     DECK_SELECTION_MESSAGE = "Select a deck to export known words from:"
+    SEARCH_PLACEHOLDER = "Search decks..."
     NO_CARDS_MESSAGE = "The selected deck has no cards. Please select a deck with cards."
-    DECK_NOT_FOUND_MESSAGE = "The selected deck could not be found. Please try again."
-
-    # Get all deck names
-    deck_names = [d['name'] for d in mw.col.decks.all()]
+    NO_DECK_SELECTED_MESSAGE = "Please select a deck."
+    COLUMNS = ["Deck", "Mature", "Total"]
+    
+    # Get all deck names and ids, without loading the full deck objects
+    deck_names = {deck.id: deck.name for deck in mw.col.decks.all_names_and_ids()}
     
     if not deck_names:
         showInfo(NO_DECK_MESSAGE)
@@ -100,6 +268,7 @@ def deck_selection():
     dialog = QDialog(mw)
     dialog.setWindowTitle(WINDOW_TITLE)
     dialog.setModal(True)
+    dialog.resize(500, 500)
     
     # Create layout
     layout = QVBoxLayout()
@@ -108,10 +277,52 @@ def deck_selection():
     label = QLabel(DECK_SELECTION_MESSAGE)
     layout.addWidget(label)
     
-    # Create dropdown for selecting deck
-    combo = QComboBox()
-    combo.addItems(deck_names)
-    layout.addWidget(combo)
+    search_edit = QLineEdit()
+    search_edit.setPlaceholderText(SEARCH_PLACEHOLDER)
+    layout.addWidget(search_edit)
+    
+    # Create the deck tree. Parents are created before their children because
+    # the names are sorted.
+    tree = QTreeWidget()
+    tree.setHeaderLabels(COLUMNS)
+    tree.setUniformRowHeights(True)
+    tree.header().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+    tree.header().setStretchLastSection(False)
+    items = {}
+    for name, deck_id in sorted(((name, deck_id) for deck_id, name in deck_names.items()),
+                                key=lambda item: item[0].split("::")):
+        parent_name, _, leaf_name = name.rpartition("::")
+        parent = items.get(parent_name)
+        item = QTreeWidgetItem([leaf_name, "…", "…"])
+        item.setData(0, Qt.ItemDataRole.UserRole, deck_id)
+        item.setToolTip(0, name)
+        if parent is not None:
+            parent.addChild(item)
+        else:
+            tree.addTopLevelItem(item)
+        items[name] = item
+    layout.addWidget(tree)
+    
+    # Preselect the current deck
+    current_item = items.get(deck_names.get(mw.col.decks.get_current_id()))
+    if current_item is not None:
+        tree.setCurrentItem(current_item)
+        tree.scrollToItem(current_item)
+    
+    def filter_tree(text):
+        # Show decks whose full name matches, along with their ancestors
+        text = text.casefold()
+        for item in items.values():
+            item.setHidden(True)
+        for name, item in items.items():
+            if text in name.casefold():
+                while item is not None and item.isHidden():
+                    item.setHidden(False)
+                    if text:
+                        item.setExpanded(True)
+                    item = item.parent()
+    
+    search_edit.textChanged.connect(filter_tree)
     
     # Add buttons
     button_layout = QHBoxLayout()
@@ -125,41 +336,60 @@ def deck_selection():
     # Connect buttons
     ok_button.clicked.connect(dialog.accept)
     cancel_button.clicked.connect(dialog.reject)
+    tree.itemDoubleClicked.connect(lambda item, column: dialog.accept())
     
     dialog.setLayout(layout)
     
+    # Count the cards in the background. The dialog may be closed before the
+    # counts arrive, in which case they are dropped.
+    state = {'open': True, 'counts': None}
+    
+    def on_counts(future):
+        try:
+            counts = future.result()
+        except Exception:
+            return
+        state['counts'] = counts
+        if not state['open']:
+            return
+        for item in items.values():
+            total, mature = counts.get(item.data(0, Qt.ItemDataRole.UserRole), (0, 0))
+            item.setText(1, str(mature))
+            item.setText(2, str(total))
+    
+    mw.taskman.run_in_background(lambda: count_cards_by_deck(mw.col, deck_names), on_counts)
+    
     # Show dialog and get result
-    if dialog.exec() == QDialog.DialogCode.Accepted:
-        selected_deck_name = combo.currentText()
+    accepted = dialog.exec() == QDialog.DialogCode.Accepted
+    state['open'] = False
+    if not accepted:
+        return None
+    
+    item = tree.currentItem()
+    if item is None:
+        showInfo(NO_DECK_SELECTED_MESSAGE)
+        return None
+    
+    try:
+        deck_id = item.data(0, Qt.ItemDataRole.UserRole)
         
-        # Validate the selected deck
-        try:
-            # Find the deck by name
-            deck_id = None
-            for deck in mw.col.decks.all():
-                if deck['name'] == selected_deck_name:
-                    deck_id = deck['id']
-                    break
-            
-            if deck_id is None:
-                showInfo(DECK_NOT_FOUND_MESSAGE)
-                return None
-            
-            # Check if the deck has any cards
+        # Check if the deck has any cards, counting now if the background
+        # count has not finished yet
+        if state['counts'] is not None:
+            card_count = state['counts'].get(deck_id, (0, 0))[0]
+        else:
             card_count = mw.col.decks.card_count(deck_id, include_subdecks=True)
-            if card_count == 0:
-                showInfo(NO_CARDS_MESSAGE)
-                return None
-            
-            # Return the result instead of calling the next step
-            return {
-                'deck_name': selected_deck_name,
-                'deck_id': deck_id,
-                'card_count': card_count
-            }
-            
-        except Exception as e:
-            showInfo(f"Error validating deck: {str(e)}")
+        if card_count == 0:
+            showInfo(NO_CARDS_MESSAGE)
             return None
-    else:
-        return None 
\ No newline at end of file
+        
+        # Return the result instead of calling the next step
+        return {
+            'deck_name': deck_names[deck_id],
+            'deck_id': deck_id,
+            'card_count': card_count
+        }
+        
+    except Exception as e:
+        showInfo(f"Error validating deck: {str(e)}")
+        return None
\ No newline at end of file
@@ -0,0 +1,471 @@
+# -*- coding: utf-8 -*-
+
+"""
+The export workflows started from the Tools menu.
+
+This module and everything it imports are only loaded when a menu item is
+first used (see the add-on's __init__.py), so they add nothing to Anki's
+startup time.
+"""
+
+import aqt
+from aqt import mw
+from aqt.utils import showInfo
+
+from .ui.selection_dialogs import deck_selection, export_file_selection, sync_type_selection
+from .ui.field_mapping import field_mapping
+from .ui.batch_dialogs import batch_deck_selection, batch_field_mapping
+from .ui.merge_dialogs import merge_source_selection
+from .ui.background import run_with_progress
+from .ui.clipboard_pager import show_clipboard_pager
+from .ui.preview_dialog import preview_export
+from .core.extraction import collect_mature_cards
+from .core.batch import collect_batch
+from .core.merge import collect_merged
+from .core.clipboard_handler import (
+    copy_words_to_clipboard,
+    format_clipboard_pages,
+    format_clipboard_text,
+    show_file_export_result,
+)
+from .core.file_export import write_export_file
+from .core.errors import ExportError
+from .core.export_state import watermark_key, load_watermark, save_watermark
+from .core.known_words_index import collect_known_words
+from .core.preview import load_preview
+from .core.diagnostics import Diagnostics
+from .config import get_config
+from .export_options import export_options
+
+# Titles of the progress dialogs, matching the menu items
+WINDOW_TITLE = "Export Known Words to Clipboard"
+BATCH_WINDOW_TITLE = "Batch Export Known Words from Several Decks"
+MERGE_WINDOW_TITLE = "Merge Known Words from Several Profiles"
+
+def choose_export_file(sync_type_result, diagnostics):
+    """
+    Ask for the target file of a file export.
+    
+    Returns None for clipboard exports, False if the user cancelled, and
+    otherwise a dict with the file's 'path', 'format' and 'compress'.
+    """
+    if not sync_type_result['to_file']:
+        return None
+    path = export_file_selection(sync_type_result['file_format'], sync_type_result['compress'])
+    if not path:
+        return False
+    diagnostics.add_context("Export file format", sync_type_result['file_format'])
+    return {'path': path, 'format': sync_type_result['file_format'], 'compress': sync_type_result['compress']}
+
+def write_export(extracted_data, export_file, page_size, report_progress, is_cancelled, diagnostics):
+    """
+    Step 6 (background half): build the clipboard text, or write the file.
+    
+    The cards are read from the collection while they are formatted. With a
+    page_size the clipboard text is split into pages of that many words.
+    Returns the value on_success passes to deliver_export.
+    """
+    if export_file:
+        with diagnostics.stage("file_write"):
+            file_result = write_export_file(
+                extracted_data,
+                export_file['path'],
+                export_file['format'],
+                export_file['compress'],
+                report_progress=lambda done, total: report_progress("Writing words...", done, total),
+                is_cancelled=is_cancelled
+            )
+        diagnostics.set_rows("file_write", file_result['rows'])
+        return extracted_data, file_result
+    
+    formatting_progress = lambda done, total: report_progress("Formatting words...", done, total)
+    with diagnostics.stage("formatting"):
+        if page_size:
+            clipboard_text = format_clipboard_pages(extracted_data, page_size, formatting_progress, is_cancelled)
+        else:
+            clipboard_text = format_clipboard_text(extracted_data, formatting_progress, is_cancelled)
+    diagnostics.set_rows("formatting", extracted_data['total_valid'])
+    return extracted_data, clipboard_text
+
+def deliver_export(result, export_file, page_size, diagnostics):
+    """
+    Step 6 (main thread half): copy the text to the clipboard, or report the saved file.
+    
+    Paged exports with more than one page are handed to the clipboard pager.
+    """
+    extracted_data, output = result
+    if export_file:
+        show_file_export_result(extracted_data, output, diagnostics)
+        return True
+    if page_size:
+        if len(output) > 1:
+            diagnostics.write_log()
+            show_clipboard_pager(extracted_data, output, page_size)
+            return True
+        output = output[0]
+    return copy_words_to_clipboard(extracted_data, output, diagnostics)
+
+def preview_then_export(result, export_file, page_size, diagnostics, window_title, on_delivered, on_failure):
+    """
+    Step 5b: show the extracted words, then export the ones the user kept.
+    
+    result is the (extracted_data, preview_filter) pair returned by the
+    export task. The chosen rows are formatted (or written) in a second
+    background task, whose result goes to on_delivered. Cancelling the
+    preview or the task finishes diagnostics.
+    """
+    extracted_data, preview_filter = result
+    with diagnostics.stage("preview"):
+        filtered_data = preview_export(extracted_data, preview_filter)
+    if not filtered_data:
+        diagnostics.finish()
+        return
+    diagnostics.set_rows("preview", filtered_data['total_valid'])
+    
+    def format_task(report_progress, is_cancelled):
+        return write_export(filtered_data, export_file, page_size, report_progress, is_cancelled, diagnostics)
+    
+    run_with_progress(format_task, on_delivered, on_failure, window_title, "Formatting words...",
+                      on_cancelled=diagnostics.finish)
+
+def workflow_diagnostics(config, **context):
+    """
+    Return the Diagnostics of a workflow (see config.md), with the options
+    read from config and the given context in its report header.
+    """
+    diagnostics = Diagnostics(
+        enabled=config['diagnostics'],
+        profile_stages=["extraction"] if config['profile_extraction'] else []
+    )
+    diagnostics.add_context("Anki", aqt.appVersion)
+    diagnostics.add_context("Normalize fields", config['normalize_fields'])
+    diagnostics.add_context("Deduplicate", config['deduplicate'])
+    diagnostics.add_context("Sentence tokenizer", config['sentence_tokenizer'] or None)
+    diagnostics.add_context("Frequency list", config['frequency_list_path'] or None)
+    for key, value in context.items():
+        diagnostics.add_context(key.replace("_", " ").capitalize(), value)
+    return diagnostics
+
+def start_export(extract, config, export_file, diagnostics, window_title, on_exported=None):
+    """
+    Steps 5 and 6 of every workflow, once the user made their choices.
+    
+    extract(options, report_progress, is_cancelled) runs in a background
+    thread and returns the extracted data; options are the config's
+    export_options. Its rows are shown in the preview if that is enabled,
+    then formatted and copied to the clipboard (or written to export_file).
+    on_exported(extracted_data) is called once they were delivered. Errors
+    are shown to the user and logged with the diagnostics.
+    
+    Memory tracking of diagnostics starts here, after the dialogs, and is
+    finished on every way the export can end: delivered, failed, cancelled
+    in the progress dialog or the preview, or an error in the callbacks.
+    """
+    page_size = config['clipboard_page_size']
+    preview = config['preview_before_export']
+    
+    def export_task(report_progress, is_cancelled):
+        # Step 5: Extract Mature Cards
+        extraction_progress = lambda done, total: report_progress("Reading mature cards...", done, total)
+        options = export_options(config)
+        with diagnostics.stage("extraction"):
+            extracted_data = extract(options, extraction_progress, is_cancelled)
+        diagnostics.set_rows("extraction", extracted_data['total_candidates'])
+        
+        # Step 5b: Read every row for the preview; Step 6 follows it
+        if preview:
+            with diagnostics.stage("preview_rows"):
+                preview_filter = load_preview(extracted_data, is_cancelled)
+            diagnostics.set_rows("preview_rows", len(preview_filter.rows))
+            return extracted_data, preview_filter
+        
+        # Step 6 (formatting half)
+        return write_export(extracted_data, export_file, page_size, report_progress, is_cancelled, diagnostics)
+    
+    def on_delivered(result):
+        # Step 6: Copy Words to Clipboard (or report the saved file)
+        try:
+            delivered = deliver_export(result, export_file, page_size, diagnostics)
+        finally:
+            diagnostics.finish()
+        if not delivered:
+            showInfo("Failed to copy words to clipboard. Workflow terminated.")
+            return
+        if on_exported:
+            on_exported(result[0])
+    
+    def on_failure(error):
+        try:
+            diagnostics.add_context("Error", repr(error))
+            diagnostics.write_log()
+        finally:
+            diagnostics.finish()
+        if isinstance(error, (ExportError, FileNotFoundError)):
+            showInfo(str(error))
+        else:
+            showInfo(f"Card extraction failed. Workflow terminated.\n\nError details: {str(error)}")
+    
+    def on_success(result):
+        if not preview:
+            on_delivered(result)
+            return
+        try:
+            preview_then_export(result, export_file, page_size, diagnostics, window_title, on_delivered, on_failure)
+        except BaseException:
+            diagnostics.finish()
+            raise
+    
+    diagnostics.start()
+    try:
+        run_with_progress(export_task, on_success, on_failure, window_title, "Reading mature cards...",
+                          on_cancelled=diagnostics.finish)
+    except BaseException:
+        diagnostics.finish()
+        raise
+
+def run_sync_workflow():
+    """
+    Main workflow function that orchestrates the entire export process.
+    
+    This function calls each step sequentially and passes results between them.
+    If any step fails, the workflow terminates with an appropriate error message.
+    """
+    
+    WORKFLOW_START_MESSAGE = "Starting Export Known Words to Clipboard workflow..."
+    
+    try:
+        # Step 1: User Initiates Export (handled by menu item calling this function)
+        config = get_config()
+        legacy_search = config['legacy_intersection_search']
+        use_index = config['use_known_words_index']
+        
+        # Optional instrumentation of every step (see config.md)
+        diagnostics = workflow_diagnostics(config, known_words_index=use_index, legacy_search=legacy_search)
+        
+        # Step 2: Deck Selection
+        with diagnostics.stage("deck_selection"):
+            deck_result = deck_selection()
+        if not deck_result:
+            return False
+        
+        selected_deck_name = deck_result['deck_name']
+        deck_id = deck_result['deck_id']
+        card_count = deck_result['card_count']
+        diagnostics.set_rows("deck_selection", card_count)
+        
+        # Step 3: Export Type Selection
+        with diagnostics.stage("export_type_selection"):
+            sync_type_result = sync_type_selection(selected_deck_name, deck_id, card_count)
+        if not sync_type_result:
+            return False
+        
+        sync_words_only = sync_type_result['sync_words_only']
+        incremental = sync_type_result['incremental']
+        order = sync_type_result['order']
+        limit = sync_type_result['limit']
+        diagnostics.add_context("Export type", sync_type_result['sync_type'])
+        diagnostics.add_context("Order", order)
+        diagnostics.add_context("Limit", limit)
+        
+        # Step 4: Field Mapping
+        with diagnostics.stage("field_mapping"):
+            field_mapping_result = field_mapping(selected_deck_name, deck_id, card_count, sync_words_only)
+        if not field_mapping_result:
+            return False
+        
+        word_field = field_mapping_result['word_field']
+        sentence_field = field_mapping_result['sentence_field']
+        
+        # Step 4b: Target file, for file exports
+        export_file = choose_export_file(sync_type_result, diagnostics)
+        if export_file is False:
+            return False
+        
+        # Decks whose note types are exported with different fields (or
+        # partly skipped) are read with one mapping per note type, like a
+        # batch export of a single deck. The known words index only supports
+        # a single field pair.
+        single_mapping = field_mapping_result['single_mapping']
+        mappings = None if single_mapping else field_mapping_result['mappings']
+        diagnostics.add_context("Note types", len(field_mapping_result['mappings']))
+        
+        # Steps 5 and 6 run in a background thread so Anki stays responsive
+        # on large decks. Only placing the text on the clipboard happens back
+        # on the main thread, in on_success.
+        
+        # Incremental exports start from the watermark stored by the last
+        # export with the same deck and fields. Without a stored watermark
+        # the export is a full one. Every delivered export (full or not)
+        # replaces the watermark in on_exported; a cancelled or failed one
+        # leaves it as it was.
+        state_key = watermark_key(mw.col.path, deck_id, sync_words_only, word_field, sentence_field, mappings)
+        since_revlog_id = load_watermark(state_key) if incremental else None
+        diagnostics.add_context("Incremental", since_revlog_id is not None)
+        
+        def extract(options, report_progress, is_cancelled):
+            # Full exports are served from the known words index when it is enabled
+            if mappings:
+                return collect_batch(
+                    mw.col,
+                    [{'deck_id': deck_id, 'deck_name': selected_deck_name, 'mappings': mappings}],
+                    sync_words_only,
+                    order=order,
+                    limit=limit,
+                    since_revlog_id=since_revlog_id,
+                    report_progress=report_progress,
+                    is_cancelled=is_cancelled,
+                    diagnostics=diagnostics,
+                    **options
+                )
+            if use_index and since_revlog_id is None:
+                return collect_known_words(
+                    mw.col,
+                    state_key,
+                    deck_id,
+                    sync_words_only,
+                    word_field,
+                    sentence_field,
+                    order=order,
+                    limit=limit,
+                    report_progress=report_progress,
+                    is_cancelled=is_cancelled,
+                    diagnostics=diagnostics,
+                    **options
+                )
+            return collect_mature_cards(
+                mw.col,
+                deck_id,
+                sync_words_only,
+                word_field,
+                sentence_field,
+                legacy_search=legacy_search,
+                since_revlog_id=since_revlog_id,
+                order=order,
+                limit=limit,
+                report_progress=report_progress,
+                is_cancelled=is_cancelled,
+                diagnostics=diagnostics,
+                **options
+            )
+        
+        def on_exported(extracted_data):
+            # Remember where this export ended for the next incremental one
+            save_watermark(state_key, extracted_data['revlog_watermark'])
+        
+        start_export(extract, config, export_file, diagnostics, WINDOW_TITLE, on_exported)
+        
+        # The export continues in the background from here
+        return True
+        
+    except Exception as e:
+        showInfo(f"Unexpected error in export workflow: {str(e)}")
+        return False
+
+def run_batch_workflow():
+    """
+    Export known words from several decks at once.
+    
+    Like run_sync_workflow, but the user picks several decks and maps the
+    fields of every note type they use. All decks are read in one pass and
+    the words are merged into one list or grouped per deck. Batch exports
+    are always full exports and read the collection directly.
+    """
+    
+    try:
+        config = get_config()
+        diagnostics = workflow_diagnostics(config, batch=True)
+        
+        # Step 2: Deck Selection
+        with diagnostics.stage("deck_selection"):
+            selected_decks = batch_deck_selection()
+        if not selected_decks:
+            return False
+        
+        card_count = sum(deck['card_count'] for deck in selected_decks)
+        diagnostics.set_rows("deck_selection", card_count)
+        
+        # Step 3: Export Type Selection
+        with diagnostics.stage("export_type_selection"):
+            sync_type_result = sync_type_selection(None, None, card_count, batch=True)
+        if not sync_type_result:
+            return False
+        
+        sync_words_only = sync_type_result['sync_words_only']
+        group_by_deck = sync_type_result['group_by_deck']
+        diagnostics.add_context("Export type", sync_type_result['sync_type'])
+        diagnostics.add_context("Grouped by deck", group_by_deck)
+        
+        # Step 4: Field Mapping for every note type of every deck
+        with diagnostics.stage("field_mapping"):
+            targets = batch_field_mapping(selected_decks, sync_words_only)
+        if not targets:
+            return False
+        diagnostics.add_context("Decks", len(targets))
+        
+        # Step 4b: Target file, for file exports
+        export_file = choose_export_file(sync_type_result, diagnostics)
+        if export_file is False:
+            return False
+        
+        def extract(options, report_progress, is_cancelled):
+            # All decks are read in one pass
+            return collect_batch(
+                mw.col,
+                targets,
+                sync_words_only,
+                group_by_deck=group_by_deck,
+                order=sync_type_result['order'],
+                limit=sync_type_result['limit'],
+                report_progress=report_progress,
+                is_cancelled=is_cancelled,
+                diagnostics=diagnostics,
+                **options
+            )
+        
+        start_export(extract, config, export_file, diagnostics, BATCH_WINDOW_TITLE)
+        return True
+        
+    except Exception as e:
+        showInfo(f"Unexpected error in export workflow: {str(e)}")
+        return False
+
+def run_merge_workflow():
+    """
+    Export the known words of several profiles or collection files at once.
+    
+    The collections are read concurrently, each with its own connection
+    (see core.merge), and their words are merged into one deduplicated list
+    that is copied to the clipboard. The open profile is read through mw.col.
+    """
+    
+    try:
+        config = get_config()
+        diagnostics = workflow_diagnostics(config, merge=True)
+        
+        # Step 2: Collection, deck and field selection
+        with diagnostics.stage("source_selection"):
+            merge_result = merge_source_selection()
+        if not merge_result:
+            return False
+        
+        sources = merge_result['sources']
+        sync_words_only = merge_result['sync_words_only']
+        diagnostics.add_context("Collections", len(sources))
+        
+        def extract(options, report_progress, is_cancelled):
+            # All collections are read concurrently
+            return collect_merged(
+                sources,
+                sync_words_only,
+                report_progress=report_progress,
+                is_cancelled=is_cancelled,
+                diagnostics=diagnostics,
+                **options
+            )
+        
+        start_export(extract, config, None, diagnostics, MERGE_WINDOW_TITLE)
+        return True
+        
+    except Exception as e:
+        showInfo(f"Unexpected error in export workflow: {str(e)}")
+        return False
\ No newline at end of file
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+"""
+Shared fixtures. The tests run without Anki: collections are synthetic files
+(see benchmarks/synthetic_collection.py) opened with HeadlessCollection, and
+aqt and anki are replaced by the minimal stand-ins of
+benchmarks/anki_stubs.py when they are not installed.
+
+The add-on folder is itself a package, so pytest imports its __init__.py
+(which imports aqt) before running any test; the stand-ins must therefore be
+installed when this file is loaded.
+"""
+
+import os
+import sys
+
+import pytest
+
+ADDON_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ADDON_DIR)
+sys.path.insert(0, os.path.join(ADDON_DIR, "benchmarks"))
+
+from anki_stubs import install_anki_stubs  # noqa: E402
+from synthetic_collection import create_collection  # noqa: E402
+
+
+try:
+    import aqt  # noqa: F401
+except ImportError:
+    install_anki_stubs()
+
+
+@pytest.fixture(scope="session")
+def synthetic_collection_path(tmp_path_factory):
+    """Path of a small synthetic collection with subdecks and two note types."""
+    path = str(tmp_path_factory.mktemp("collections") / "collection.anki2")
+    create_collection(path, cards=3000, decks=2, depth=2, note_types=2, fields=4, seed=1)
+    return path
\ No newline at end of file
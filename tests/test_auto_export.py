@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+"""
+Auto-export profiles are only run again when the collection, the profile,
+the export options or the target file changed since their last run.
+"""
+
+import os
+import shutil
+import sqlite3
+
+import pytest
+
+from src.core.auto_export import profile_signature, run_auto_exports, stale_profiles
+from src.core.errors import ExportCancelled
+from src.core.frequency import load_frequency_index
+from src.core.headless import HeadlessCollection
+
+OPTIONS = {'normalize': False, 'dedupe': None}
+
+
+@pytest.fixture
+def collection_path(synthetic_collection_path, tmp_path):
+    """A copy of the synthetic collection that the test may modify."""
+    path = str(tmp_path / "collection.anki2")
+    shutil.copy(synthetic_collection_path, path)
+    return path
+
+
+@pytest.fixture
+def state_path(tmp_path):
+    return str(tmp_path / "export_state.json")
+
+
+@pytest.fixture
+def profile(tmp_path):
+    return {'name': "Deck 0", 'deck': "Deck 0", 'word_field': "Word", 'sentence_field': "Sentence",
+            'format': "tsv", 'path': str(tmp_path / "out" / "known_words.txt")}
+
+
+def _statuses(results):
+    return [result['status'] for result in results]
+
+
+def test_unchanged_profiles_are_skipped(collection_path, state_path, profile):
+    with HeadlessCollection(collection_path) as col:
+        first = run_auto_exports(col, [profile], OPTIONS, path=state_path)
+        assert _statuses(first) == ['written']
+        assert first[0]['rows'] > 0
+
+        assert _statuses(run_auto_exports(col, [profile], OPTIONS, path=state_path)) == ['skipped']
+        assert stale_profiles(col, [profile], OPTIONS, path=state_path) == []
+
+
+def test_changes_run_the_profile_again(collection_path, state_path, profile):
+    with HeadlessCollection(collection_path) as col:
+        run_auto_exports(col, [profile], OPTIONS, path=state_path)
+
+        # The target file was deleted
+        os.remove(profile['path'])
+        assert stale_profiles(col, [profile], OPTIONS, path=state_path) == [profile]
+        assert _statuses(run_auto_exports(col, [profile], OPTIONS, path=state_path)) == ['written']
+
+        # The profile was edited
+        edited = dict(profile, format="csv")
+        assert _statuses(run_auto_exports(col, [edited], OPTIONS, path=state_path)) == ['written']
+
+        # The global export options changed; the words are unique, so
+        # the content is the same and the file is left untouched
+        options = dict(OPTIONS, dedupe='global')
+        assert _statuses(run_auto_exports(col, [edited], options, path=state_path)) == ['unchanged']
+        assert _statuses(run_auto_exports(col, [edited], options, path=state_path)) == ['skipped']
+
+        # The collection changed
+        db = sqlite3.connect(collection_path)
+        with db:
+            db.execute("update col set mod = mod + 1")
+        db.close()
+        assert _statuses(run_auto_exports(col, [edited], options, path=state_path)) == ['unchanged']
+
+
+def test_failing_profile_does_not_stop_the_others(collection_path, state_path, profile, tmp_path):
+    missing_deck = dict(profile, name="Missing", deck="Missing")
+    missing_setting = {'name': "Incomplete", 'deck': "Deck 1", 'path': str(tmp_path / "incomplete.txt")}
+
+    with HeadlessCollection(collection_path) as col:
+        results = run_auto_exports(col, [missing_deck, missing_setting, profile], OPTIONS, path=state_path)
+
+    assert _statuses(results) == ['failed', 'failed', 'written']
+    assert results[0]['error'] == "Deck not found: Missing"
+    assert results[1]['error'] == "Missing profile setting: 'word_field'"
+
+
+def test_cancelled_run(collection_path, state_path, profile):
+    with HeadlessCollection(collection_path) as col:
+        with pytest.raises(ExportCancelled):
+            run_auto_exports(col, [profile], OPTIONS, is_cancelled=lambda: True, path=state_path)
+        assert stale_profiles(col, [profile], OPTIONS, path=state_path) == [profile]
+
+
+def test_profile_signature(profile, tmp_path):
+    list_path = str(tmp_path / "frequency.txt")
+    with open(list_path, "w", encoding="utf-8") as source:
+        source.write("word1\nword2\n")
+    frequency = {'index': load_frequency_index(list_path, str(tmp_path / "indexes")), 'max_rank': None, 'sort': True}
+
+    signature = profile_signature(profile, dict(OPTIONS, frequency=frequency))
+    assert signature == profile_signature(dict(profile), dict(OPTIONS, frequency=dict(frequency)))
+    assert signature != profile_signature(profile, OPTIONS)
+    assert signature != profile_signature(profile, dict(OPTIONS, frequency=dict(frequency, max_rank=1000)))
+    assert signature != profile_signature(dict(profile, compress=True), dict(OPTIONS, frequency=frequency))
+
+    # A new version of the frequency list changes the signature too
+    with open(list_path, "w", encoding="utf-8") as source:
+        source.write("word2\nword1\nword3\n")
+    frequency = dict(frequency, index=load_frequency_index(list_path, str(tmp_path / "indexes")))
+    assert signature != profile_signature(profile, dict(OPTIONS, frequency=frequency))
\ No newline at end of file
@@ -0,0 +1,104 @@
+# -*- coding: utf-8 -*-
+
+"""
+Watermarks of incremental exports: storing them, and finding the cards that
+became mature after one.
+"""
+
+import shutil
+import sqlite3
+
+import pytest
+
+from src.core.errors import ExportError
+from src.core.export_state import load_watermark, save_watermark, watermark_key
+from src.core.extraction import (
+    collect_mature_cards,
+    find_mature_ids_in_deck,
+    find_newly_mature_ids_in_deck,
+    ids_to_sql,
+)
+from src.core.headless import HeadlessCollection
+
+FIELDS = (False, "Word", "Sentence")
+
+
+@pytest.fixture
+def collection_path(synthetic_collection_path, tmp_path):
+    """A copy of the synthetic collection that the test may modify."""
+    path = str(tmp_path / "collection.anki2")
+    shutil.copy(synthetic_collection_path, path)
+    return path
+
+
+def test_watermark_round_trip(tmp_path):
+    path = str(tmp_path / "state" / "export_state.json")
+    key = watermark_key("/profiles/User 1/collection.anki2", 1, *FIELDS)
+    other_key = watermark_key("/profiles/User 2/collection.anki2", 1, *FIELDS)
+
+    assert load_watermark(key, path) is None
+
+    save_watermark(key, 1_600_000_123_456, path)
+    save_watermark(other_key, 42, path)
+    assert load_watermark(key, path) == 1_600_000_123_456
+    assert load_watermark(other_key, path) == 42
+
+    save_watermark(key, 1_600_000_999_999, path)
+    assert load_watermark(key, path) == 1_600_000_999_999
+
+
+def test_unreadable_state_has_no_watermark(tmp_path):
+    path = str(tmp_path / "export_state.json")
+    with open(path, "w", encoding="utf-8") as state_file:
+        state_file.write("{not json")
+
+    assert load_watermark("key", path) is None
+    save_watermark("key", 7, path)
+    assert load_watermark("key", path) == 7
+
+
+def test_watermark_keys():
+    words = watermark_key("/collection.anki2", 1, True, "Word", None)
+    sentences = watermark_key("/collection.anki2", 1, False, "Word", "Sentence")
+    mapped = watermark_key("/collection.anki2", 1, False, "Word", "Sentence", {2: ("Word", "Sentence"), 1: ("A", None)})
+
+    assert len({words, sentences, mapped}) == 3
+    assert mapped == watermark_key("/collection.anki2", 1, False, "Other", None, {1: ("A", None), 2: ("Word", "Sentence")})
+
+
+def _add_review(collection_path, card_id, interval, last_interval):
+    db = sqlite3.connect(collection_path)
+    with db:
+        review_id = db.execute("select max(id) + 1000 from revlog").fetchone()[0]
+        db.execute("insert into revlog values (?, ?, 0, 3, ?, ?, 2500, 5000, 1)",
+                   (review_id, card_id, interval, last_interval))
+    db.close()
+
+
+def test_newly_mature_cards_since_watermark(collection_path):
+    with HeadlessCollection(collection_path) as col:
+        deck_id = col.decks.id_for_name("Deck 0")
+        other_deck_id = col.decks.id_for_name("Deck 1")
+        deck_ids = col.decks.deck_and_child_ids(deck_id)
+        mature_ids = sorted(find_mature_ids_in_deck(col, deck_id))
+        young_id = col.db.scalar("select id from cards where did in " + ids_to_sql(deck_ids) + " and ivl < 21")
+        other_id = min(find_mature_ids_in_deck(col, other_deck_id))
+
+        # A full history: every mature card crossed the threshold at some point
+        assert set(find_newly_mature_ids_in_deck(col, deck_id, 0)) == set(mature_ids)
+
+        watermark = collect_mature_cards(col, deck_id, *FIELDS)['revlog_watermark']
+        assert watermark == col.db.scalar("select max(id) from revlog")
+        assert find_newly_mature_ids_in_deck(col, deck_id, watermark) == []
+        with pytest.raises(ExportError):
+            collect_mature_cards(col, deck_id, *FIELDS, since_revlog_id=watermark)
+
+        _add_review(collection_path, mature_ids[0], 30, 10)   # crossed the threshold
+        _add_review(collection_path, mature_ids[1], 60, 30)   # was already mature
+        _add_review(collection_path, young_id, 15, 10)        # still young
+        _add_review(collection_path, other_id, 30, 10)        # in another deck
+
+        assert find_newly_mature_ids_in_deck(col, deck_id, watermark) == [mature_ids[0]]
+        extracted_data = collect_mature_cards(col, deck_id, *FIELDS, since_revlog_id=watermark)
+        assert [row.card_id for row in extracted_data['cards']] == [mature_ids[0]]
+        assert extracted_data['revlog_watermark'] > watermark
\ No newline at end of file
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+
+"""
+The bulk extraction path must give the same rows as the per-card path.
+"""
+
+from types import SimpleNamespace
+
+import pytest
+
+from src.core.extraction import (
+    FIELD_SEPARATOR,
+    collect_mature_cards,
+    find_mature_ids_in_deck,
+    ids_to_sql,
+    iter_rows_bulk,
+    iter_rows_per_card,
+)
+from src.core.headless import HeadlessCollection
+
+ROW_ATTRIBUTES = ('card_id', 'word', 'sentence', 'review_date', 'interval', 'note_id')
+
+
+class PerCardDB:
+    """Database wrapper that fails the bulk query, so extraction falls back to the per-card path."""
+
+    def __init__(self, db):
+        self._db = db
+
+    def all(self, sql, *args):
+        if "n.flds" in sql:
+            raise RuntimeError("bulk query unavailable")
+        return self._db.all(sql, *args)
+
+    def __getattr__(self, name):
+        return getattr(self._db, name)
+
+
+class PerCardCollection:
+    """
+    HeadlessCollection with Anki's get_card, loading cards and notes one by one.
+
+    Card objects carry the attributes the per-card path reads from Anki's Card,
+    plus a review_time that differs from due, so a path reading it instead of
+    the due value gives different rows.
+    """
+
+    def __init__(self, col):
+        self._col = col
+        self.db = PerCardDB(col.db)
+        self.models = col.models
+        self.decks = col.decks
+
+    def get_card(self, card_id):
+        card = self._col.db.first("select ivl, due, nid from cards where id = ?", card_id)
+        if card is None:
+            return None
+        interval, due, note_id = card
+        note_type_id, flds = self._col.db.first("select mid, flds from notes where id = ?", note_id)
+        note = SimpleNamespace(mid=note_type_id, fields=flds.split(FIELD_SEPARATOR))
+        return SimpleNamespace(ivl=interval, due=due, review_time=due + 1, nid=note_id, note=lambda: note)
+
+
+def _row_values(rows):
+    return [tuple(getattr(row, name) for name in ROW_ATTRIBUTES) for row in rows]
+
+
+@pytest.fixture
+def col(synthetic_collection_path):
+    with HeadlessCollection(synthetic_collection_path) as col:
+        yield col
+
+
+@pytest.mark.parametrize("sync_words_only", [True, False])
+def test_bulk_rows_match_per_card_rows(col, sync_words_only):
+    deck_id = col.decks.id_for_name("Deck 0")
+    card_ids = find_mature_ids_in_deck(col, deck_id)
+    assert len(card_ids) > 500  # more than one bulk chunk
+
+    bulk = _row_values(iter_rows_bulk(col, card_ids, sync_words_only, "Word", "Sentence"))
+    per_card = _row_values(iter_rows_per_card(PerCardCollection(col), card_ids, sync_words_only, "Word", "Sentence"))
+
+    assert bulk == per_card
+    due = dict(col.db.all("select id, due from cards where id in " + ids_to_sql(card_ids)))
+    assert [row[3] for row in per_card] == [due[row[0]] for row in per_card]
+
+
+@pytest.mark.parametrize("order", ["last_review", "interval", "note_creation"])
+def test_collect_mature_cards_matches_per_card_fallback(col, order):
+    deck_id = col.decks.id_for_name("Deck 1")
+
+    bulk = collect_mature_cards(col, deck_id, False, "Word", "Sentence", order=order, normalize=True, dedupe='note')
+    per_card = collect_mature_cards(PerCardCollection(col), deck_id, False, "Word", "Sentence", order=order,
+                                    normalize=True, dedupe='note')
+
+    assert _row_values(bulk['cards']) == _row_values(per_card['cards'])
+    assert bulk['total_valid'] == per_card['total_valid'] > 0
\ No newline at end of file
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+
+"""
+File exports: the tsv, csv and jsonl writers, gzip output and skipping
+targets that already hold the same content.
+"""
+
+import gzip
+import json
+import os
+
+import pytest
+
+from src.core.errors import ExportCancelled
+from src.core.extraction import CardRow
+from src.core.file_export import write_export_file
+
+CARDS = [
+    CardRow(1, "猫", "猫が好きです。", 120, 30, note_id=10, frequency_rank=5),
+    CardRow(2, "quote", 'He said "hi", then left.', 95, 21, note_id=11),
+    CardRow(None, "from sentence", "", 0, 0),
+]
+
+
+def _extracted_data(sync_words_only=False, cards=CARDS):
+    return {'cards': list(cards), 'sync_words_only': sync_words_only, 'total_candidates': len(cards)}
+
+
+def _read(path):
+    with open(path, encoding="utf-8") as exported:
+        return exported.read()
+
+
+@pytest.mark.parametrize("file_format, sync_words_only, expected", [
+    ('tsv', False, "猫\t猫が好きです。\nquote\tHe said \"hi\", then left.\nfrom sentence\n"),
+    ('tsv', True, "猫\nquote\nfrom sentence\n"),
+    ('csv', False, "word,sentence\n猫,猫が好きです。\nquote,\"He said \"\"hi\"\", then left.\"\nfrom sentence,\n"),
+    ('csv', True, "word\n猫\nquote\nfrom sentence\n"),
+])
+def test_text_formats(tmp_path, file_format, sync_words_only, expected):
+    path = str(tmp_path / f"known_words.{file_format}")
+
+    result = write_export_file(_extracted_data(sync_words_only), path, file_format)
+
+    assert result == {'path': path, 'rows': 3, 'changed': True}
+    assert _read(path) == expected
+
+
+def test_jsonl(tmp_path):
+    path = str(tmp_path / "known_words.jsonl")
+
+    write_export_file(_extracted_data(), path, 'jsonl')
+
+    lines = [json.loads(line) for line in _read(path).splitlines()]
+    assert lines[0] == {'word': "猫", 'sentence': "猫が好きです。", 'card_id': 1, 'note_id': 10, 'interval': 30,
+                        'due': 120, 'frequency_rank': 5}
+    assert [line['card_id'] for line in lines] == [1, 2, None]
+
+
+def test_gzip_round_trip(tmp_path):
+    plain_path = str(tmp_path / "known_words.tsv")
+    path = str(tmp_path / "known_words.tsv.gz")
+
+    write_export_file(_extracted_data(), plain_path, 'tsv')
+    write_export_file(_extracted_data(), path, 'tsv', compress=True)
+
+    with gzip.open(path, "rt", encoding="utf-8") as exported:
+        assert exported.read() == _read(plain_path)
+
+    # The header names the target file, not the temporary one it was written to
+    with open(path, "rb") as exported:
+        header = exported.read(512)
+    assert header[3] & gzip.FNAME
+    assert header[4:8] == b"\0\0\0\0"
+    assert header[10:header.index(b"\0", 10)] == b"known_words.tsv"
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_unchanged_content_is_not_rewritten(tmp_path, compress):
+    path = str(tmp_path / ("known_words.tsv.gz" if compress else "known_words.tsv"))
+    write_export_file(_extracted_data(), path, 'tsv', compress)
+    os.utime(path, ns=(1_000_000_000, 1_000_000_000))
+
+    result = write_export_file(_extracted_data(), path, 'tsv', compress)
+
+    assert result['changed'] is False
+    assert os.stat(path).st_mtime_ns == 1_000_000_000
+    assert os.listdir(tmp_path) == [os.path.basename(path)]
+
+    result = write_export_file(_extracted_data(cards=CARDS[:2]), path, 'tsv', compress)
+
+    assert result == {'path': path, 'rows': 2, 'changed': True}
+    assert os.stat(path).st_mtime_ns != 1_000_000_000
+
+
+def test_cancelled_export_leaves_the_target(tmp_path):
+    path = str(tmp_path / "known_words.tsv")
+    write_export_file(_extracted_data(), path, 'tsv')
+
+    with pytest.raises(ExportCancelled):
+        write_export_file(_extracted_data(cards=CARDS[:1]), path, 'tsv', is_cancelled=lambda: True)
+
+    assert _read(path).count("\n") == 3
+    assert os.listdir(tmp_path) == ["known_words.tsv"]
+
+
+def test_empty_export(tmp_path):
+    path = str(tmp_path / "known_words.csv")
+
+    assert write_export_file(_extracted_data(cards=[]), path, 'csv')['rows'] == 0
+    assert _read(path) == "word,sentence\n"
\ No newline at end of file
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+"""
+Rank lookups in the memory-mapped frequency index, and its rebuild when the
+frequency list changes.
+"""
+
+import glob
+import os
+import threading
+
+import pytest
+
+from src.core.errors import ExportError
+from src.core.extraction import CardRow
+from src.core.frequency import apply_frequency, load_frequency_index
+
+
+def _write_list(path, words, mtime_ns=None):
+    with open(path, "w", encoding="utf-8") as source:
+        source.write("".join(word + "\n" for word in words))
+    if mtime_ns is not None:
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+@pytest.fixture
+def list_path(tmp_path):
+    path = str(tmp_path / "frequency.txt")
+    _write_list(path, ["the\t1000", "Of", "日本", "zebra", "the", "apple\t3"])
+    return path
+
+
+@pytest.fixture
+def index_dir(tmp_path):
+    return str(tmp_path / "indexes")
+
+
+def test_ranks(list_path, index_dir):
+    index = load_frequency_index(list_path, index_dir)
+
+    assert index.ranks(["the", "of", "OF", "日本", "zebra", "apple", "missing", ""]) == {
+        "the": 1, "of": 2, "OF": 2, "日本": 3, "zebra": 4, "apple": 5, "missing": None, "": None
+    }
+    assert index.rank("Zebra") == 4
+    assert index.count == 5
+
+
+def test_apply_frequency(list_path, index_dir):
+    index = load_frequency_index(list_path, index_dir)
+    rows = [CardRow(card_id, word, "", 0, 21) for card_id, word in enumerate(["zebra", "missing", "the", "apple"])]
+
+    assert [row.word for row in apply_frequency(rows, index, max_rank=4)] == ["zebra", "the"]
+    assert [row.word for row in apply_frequency(rows, index, sort=True)] == ["the", "zebra", "apple", "missing"]
+
+
+def test_index_is_rebuilt_when_the_list_changes(list_path, index_dir):
+    _write_list(list_path, ["one", "two", "three"], mtime_ns=1_600_000_000_000_000_000)
+    first = load_frequency_index(list_path, index_dir)
+    assert load_frequency_index(list_path, index_dir) is first
+
+    # Same size, new modification time
+    _write_list(list_path, ["two", "one", "three"], mtime_ns=1_600_000_001_000_000_000)
+    second = load_frequency_index(list_path, index_dir)
+    assert second is not first
+    assert second.ranks(["one", "two"]) == {"one": 2, "two": 1}
+
+    # New size, same modification time
+    _write_list(list_path, ["three", "two", "one", "four"], mtime_ns=1_600_000_001_000_000_000)
+    third = load_frequency_index(list_path, index_dir)
+    assert third is not second
+    assert third.ranks(["one", "four"]) == {"one": 3, "four": 4}
+
+    # Only the index of the current version is kept on disk
+    assert len(glob.glob(os.path.join(index_dir, "*.idx"))) == 1
+
+
+def test_previous_index_stays_readable_after_a_reload(list_path, index_dir):
+    previous = load_frequency_index(list_path, index_dir)
+    _write_list(list_path, ["apple", "the"], mtime_ns=1_600_000_000_000_000_000)
+
+    current = load_frequency_index(list_path, index_dir)
+
+    # An export still holding the previous index reads the previous ranks
+    assert previous.ranks(["the", "apple"]) == {"the": 1, "apple": 5}
+    assert current.ranks(["the", "apple"]) == {"the": 2, "apple": 1}
+
+
+def test_concurrent_loads_share_one_index(list_path, index_dir):
+    indexes = []
+    threads = [threading.Thread(target=lambda: indexes.append(load_frequency_index(list_path, index_dir)))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(indexes) == 8
+    assert all(index is indexes[0] for index in indexes)
+
+
+def test_missing_list(tmp_path, index_dir):
+    with pytest.raises(ExportError):
+        load_frequency_index(str(tmp_path / "missing.txt"), index_dir)
\ No newline at end of file
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+"""
+The known-words index must hold the same rows as a full extraction after
+the collection changes the ways it does in Anki: local edits, syncs,
+lapses and reviews.
+"""
+
+import shutil
+import sqlite3
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.core.export_state import watermark_key
+from src.core.extraction import FIELD_SEPARATOR, MATURE_INTERVAL, collect_mature_cards, find_mature_ids_in_deck
+from src.core.headless import HeadlessCollection
+from src.core.known_words_index import open_known_words, update_card
+
+DECK_NAME = "Deck 0"
+FIELDS = (False, "Word", "Sentence")
+
+
+@pytest.fixture
+def collection_path(synthetic_collection_path, tmp_path):
+    """A copy of the synthetic collection that the test may modify."""
+    path = str(tmp_path / "collection.anki2")
+    shutil.copy(synthetic_collection_path, path)
+    return path
+
+
+@pytest.fixture
+def index_path(tmp_path):
+    return str(tmp_path / "known_words.db")
+
+
+def _modify(collection_path, sql, *args, bump_col_mod=True):
+    """Change the collection the way Anki would, moving its modification time unless told otherwise."""
+    db = sqlite3.connect(collection_path)
+    with db:
+        db.execute(sql, args)
+        if bump_col_mod:
+            db.execute("update col set mod = mod + 1")
+    db.close()
+
+
+def _index_rows(col, key, deck_id, index_path):
+    db = open_known_words(col, key, deck_id, *FIELDS, path=index_path)
+    try:
+        return sorted(db.execute(
+            "select card_id, word, sentence, review_date, interval, note_id from words where key = ?", (key,)
+        ).fetchall())
+    finally:
+        db.close()
+
+
+def _extracted_rows(col, deck_id):
+    extracted_data = collect_mature_cards(col, deck_id, *FIELDS)
+    return sorted((row.card_id, row.word, row.sentence, row.review_date, row.interval, row.note_id)
+                  for row in extracted_data['cards'])
+
+
+def test_index_follows_collection_changes(collection_path, index_path):
+    with HeadlessCollection(collection_path) as col:
+        deck_id = col.decks.id_for_name(DECK_NAME)
+        key = watermark_key(collection_path, deck_id, *FIELDS)
+        card_ids = sorted(find_mature_ids_in_deck(col, deck_id))
+
+        # Built from scratch
+        assert _index_rows(col, key, deck_id, index_path) == _extracted_rows(col, deck_id)
+
+        # A note edited locally
+        note_id = col.db.scalar("select nid from cards where id = ?", card_ids[0])
+        _modify(collection_path, "update notes set flds = ?, mod = ? where id = ?",
+                FIELD_SEPARATOR.join(["edited", "an edited sentence", "", ""]), int(time.time()), note_id)
+        rows = _index_rows(col, key, deck_id, index_path)
+        assert rows == _extracted_rows(col, deck_id)
+        assert ("edited", "an edited sentence") in [(row[1], row[2]) for row in rows]
+
+        # A card reviewed on another device: its modification time is the
+        # other device's, only its update sequence number changes
+        _modify(collection_path, "update cards set ivl = ivl + 1, due = due + 7, usn = 1 where id = ?", card_ids[1])
+        assert _index_rows(col, key, deck_id, index_path) == _extracted_rows(col, deck_id)
+
+        # A mature card lapsed
+        _modify(collection_path, "update cards set ivl = 1, mod = ? where id = ?", int(time.time()), card_ids[2])
+        rows = _index_rows(col, key, deck_id, index_path)
+        assert rows == _extracted_rows(col, deck_id)
+        assert card_ids[2] not in [row[0] for row in rows]
+
+        # A card deleted
+        _modify(collection_path, "delete from cards where id = ?", card_ids[3])
+        assert _index_rows(col, key, deck_id, index_path) == _extracted_rows(col, deck_id)
+
+
+def test_index_is_reconciled_when_col_mod_changes(collection_path, index_path):
+    with HeadlessCollection(collection_path) as col:
+        deck_id = col.decks.id_for_name(DECK_NAME)
+        key = watermark_key(collection_path, deck_id, *FIELDS)
+        indexed = _index_rows(col, key, deck_id, index_path)
+
+        # Anki moves the collection's modification time with every change;
+        # while it is unchanged the index is used as is
+        card_id = min(find_mature_ids_in_deck(col, deck_id))
+        _modify(collection_path, "update cards set ivl = 1 where id = ?", card_id, bump_col_mod=False)
+        assert _index_rows(col, key, deck_id, index_path) == indexed
+
+        _modify(collection_path, "update col set mod = mod + 1", bump_col_mod=False)
+        rows = _index_rows(col, key, deck_id, index_path)
+        assert rows == _extracted_rows(col, deck_id)
+        assert card_id not in [row[0] for row in rows]
+
+
+def test_update_card_follows_reviews(collection_path, index_path):
+    with HeadlessCollection(collection_path) as col:
+        deck_id = col.decks.id_for_name(DECK_NAME)
+        key = watermark_key(collection_path, deck_id, *FIELDS)
+        _index_rows(col, key, deck_id, index_path)
+        card_id = min(find_mature_ids_in_deck(col, deck_id))
+        did, due, note_id = col.db.first("select did, due, nid from cards where id = ?", card_id)
+        note_type_id, flds = col.db.first("select mid, flds from notes where id = ?", note_id)
+        note = SimpleNamespace(mid=note_type_id, fields=flds.split(FIELD_SEPARATOR))
+
+        def review(interval):
+            _modify(collection_path, "update cards set ivl = ?, due = ? where id = ?", interval, due + 1, card_id,
+                    bump_col_mod=False)
+            card = SimpleNamespace(id=card_id, did=did, ivl=interval, due=due + 1, nid=note_id, note=lambda: note)
+            update_card(col, card, path=index_path)
+            # Reading the index right after the hook, without a reconcile
+            db = sqlite3.connect(index_path)
+            try:
+                return db.execute("select interval, review_date from words where key = ? and card_id = ?",
+                                  (key, card_id)).fetchone()
+            finally:
+                db.close()
+
+        # Answering a mature card refreshes its row, lapsing it removes it
+        assert review(MATURE_INTERVAL + 10) == (MATURE_INTERVAL + 10, due + 1)
+        assert review(1) is None
+
+        # Both are in line with a full extraction once the change is reconciled
+        _modify(collection_path, "update col set mod = mod + 1", bump_col_mod=False)
+        assert _index_rows(col, key, deck_id, index_path) == _extracted_rows(col, deck_id)
\ No newline at end of file
@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+
+"""
+Normalization of field values and deduplication of rows.
+"""
+
+import pytest
+
+from src.core.extraction import CardRow
+from src.core.normalization import normalize_field, normalize_rows
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("  plain   text ", "plain text"),
+    ("<b>bold</b> and <span style=\"color: red\">red</span>", "bold and red"),
+    ("line<br>break<div>block</div>", "line break block"),
+    ("&nbsp;caf&eacute;&nbsp;", "café"),
+    ("&lt;b&gt; is a tag", "<b> is a tag"),
+    ("5 < 6 and 7 > 3", "5 < 6 and 7 > 3"),
+    ("a <!-- comment -->b", "a b"),
+    ("{{c1::answer::hint}} and {{c2::other}}", "answer and other"),
+    ("word[sound:word.mp3]", "word"),
+    ("日本[にほん]", "日本"),
+    ("I like 日本[にほん]", "I like 日本"),
+    ("毎日[まいにち] 勉強[べんきょう]する", "毎日勉強する"),
+    ("<ruby>漢字<rt>かんじ</rt></ruby>", "漢字かんじ"),
+])
+def test_normalize_field(value, expected):
+    assert normalize_field(value) == expected
+
+
+def _rows(values):
+    """CardRows for (note_id, word, sentence) tuples, with card ids in order."""
+    return [CardRow(card_id, word, sentence, 0, 21, note_id)
+            for card_id, (note_id, word, sentence) in enumerate(values, start=1)]
+
+
+ROWS = [
+    (1, "<b>猫</b>", "I like 猫[ねこ]"),
+    (1, "猫", "sibling card"),
+    (2, "猫", "another note"),
+    (3, "", "no word"),
+    (3, "", "no word either"),
+    (4, "犬&nbsp;", "<i>dog</i>"),
+]
+
+
+def test_normalize_rows():
+    rows = list(normalize_rows(_rows(ROWS)))
+
+    assert [(row.word, row.sentence) for row in rows] == [
+        ("猫", "I like 猫"), ("猫", "sibling card"), ("猫", "another note"),
+        ("", "no word"), ("", "no word either"), ("犬", "dog"),
+    ]
+
+
+@pytest.mark.parametrize("dedupe, card_ids", [
+    (None, [1, 2, 3, 4, 5, 6]),
+    ('note', [1, 3, 4, 5, 6]),
+    ('global', [1, 4, 5, 6]),
+])
+def test_normalize_rows_dedupe(dedupe, card_ids):
+    # Words are compared after normalization; rows without a word are kept
+    assert [row.card_id for row in normalize_rows(_rows(ROWS), dedupe=dedupe)] == card_ids
+
+
+def test_normalize_rows_in_processes_keeps_order():
+    rows = _rows(ROWS * 3)
+
+    in_pool = [(row.card_id, row.word, row.sentence) for row in normalize_rows(_rows(ROWS * 3), processes=2)]
+
+    assert in_pool == [(row.card_id, row.word, row.sentence) for row in normalize_rows(rows)]
+
+
+def test_normalize_rows_unknown_dedupe():
+    with pytest.raises(ValueError):
+        list(normalize_rows(_rows(ROWS), dedupe='card'))
\ No newline at end of file
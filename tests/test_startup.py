@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+"""
+Anki's startup must only load the menu setup: the workflows, their dialogs
+and the extraction code are imported on the first menu click, and loading
+the add-on stays within the startup budget of benchmarks/bench_import.py.
+
+Each check runs in a fresh interpreter, as the test session itself has
+already imported most of the add-on.
+"""
+
+import os
+import subprocess
+import sys
+import textwrap
+
+from bench_import import BENCHMARKS_DIR, DEFAULT_BUDGET_MS, measure_startup
+
+ADDON_DIR = os.path.dirname(BENCHMARKS_DIR)
+
+# Modules that must not be imported while Anki starts.
+LAZY_MODULES = ['src.workflow', 'src.auto_export', 'src.core', 'src.core.extraction', 'src.ui']
+
+
+def _run(code):
+    script = textwrap.dedent(f"""
+        import importlib.util, sys, types
+        sys.path.insert(0, {BENCHMARKS_DIR!r})
+        from anki_stubs import install_anki_stubs
+        install_anki_stubs()
+
+        # Import the add-on the way Anki does, as a package named after its folder
+        spec = importlib.util.spec_from_file_location(
+            "addon", {os.path.join(ADDON_DIR, "__init__.py")!r}, submodule_search_locations=[{ADDON_DIR!r}]
+        )
+        addon = importlib.util.module_from_spec(spec)
+        sys.modules["addon"] = addon
+        spec.loader.exec_module(addon)
+        lazy = {LAZY_MODULES!r}
+    """) + textwrap.dedent(code)
+    result = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, cwd=ADDON_DIR)
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+
+def test_startup_does_not_import_workflows():
+    output = _run("""
+        print(",".join(name for name in lazy if name in sys.modules))
+    """)
+    assert output.strip() == ""
+
+
+def test_run_workflow_imports_workflow_on_first_use():
+    # The real workflow module needs a running Anki; a stand-in registered as
+    # src.workflow records the call instead.
+    output = _run("""
+        assert "src.workflow" not in sys.modules
+        calls = []
+        workflow = types.ModuleType("src.workflow")
+        workflow.run_batch_workflow = lambda: calls.append("run_batch_workflow") or True
+        sys.modules["src.workflow"] = workflow
+
+        assert addon.run_workflow("run_batch_workflow") is True
+        print(calls)
+    """)
+    assert output.strip() == "['run_batch_workflow']"
+
+
+def test_hooks_are_registered_without_importing_workflows():
+    output = _run("""
+        from aqt import gui_hooks
+        from anki.hooks import hooks
+        print(len(hooks["profileLoaded"]), len(gui_hooks.reviewer_did_answer_card),
+              len(gui_hooks.sync_did_finish), len(gui_hooks.profile_will_close))
+        print(",".join(name for name in lazy if name in sys.modules))
+    """)
+    registered, loaded = output.splitlines()
+    assert registered == "1 1 1 1"
+    assert loaded.strip() == ""
+
+
+def test_startup_is_within_budget():
+    # Best of a few runs, as the first one also pays for cold file caches
+    assert measure_startup(repeat=3) < DEFAULT_BUDGET_MS
\ No newline at end of file